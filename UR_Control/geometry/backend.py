@@ -0,0 +1,33 @@
+"""
+The geometry backend of Beam, Dowel, Hole and FabricatableBeam, selected at
+import time: Rhino.Geometry and Grasshopper inside Rhino, the NumPy subset
+of geometry/numpy_backend.py elsewhere.
+
+Set the environment variable GEOMETRY_BACKEND to "rhino" or "numpy" to
+choose one (e.g. "numpy" inside Rhino 7 with CPython).
+
+    from geometry.backend import rg, ghpath, datatree, System
+"""
+
+import os
+
+BACKEND = os.environ.get("GEOMETRY_BACKEND", "").lower()
+
+if BACKEND not in ("", "rhino", "numpy"):
+    raise ValueError("GEOMETRY_BACKEND must be rhino or numpy, not %s" % BACKEND)
+
+if BACKEND != "numpy":
+    try:
+        import Rhino.Geometry as rg
+        import Grasshopper.Kernel.Data.GH_Path as ghpath
+        import Grasshopper.DataTree as datatree
+        import System
+        BACKEND = "rhino"
+    except ImportError:
+        if BACKEND == "rhino":
+            raise
+        BACKEND = "numpy"
+
+if BACKEND == "numpy":
+    import geometry.numpy_backend as rg
+    from geometry.numpy_backend import ghpath, datatree, System
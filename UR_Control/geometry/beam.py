@@ -2,21 +2,26 @@
 # Basic classes for MAS-DFAB 2018-19 T2 GKR Project
 #
 
+from __future__ import print_function
+
 __author__ = "masdfab students"
 __status__ = "development"
 __version__ = "0.0.1"
 __date__    = "15 January 2019"
 
-import Rhino.Geometry as rg
-import Grasshopper.Kernel.Data.GH_Path as ghpath
-import Grasshopper.DataTree as datatree
-import System
+from geometry.backend import rg, ghpath, datatree, System
+from geometry.spatial_index import DowelIndex
+from geometry.solid_cache import SolidCache
 import math
 
 class Beam(object):
     """ Beam class containing its size and connecting dowels
     """
 
+    # the breps of brep_representation shared by all beams, see set_solid_cache
+    solid_cache = SolidCache()
+    solid_digits = 6
+
     def __init__(self, base_plane, dx, dy, dz, end_cover = 70):
         """ initialization
 
@@ -48,43 +53,101 @@ class Beam(object):
         self.dowel_list.append(dowel)
         dowel.beam_list.append(self)
 
-    def remove_duplicates_in_dowel_list(self):
-        """ resolve dowel duplication
+    def remove_duplicates_in_dowel_list(self, tolerance=1.0, angle_tolerance=1e-3):
+        """ resolve dowel duplication: of coincident or near-duplicate dowels
+            (see DowelIndex) only the first one is kept, the others are no
+            longer linked to this beam. By default the dowels within 1 mm and
+            1e-3 rad are merged (before, only equal dowels were dropped)
+
+            :param tolerance:        the distance between the dowel lines (default = 1.0)
+            :param angle_tolerance:  the angle between the dowel lines in radians (default = 1e-3)
         """
 
-        removed_dowel_list = []
-        for i, d1 in enumerate(self.dowel_list):
+        unique = DowelIndex(self.dowel_list, tolerance, angle_tolerance).unique()
+        kept = set(id(dowel) for dowel in unique)
+        # unlink this beam from the dropped dowels, as merge_duplicate_dowels does
+        for dowel in self.dowel_list:
+            if id(dowel) not in kept:
+                dowel.beam_list = [beam for beam in dowel.beam_list if beam is not self]
+        self.dowel_list = unique
+
+    def get_box(self):
+        """ make a box of this beam (with the end covers and the extension)
 
-            if i < len(self.dowel_list) - 1:
+            :return: box object of this beam
+        """
+        total_extension = self.end_cover + self.extension
 
-                duplicated = False
-                for j, d2 in enumerate(self.dowel_list[i+1:]):
+        return rg.Box(self.base_plane,
+            rg.Interval(-self.dx*0.5 - total_extension, self.dx*0.5 + total_extension),
+            rg.Interval(-self.dy*0.5, self.dy*0.5),
+            rg.Interval(-self.dz*0.5, self.dz*0.5)
+            )
 
-                    if d1 == d2:
-                        duplicated = True
-                        break
+    def get_hole_pipes(self):
+        """ make the cylinders of the holes of the dowels (twice the length of the dowel lines)
+
+            :return: list of cylinder objects
+        """
 
-            if not duplicated:
-                removed_dowel_list.append(d1)
+        pipes = []
+        for dowel in self.dowel_list:
+
+            scale_value = 2.0
+            line = rg.Line(dowel.get_line(scale_value).PointAt(0.0), dowel.get_line(scale_value).PointAt(1.0))
+            pipes.append(dowel.get_hole_pipe(line))
+
+        return pipes
 
-        self.dowel_list = removed_dowel_list
+    def primitive_representation(self):
+        """ the box and the hole cylinders of this beam without any boolean operation,
+            for previews and collision checks (much cheaper than brep_representation)
+
+            :return: tuple of (box object, list of cylinder objects)
+        """
+
+        return self.get_box(), self.get_hole_pipes()
+
+    def solid_key(self, make_holes=False):
+        """ the content of the brep of this beam: the base plane, the sizes and
+            (with holes) the dowel lines and hole radii, rounded to solid_digits
+
+            :param make_holes:  boolean value whether the holes are part of the brep
+            :return: tuple of floats
+        """
+
+        digits = self.solid_digits
+        plane = self.base_plane
+        key = [round(v, digits) for p in (plane.Origin, plane.XAxis, plane.YAxis, plane.ZAxis) for v in (p.X, p.Y, p.Z)]
+        key += [round(v, digits) for v in (self.dx, self.dy, self.dz, self.end_cover + self.extension)]
+
+        if make_holes:
+            for dowel in self.dowel_list:
+                line = dowel.get_line(2.0)
+                key += [round(v, digits) for p in (line.PointAt(0.0), line.PointAt(1.0)) for v in (p.X, p.Y, p.Z)]
+                key.append(round(dowel.hole_radius, digits))
+
+        return (make_holes,) + tuple(key)
 
     def brep_representation(self, make_holes=False, box = None):
-        """ make a brep of this beam with holes
+        """ make a brep of this beam with holes. without a given box the brep is
+            cached in Beam.solid_cache (by solid_key) and the booleans are only
+            computed for a beam not seen before (see set_solid_cache to disable it)
 
             :param make_holes:  boolean value to make holes in the beam (making holes requires some computation time)
             :paran box:  box object in the case one has been created through another function
             :return: brep object of this beam
         """
-        total_extension = self.end_cover + self.extension
 
-        if (box == None):
-            # create a box in case one hasn't been fed in
-            box = rg.Box(self.base_plane,
-                rg.Interval(-self.dx*0.5 - total_extension, self.dx*0.5 + total_extension),
-                rg.Interval(-self.dy*0.5, self.dy*0.5),
-                rg.Interval(-self.dz*0.5, self.dz*0.5)
-                )
+        if box == None and self.solid_cache is not None:
+            return self.solid_cache.get(self.solid_key(make_holes), lambda: self.__create_brep(make_holes, self.get_box()))
+
+        return self.__create_brep(make_holes, box if box != None else self.get_box())
+
+    def __create_brep(self, make_holes, box):
+        """
+        private method to make the brep of a box with the holes
+        """
 
         box = box.ToBrep()
 
@@ -92,11 +155,7 @@ class Beam(object):
             return box
 
         # create a dowels
-        for dowel in self.dowel_list:
-
-            scale_value = 2.0
-            line = rg.Line(dowel.get_line(scale_value).PointAt(0.0), dowel.get_line(scale_value).PointAt(1.0))
-            pipe = dowel.get_hole_pipe(line)
+        for pipe in self.get_hole_pipes():
 
             pipe = pipe.ToBrep(True, True)
 
@@ -278,7 +337,6 @@ class Beam(object):
                 pt_is_problem = True
                 for top_rec in self.top_recs:
                     containment_val = top_rec.Contains(top_pt)
-                    print containment_val
                     if (containment_val == inside or containment_val == coincident):
                         pt_is_problem = False
                         break
@@ -299,7 +357,7 @@ class Beam(object):
 
             return boundary_constraints
         else:
-            print "this beam doesn't have any dowels linked to it!"
+            print("this beam doesn't have any dowels linked to it!")
 
     def move_to_origin(self):
         """ in-place transform to move it to the origin of world coordinate system
@@ -414,3 +472,15 @@ class Beam(object):
                 tree.Add(dowel.get_calculated_line(), path)
 
         return tree
+
+
+def set_solid_cache(cache):
+    """ set the SolidCache of Beam.brep_representation shared by all beams
+
+        :param cache:  SolidCache object, or None to disable the caching
+        :return: the previous SolidCache (or None)
+    """
+
+    previous = Beam.solid_cache
+    Beam.solid_cache = cache
+    return previous
@@ -0,0 +1,224 @@
+"""
+A whole structure of FabricatableBeam as columns of NumPy arrays.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from geometry.backend import rg
+from geometry.fabricatable_beam import FabricatableBeam
+
+FLAGS = ["has_pockets", "has_dowel_holes", "has_annoying_pockets", "is_shitty_beam"]
+PLANE_KEYS = ["x", "y", "z", "xx", "xy", "xz", "yx", "yy", "yz"]
+
+
+def _unitize(v):
+    return v / np.linalg.norm(v, axis=-1)[..., None]
+
+
+def orthonormalize(xaxes, yaxes):
+    """ The axes (x, y, z) of planes from x- and y-axes (...,3), as rg.Plane(origin, xaxis, yaxis). """
+    x = _unitize(np.asarray(xaxes, dtype=float))
+    y = np.asarray(yaxes, dtype=float)
+    y = _unitize(y - (y * x).sum(axis=-1)[..., None] * x)
+    return x, y, np.cross(x, y)
+
+
+def plane_to_matrix(plane):
+    """ The 4x4 matrix (columns xaxis, yaxis, zaxis, origin) of a rg.Plane. """
+    M = np.eye(4)
+    for i, v in enumerate([plane.XAxis, plane.YAxis, plane.ZAxis, plane.Origin]):
+        M[:3, i] = [v.X, v.Y, v.Z]
+    return M
+
+
+def transform_to_matrix(transform):
+    """ The 4x4 matrix of a rg.Transform (a matrix is returned as it is). """
+    if isinstance(transform, rg.Transform):
+        return np.array([[transform[i, j] for j in range(4)] for i in range(4)])
+    return np.asarray(transform, dtype=float)
+
+
+class BeamSet(object):
+    """ The beams of a structure as columns: per beam a row of origins,
+    xaxes, yaxes, zaxes (N,3), dims (N,3) (dx, dy, dz) and flags (N,4) (see
+    FLAGS), the holes of all beams as rows of hole_origins, hole_xaxes,
+    hole_yaxes, hole_zaxes (H,3), the holes of beam i are the rows
+    hole_offsets[i]:hole_offsets[i + 1].
+
+    The operations (transform, orient, flip, direct) return a new BeamSet
+    and work on all rows at once. FabricatableBeam objects are only created
+    when a beam is accessed: beam_set[i], iteration or to_beams().
+
+    Example:
+        beam_set = BeamSet.read_from_json(path, scale=0.2)
+        beam_set = beam_set.orient(src_plane).direct(rg.Plane.WorldXY)
+        beams = beam_set.to_beams()
+    """
+
+    def __init__(self, origins, xaxes, yaxes, dims, flags, hole_origins, hole_xaxes, hole_yaxes, hole_offsets):
+        self.origins = np.asarray(origins, dtype=float).reshape(-1, 3)
+        self.xaxes, self.yaxes, self.zaxes = orthonormalize(np.reshape(xaxes, (-1, 3)), np.reshape(yaxes, (-1, 3)))
+        self.dims = np.asarray(dims, dtype=float).reshape(-1, 3)
+        self.flags = np.asarray(flags, dtype=bool).reshape(-1, len(FLAGS))
+        self.hole_origins = np.asarray(hole_origins, dtype=float).reshape(-1, 3)
+        self.hole_xaxes, self.hole_yaxes, self.hole_zaxes = orthonormalize(np.reshape(hole_xaxes, (-1, 3)),
+                                                                           np.reshape(hole_yaxes, (-1, 3)))
+        self.hole_offsets = np.asarray(hole_offsets, dtype=int)
+
+    def _copy(self, **columns):
+        """ A BeamSet with some of the columns replaced (the axes are already orthonormal). """
+        beam_set = BeamSet.__new__(BeamSet)
+        beam_set.__dict__.update(self.__dict__)
+        beam_set.__dict__.update(columns)
+        return beam_set
+
+    def __len__(self):
+        return len(self.origins)
+
+    @property
+    def number_of_holes(self):
+        return np.diff(self.hole_offsets)
+
+    @property
+    def hole_beam_indices(self):
+        """ The index of the beam of each hole (H,). """
+        return np.repeat(np.arange(len(self)), self.number_of_holes)
+
+    @property
+    def matrices(self):
+        """ The base planes as 4x4 matrices (N,4,4). """
+        return self._matrices(self.origins, self.xaxes, self.yaxes, self.zaxes)
+
+    @property
+    def hole_matrices(self):
+        return self._matrices(self.hole_origins, self.hole_xaxes, self.hole_yaxes, self.hole_zaxes)
+
+    @staticmethod
+    def _matrices(origins, xaxes, yaxes, zaxes):
+        M = np.zeros((len(origins), 4, 4))
+        M[:, :3, 0], M[:, :3, 1], M[:, :3, 2], M[:, :3, 3] = xaxes, yaxes, zaxes, origins
+        M[:, 3, 3] = 1.
+        return M
+
+    # the beams
+
+    def __getitem__(self, i):
+        """ The beam i as FabricatableBeam (a copy: changes are not written back). """
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("beam index out of range")
+        start, end = self.hole_offsets[i], self.hole_offsets[i + 1]
+        holes = [self._plane(self.hole_origins[j], self.hole_xaxes[j], self.hole_yaxes[j]) for j in range(start, end)]
+        dx, dy, dz = self.dims[i].tolist()
+        flags = [bool(f) for f in self.flags[i]]
+        return FabricatableBeam(self._plane(self.origins[i], self.xaxes[i], self.yaxes[i]), dx, dy, dz, holes, *flags)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_beams(self):
+        return list(self)
+
+    @staticmethod
+    def _plane(origin, xaxis, yaxis):
+        return rg.Plane(rg.Point3d(*origin.tolist()), rg.Vector3d(*xaxis.tolist()), rg.Vector3d(*yaxis.tolist()))
+
+    @classmethod
+    def from_beams(cls, beams):
+        """ The columns of FabricatableBeam objects. """
+        def columns(planes):
+            planes = [plane_to_matrix(plane) for plane in planes]
+            if not planes:
+                return np.zeros((0, 3)), np.zeros((0, 3)), np.zeros((0, 3))
+            M = np.array(planes)
+            return M[:, :3, 3], M[:, :3, 0], M[:, :3, 1]
+
+        origins, xaxes, yaxes = columns([b.base_plane for b in beams])
+        hole_origins, hole_xaxes, hole_yaxes = columns([h for b in beams for h in b.holes])
+        dims = [[b.dx, b.dy, b.dz] for b in beams]
+        flags = [[getattr(b, flag) for flag in FLAGS] for b in beams]
+        hole_offsets = np.concatenate([[0], np.cumsum([len(b.holes) for b in beams])])
+        return cls(origins, xaxes, yaxes, dims, flags, hole_origins, hole_xaxes, hole_yaxes, hole_offsets)
+
+    # json, as FabricatableBeam.read_from_json and write_as_json
+
+    @classmethod
+    def read_from_json(cls, path, scale=1.0):
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        planes = np.array([[float(d['plane'][key]) for key in PLANE_KEYS] for d in data]).reshape(-1, 9)
+        holes = np.array([[float(h[key]) for key in PLANE_KEYS] for d in data for h in d['holes']]).reshape(-1, 9)
+        dims = np.array([[float(d['dx']), float(d['dy']), float(d['dz'])] for d in data]).reshape(-1, 3)
+        flags = [[int(d.get(flag, 0)) == 1 for flag in FLAGS] for d in data]
+        hole_offsets = np.concatenate([[0], np.cumsum([len(d['holes']) for d in data])]).astype(int)
+
+        return cls(planes[:, :3] * scale, planes[:, 3:6], planes[:, 6:], dims * scale, flags,
+                   holes[:, :3] * scale, holes[:, 3:6], holes[:, 6:], hole_offsets)
+
+    def write_as_json(self, name='name', to='./data'):
+        if not os.path.exists(to):
+            os.makedirs(to)
+
+        def plane_dic(origin, xaxis, yaxis):
+            return dict(zip(PLANE_KEYS, origin.tolist() + xaxis.tolist() + yaxis.tolist()))
+
+        data = []
+        for i in range(len(self)):
+            d = {'plane': plane_dic(self.origins[i], self.xaxes[i], self.yaxes[i]),
+                 'dx': self.dims[i, 0], 'dy': self.dims[i, 1], 'dz': self.dims[i, 2]}
+            for flag, value in zip(FLAGS, self.flags[i]):
+                d[flag] = 1 if value else 0
+            d['holes'] = [plane_dic(self.hole_origins[j], self.hole_xaxes[j], self.hole_yaxes[j])
+                          for j in range(self.hole_offsets[i], self.hole_offsets[i + 1])]
+            data.append(d)
+
+        with open(os.sep.join([to, str(name) + '.json']), 'w') as f:
+            json.dump(data, f)
+
+    # the operations
+
+    def transform(self, transform):
+        """ All planes transformed by a rg.Transform or a 4x4 matrix, as FabricatableBeam.transform. """
+        M = transform_to_matrix(transform)
+        R, t = M[:3, :3], M[:3, 3]
+
+        def axes(xaxes, yaxes):
+            # as rg.Plane.Transform, re-orthonormalized
+            return orthonormalize(np.dot(xaxes, R.T), np.dot(yaxes, R.T))
+
+        xaxes, yaxes, zaxes = axes(self.xaxes, self.yaxes)
+        hole_xaxes, hole_yaxes, hole_zaxes = axes(self.hole_xaxes, self.hole_yaxes)
+        return self._copy(origins=np.dot(self.origins, R.T) + t, xaxes=xaxes, yaxes=yaxes, zaxes=zaxes,
+                          hole_origins=np.dot(self.hole_origins, R.T) + t,
+                          hole_xaxes=hole_xaxes, hole_yaxes=hole_yaxes, hole_zaxes=hole_zaxes)
+
+    def orient(self, src, target=None):
+        """ As FabricatableBeam.orient_structure: from the plane src to target (default world XY). """
+        M = np.eye(4) if target is None else plane_to_matrix(target)
+        return self.transform(np.dot(M, np.linalg.inv(plane_to_matrix(src))))
+
+    def flip(self, mask=None):
+        """ As FabricatableBeam.flip_whole_structure: the y- and z-axes of the
+        base planes reversed, the holes flipped (x- and y-axis swapped). With
+        mask (N,) bool only the beams of the mask. """
+        if mask is None:
+            mask = np.ones(len(self), dtype=bool)
+        mask = np.asarray(mask, dtype=bool)
+        holes = np.repeat(mask, self.number_of_holes)[:, None]
+        sign = np.where(mask[:, None], -1., 1.)
+        return self._copy(yaxes=self.yaxes * sign, zaxes=self.zaxes * sign,
+                          hole_xaxes=np.where(holes, self.hole_yaxes, self.hole_xaxes),
+                          hole_yaxes=np.where(holes, self.hole_xaxes, self.hole_yaxes),
+                          hole_zaxes=np.where(holes, -self.hole_zaxes, self.hole_zaxes))
+
+    def direct(self, base_plane):
+        """ As FabricatableBeam.direct_all_beams: the beams with the normal
+        pointing away from the normal of base_plane flipped. """
+        normal = plane_to_matrix(base_plane)[:3, 2]
+        return self.flip(np.dot(self.zaxes, normal) < 0)
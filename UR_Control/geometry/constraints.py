@@ -0,0 +1,286 @@
+"""
+The constraint checks of Beam and Dowel for all beam - dowel incidences of a
+structure at once, on NumPy arrays:
+
+- boundary: Beam.check_boundary_constraints
+- angle: Beam.check_angle_constraints
+- edge: Dowel.get_distance_from_edges
+- spacing: Dowel.check_spacing_constraints
+
+    report = check_constraints(beams)
+    print(report)
+    spheres = report.spheres("boundary")
+"""
+
+import math
+
+import numpy as np
+
+from geometry.backend import rg
+from geometry.beam_set import plane_to_matrix
+from geometry.spatial_index import BeamIndex
+
+# the length of the line of a dowel given by a plane, as Dowel.get_line
+INFINITE = 999
+
+BOUNDARY = np.dtype([("beam", int), ("dowel", int), ("top", bool), ("point", float, 3), ("radius", float)])
+ANGLE = np.dtype([("beam", int), ("dowel", int), ("angle", float), ("point", float, 3), ("radius", float)])
+EDGE = np.dtype([("beam", int), ("dowel", int), ("distance", float)])
+SPACING = np.dtype([("dowel", int), ("beams", int, 2), ("start", float, 3), ("end", float, 3), ("distance", float)])
+
+
+class Structure(object):
+    """ The beams, the dowels and the incidences (beam, dowel) of a structure
+    as arrays: the beams in the order of the list, the dowels in the order
+    they first appear in the dowel lists, the incidences as in the dowel
+    lists of the beams. Or the dowels and incidences (beam index, dowel
+    index) given, see from_geometry. """
+
+    def __init__(self, beams, dowels=None, incidences=None):
+        self.beams = beams
+        if dowels is None:
+            self.dowels = []
+            index = {}
+            incidences = []
+            for i, beam in enumerate(beams):
+                for dowel in beam.dowel_list:
+                    if id(dowel) not in index:
+                        index[id(dowel)] = len(self.dowels)
+                        self.dowels.append(dowel)
+                    incidences.append((i, index[id(dowel)]))
+        else:
+            self.dowels = list(dowels)
+        incidences = np.array(incidences, dtype=int).reshape(-1, 2)
+        self.incidence_beams, self.incidence_dowels = incidences[:, 0], incidences[:, 1]
+
+        M = np.array([plane_to_matrix(beam.base_plane) for beam in beams]).reshape(-1, 4, 4)
+        self.origins, self.xaxes, self.yaxes, self.zaxes = M[:, :3, 3], M[:, :3, 0], M[:, :3, 1], M[:, :3, 2]
+        self.dims = np.array([[beam.dx, beam.dy, beam.dz] for beam in beams], dtype=float).reshape(-1, 3)
+        # the radius used by check_boundary_constraints: the one of the first dowel
+        self.beam_dowel_radii = np.array([beam.dowel_list[0].dowel_radius if beam.dowel_list else np.nan
+                                          for beam in beams], dtype=float)
+        for i, j in zip(self.incidence_beams[::-1], self.incidence_dowels[::-1]):
+            if not beams[i].dowel_list:
+                self.beam_dowel_radii[i] = self.dowels[j].dowel_radius
+
+        self.starts = np.zeros((len(self.dowels), 3))
+        self.ends = np.zeros((len(self.dowels), 3))
+        for j, dowel in enumerate(self.dowels):
+            line = dowel.line
+            if not line:
+                plane = plane_to_matrix(dowel.base_plane)
+                line = [plane[:3, 3] + plane[:3, 2] * INFINITE, plane[:3, 3] - plane[:3, 2] * INFINITE]
+            else:
+                line = [[p.X, p.Y, p.Z] for p in (line.From, line.To)]
+            self.starts[j], self.ends[j] = line
+        # the normals of Dowel.get_plane
+        self.normals = np.array([plane_to_matrix(dowel.base_plane)[:3, 2] if dowel.base_plane else
+                                 self.starts[j] - self.ends[j] for j, dowel in enumerate(self.dowels)]).reshape(-1, 3)
+        self.normals /= np.linalg.norm(self.normals, axis=1)[:, None]
+        self.dowel_radii = np.array([dowel.dowel_radius for dowel in self.dowels], dtype=float)
+
+    @classmethod
+    def from_geometry(cls, beams, dowels, index=None, length=None):
+        """ The structure with the incidences of the dowels with the beams
+        they pass through (BeamIndex.incidences), not the dowel lists. """
+        index = index or BeamIndex(beams)
+        return cls(beams, dowels, index.incidences(dowels, length))
+
+    def intersect(self, offsets=0.):
+        """ The line parameters and points of the incidences with the base
+        planes of their beams, translated along the zaxis by offsets (K,), as
+        rg.Intersect.Intersection.LinePlane. Parallel lines: nan. """
+        b, d = self.incidence_beams, self.incidence_dowels
+        z = self.zaxes[b]
+        a = ((self.starts[d] - self.origins[b]) * z).sum(axis=1) - offsets
+        e = ((self.ends[d] - self.origins[b]) * z).sum(axis=1) - offsets
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(a != e, a / (a - e), np.nan)
+        points = self.starts[d] + t[:, None] * (self.ends[d] - self.starts[d])
+        return t, points
+
+    def local(self, points):
+        """ The coordinates (s, t) of the points (K,3) in the base planes of
+        the beams of the incidences. """
+        b = self.incidence_beams
+        v = points - self.origins[b]
+        return (v * self.xaxes[b]).sum(axis=1), (v * self.yaxes[b]).sum(axis=1)
+
+
+def boundary_rectangles(dx, dowel_radius, end_buf=70, mid_buf=500, mid_open=450):
+    """ The x intervals (...,R,2) of the rectangles of check_boundary_constraints
+    (as Beam.check_boundary_constraints, with the single rectangle without
+    mid_buf of length 2 * (dx - dowel_radius - end_buf)). """
+    dx, dowel_radius = np.broadcast_arrays(np.asarray(dx, dtype=float), np.asarray(dowel_radius, dtype=float))
+    intervals = []
+    if mid_open < mid_buf and mid_open > .001:
+        x_val = mid_open * .5 - dowel_radius
+        intervals.append([-x_val, x_val])
+    if mid_buf > .001:
+        x_value_1 = dx * .5 - dowel_radius - end_buf
+        x_value_2 = .5 * mid_buf + dowel_radius
+        intervals.append([-x_value_1, -x_value_2])
+        intervals.append([x_value_2, x_value_1])
+    else:
+        x_value = dx - dowel_radius - end_buf
+        intervals.append([-x_value, x_value])
+    # (R,2,...) to (...,R,2)
+    intervals = np.moveaxis(np.array(intervals), [0, 1], [-2, -1])
+    return np.sort(intervals, axis=-1)
+
+
+def check_boundary(structure, side_buf=10, end_buf=70, mid_buf=500, mid_open=450, angle_correction=1.1):
+    """ The points of the dowels on the top and bottom faces of their beams
+    outside of all rectangles of Beam.check_boundary_constraints. """
+    b, d = structure.incidence_beams, structure.incidence_dowels
+    dx, dy, dz = structure.dims[b].T
+    dowel_radius = structure.beam_dowel_radii[b] * angle_correction
+    y_value = .5 * dy - (dowel_radius + side_buf)
+    intervals = boundary_rectangles(dx, dowel_radius, end_buf, mid_buf, mid_open)  # (K,R,2)
+
+    violations = []
+    for top, sign in [(True, 1.), (False, -1.)]:
+        t, points = structure.intersect(sign * 0.5 * dz)
+        s, u = structure.local(points)
+        inside_y = np.abs(u) <= np.abs(y_value)
+        inside = ((intervals[:, :, 0] <= s[:, None]) & (s[:, None] <= intervals[:, :, 1])).any(axis=1) & inside_y
+        # parallel to the faces: no point on them
+        problem = ~inside | np.isnan(t)
+        violation = np.zeros(problem.sum(), dtype=BOUNDARY)
+        violation["beam"], violation["dowel"], violation["top"] = b[problem], d[problem], top
+        violation["point"], violation["radius"] = points[problem], dz[problem]
+        violations.append(violation)
+    return np.concatenate(violations)
+
+
+def dowel_angles(structure):
+    """ The angles (K,) between the normals of the beams and the dowels of
+    the incidences, in [0, pi / 2], as Beam.get_angle_between_beam_and_dowel. """
+    c = (structure.zaxes[structure.incidence_beams] * structure.normals[structure.incidence_dowels]).sum(axis=1)
+    angles = np.arccos(np.clip(c, -1., 1.))
+    return np.where(angles > math.pi * 0.5, math.pi - angles, angles)
+
+
+def check_angle(structure, angle=55):
+    """ The incidences with an angle between beam and dowel over
+    pi / 2 - radians(angle), as Beam.check_angle_constraints. """
+    angles = dowel_angles(structure)
+    problem = angles > math.pi / 2 - math.radians(angle)
+    t, points = structure.intersect()
+    violation = np.zeros(problem.sum(), dtype=ANGLE)
+    violation["beam"] = structure.incidence_beams[problem]
+    violation["dowel"] = structure.incidence_dowels[problem]
+    violation["angle"], violation["point"] = angles[problem], points[problem]
+    violation["radius"] = structure.dims[structure.incidence_beams[problem], 2]
+    return violation
+
+
+def edge_distances(structure):
+    """ The distances (K,) of the dowels from the edges of the faces of their
+    beams minus the dowel radius, -9999 outside, and per dowel the minimum
+    (D,) (nan without beams), as Dowel.get_distance_from_edges. """
+    b, d = structure.incidence_beams, structure.incidence_dowels
+    dx, dy, dz = structure.dims[b].T
+    distances, outside = [], np.zeros(len(b), dtype=bool)
+    for sign in [1., -1.]:
+        t, points = structure.intersect(sign * 0.5 * dz)
+        s, u = structure.local(points)
+        outside |= (np.abs(s) > dx * 0.5) | (np.abs(u) > dy * 0.5) | np.isnan(t)
+        distances.append(np.minimum(dx * 0.5 - np.abs(s), dy * 0.5 - np.abs(u)))
+    distances = np.where(outside, -9999., np.minimum(*distances) - structure.dowel_radii[d])
+
+    per_dowel = np.full(len(structure.dowels), np.inf)
+    np.minimum.at(per_dowel, d, distances)
+    per_dowel[np.isinf(per_dowel)] = np.nan
+    return distances, per_dowel
+
+
+def check_edge(structure, min_distance=0.):
+    """ The incidences with an edge distance under min_distance. """
+    distances = edge_distances(structure)[0]
+    problem = distances < min_distance
+    violation = np.zeros(problem.sum(), dtype=EDGE)
+    violation["beam"] = structure.incidence_beams[problem]
+    violation["dowel"] = structure.incidence_dowels[problem]
+    violation["distance"] = distances[problem]
+    return violation
+
+
+def check_spacing(structure, max_spacing=300):
+    """ The pieces of the dowels between two successive beams longer than
+    max_spacing, as Dowel.check_spacing_constraints. """
+    t, points = structure.intersect()
+    d = structure.incidence_dowels
+    # sorted by dowel, then along the dowel
+    order = np.lexsort((t, d))
+    d, t, points, beams = d[order], t[order], points[order], structure.incidence_beams[order]
+    successive = d[1:] == d[:-1]
+    lengths = np.linalg.norm(structure.ends - structure.starts, axis=1)
+    distances = np.abs(t[1:] - t[:-1]) * lengths[d[1:]]
+    problem = successive & (distances > max_spacing)
+    violation = np.zeros(problem.sum(), dtype=SPACING)
+    violation["dowel"] = d[1:][problem]
+    violation["beams"] = np.stack([beams[:-1][problem], beams[1:][problem]], axis=1)
+    violation["start"], violation["end"] = points[:-1][problem], points[1:][problem]
+    violation["distance"] = distances[problem]
+    return violation
+
+
+class ConstraintReport(object):
+    """ The violations of a structure as structured arrays, one row per
+    violation: boundary (BOUNDARY), angle (ANGLE), edge (EDGE) and spacing
+    (SPACING). The beams and dowels are indices into structure.beams and
+    structure.dowels. """
+
+    CONSTRAINTS = ["boundary", "angle", "edge", "spacing"]
+
+    def __init__(self, structure, boundary, angle, edge, spacing):
+        self.structure = structure
+        self.boundary = boundary
+        self.angle = angle
+        self.edge = edge
+        self.spacing = spacing
+
+    def __len__(self):
+        return sum(len(getattr(self, name)) for name in self.CONSTRAINTS)
+
+    def summary(self):
+        return dict((name, len(getattr(self, name))) for name in self.CONSTRAINTS)
+
+    def beams_with_violations(self):
+        """ The indices of the beams with any violation. """
+        beams = [self.boundary["beam"], self.angle["beam"], self.edge["beam"], self.spacing["beams"].ravel()]
+        return np.unique(np.concatenate(beams)).tolist()
+
+    def spheres(self, constraint="boundary"):
+        """ The error spheres of Beam.check_boundary_constraints or
+        check_angle_constraints. """
+        return [rg.Sphere(rg.Point3d(*v["point"].tolist()), float(v["radius"])) for v in getattr(self, constraint)]
+
+    def pipes(self):
+        """ The error pipes of Dowel.check_spacing_constraints. """
+        pipes = []
+        for v in self.spacing:
+            line = rg.Line(rg.Point3d(*v["start"].tolist()), rg.Point3d(*v["end"].tolist()))
+            radius = self.structure.dowel_radii[v["dowel"]] * 4
+            pipes.extend(rg.Brep.CreatePipe(line.ToNurbsCurve(), radius, False, rg.PipeCapMode.Round, True, 0.01, 0.1))
+        return pipes
+
+    def __str__(self):
+        return "ConstraintReport: %i beams, %i dowels, %i incidences, %s" % (
+            len(self.structure.beams), len(self.structure.dowels), len(self.structure.incidence_beams),
+            ", ".join("%i %s" % (len(getattr(self, name)), name) for name in self.CONSTRAINTS))
+
+
+def check_constraints(beams, side_buf=10, end_buf=70, mid_buf=500, mid_open=450, angle_correction=1.1,
+                      angle=55, min_edge_distance=0., max_spacing=300):
+    """ Checks all constraints of the beams (with their dowel lists) and
+    returns a ConstraintReport. The arguments are those of the single
+    checks; min_edge_distance is the edge distance (minus the dowel radius)
+    under which an incidence is a violation. """
+    structure = beams if isinstance(beams, Structure) else Structure(beams)
+    return ConstraintReport(structure,
+                            check_boundary(structure, side_buf, end_buf, mid_buf, mid_open, angle_correction),
+                            check_angle(structure, angle),
+                            check_edge(structure, min_edge_distance),
+                            check_spacing(structure, max_spacing))
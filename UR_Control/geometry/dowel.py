@@ -2,15 +2,14 @@
 Basic classes for MAS-DFAB 2018-19 T2 GKR Project
 """
 
+from __future__ import print_function
+
 __author__ = "masdfab students"
 __status__ = "development"
 __version__ = "0.0.1"
 __date__    = "15 January 2019"
 
-import Rhino.Geometry as rg
-import Grasshopper.Kernel.Data.GH_Path as ghpath
-import Grasshopper.DataTree as datatree
-import System
+from geometry.backend import rg, ghpath, datatree, System
 import math
 
 class Dowel(object):
@@ -56,10 +55,16 @@ class Dowel(object):
 
     def remove_duplicates_in_beam_list(self):
         """
-        resolve beam duplication
+        resolve beam duplication (in the order of the beam list)
         """
 
-        return list(set(self.beam_list))
+        beam_ids = set()
+        beams = []
+        for beam in self.beam_list:
+            if id(beam) not in beam_ids:
+                beam_ids.add(id(beam))
+                beams.append(beam)
+        return beams
 
     def get_plane(self):
         """
@@ -274,7 +279,7 @@ class Dowel(object):
         """
         self.beam_count = len(self.beam_list)
         if (self.beam_count > 1):
-            print "I have an extra beam! "
+            print("I have an extra beam! ")
             dowel_line = self.get_line()
             spacing_constraints = []
             temp_t_list = []
@@ -290,7 +295,7 @@ class Dowel(object):
                     spacing_constraints.extend(rg.Brep.CreatePipe(local_line.ToNurbsCurve(), self.dowel_radius * 4, False, rg.PipeCapMode.Round, True, 0.01, 0.1))
             return spacing_constraints
         else:
-            print "nothing to check here ..."
+            print("nothing to check here ...")
             return None
 
     def __get_pipe(self, radius, line = None):
@@ -5,18 +5,25 @@
     Output:
         a: The a output variable"""
 
+from __future__ import print_function
+
 __author__ = "ytakzk"
 __version__ = "2019.02.26"
 
-import Rhino.Geometry as rg
 import os
 import json
-import compas_timber
-from compas_timber.beam import Beam, BeamEnd, BeamSide 
-from compas_timber.utilities import *
-from compas.geometry import Plane
 import math
 
+from geometry.backend import rg
+
+try:
+    from compas_timber.beam import Beam, BeamEnd, BeamSide
+    from compas_timber.utilities import *
+    from compas.geometry import Plane
+except ImportError:
+    # create_compas_beam only
+    Beam = BeamEnd = BeamSide = Plane = None
+
 class FabricatableBeam(object):
 
     def __init__(self, base_plane, dx, dy, dz, holes, has_pockets=False, has_dowel_holes=True, has_annoying_pockets=False, is_shitty_beam=False):
@@ -143,7 +150,7 @@ class FabricatableBeam(object):
         :return line_set:   Dowel line representation set
         :return pln_set:    Dowel plane set
         """
-        print " creating some annoying holes "
+        print(" creating some annoying holes ")
 
         beam = self
 
@@ -178,33 +185,33 @@ class FabricatableBeam(object):
         # average x locations of the joints on the beam
         if (new_line_pos_count > 0.001):
             end_x = new_line_pos / new_line_pos_count
-            print "there are ", int(new_line_pos_count), " holes on the positive side of the beam"
+            print("there are ", int(new_line_pos_count), " holes on the positive side of the beam")
         else:
-            print "I don't have any holes in the positive!!!!"
+            print("I don't have any holes in the positive!!!!")
             end_x = beam.dx *.5
 
         if (new_line_neg_count > 0.001):
             start_x = new_line_neg / new_line_neg_count
-            print "there are ", int(new_line_neg_count), " holes on the negative side of the beam"
+            print("there are ", int(new_line_neg_count), " holes on the negative side of the beam")
         else:
-            print "I don't have any holes in the negative!!!!"
+            print("I don't have any holes in the negative!!!!")
             start_x = - beam.dx *.5
 
         delta_x = end_x - start_x
 
         spacing_x = delta_x * .25
 
-        print "spacing_x is set as: ", spacing_x
+        print("spacing_x is set as: ", spacing_x)
         
         # making sure that the annoying holes are far enough, even with short beams
         if spacing_x < 230.0:
             spacing_x = 230
-            print "spacing_x has been updated to: ", spacing_x
+            print("spacing_x has been updated to: ", spacing_x)
 
         # checking whether the annoying holes don't get too close
         if spacing_x * 2 + x_spacing * 4 > delta_x:
             spacing_x = (delta_x - x_spacing * 4) * .5
-            print "spacing_x has been updated to: ", spacing_x
+            print("spacing_x has been updated to: ", spacing_x)
 
         # setting the raw locations where the holes should be
         neg_x_loc = start_x + spacing_x
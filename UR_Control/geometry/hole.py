@@ -2,15 +2,14 @@
 Basic classes for MAS-DFAB 2018-19 T2 GKR Project
 """
 
+from __future__ import print_function
+
 __author__ = "masdfab students"
 __status__ = "development"
 __version__ = "0.0.1"
 __date__    = "15 January 2019"
 
-import Rhino.Geometry as rg
-import Grasshopper.Kernel.Data.GH_Path as ghpath
-import Grasshopper.DataTree as datatree
-import System
+from geometry.backend import rg, ghpath, datatree, System
 import math
 
 class Hole(object):
@@ -49,6 +48,8 @@ class Hole(object):
         holes = []
 
         beam_normal = beam.base_plane.XAxis
+        # one brep of the beam, a copy for each hole (oriented separately)
+        beam_brep = beam.brep_representation(make_holes=False)
 
         for dowel in beam.dowel_list:
 
@@ -90,7 +91,7 @@ class Hole(object):
                 top_plane=hole_plane_list[0],
                 middle_plane=hole_plane_list[1],
                 bottom_plane=hole_plane_list[2],
-                beam_brep=beam.brep_representation(make_holes=False))
+                beam_brep=beam_brep.DuplicateBrep())
 
             holes.append(hole)
 
@@ -3,6 +3,7 @@ import copy as c
 import geometry.joint_holes
 reload (geometry.joint_holes)
 from geometry.joint_holes import JointHoles
+from geometry.spatial_index import merge_duplicate_dowels, link_dowels
 
 global default_f_args_set
 default_f_args_set = [[100, 50, 40, True, False, False], [100, 500, .2, 30, 70, .5, 50, 150, .3, False, True, False]]
@@ -306,3 +307,18 @@ class LocalNetwork(object):
                     joint_holes = JointHoles([left, right], 1, 2 + self.joint_f_type_add, type_args = self.type_args_hole_class)
                     self.dowels.append(joint_holes.dowel)
                     self.joints.append(c.deepcopy(joint_holes))
+
+    def link_dowels(self, tolerance=1.0, angle_tolerance=1e-3):
+        """ resolve the dowels of the joints geometrically: duplicate dowels (see
+            DowelIndex) are merged, and every dowel is linked to all beams its line
+            passes through, not only to the beams of its joint
+
+            :param tolerance:        the distance between duplicate dowel lines (default = 1.0)
+            :param angle_tolerance:  the angle between duplicate dowel lines in radians (default = 1e-3)
+            :return:                 the number of links added
+        """
+
+        beams = self.get_flatten_beams()
+        self.dowels = merge_duplicate_dowels(beams, self.dowels, tolerance, angle_tolerance)
+
+        return link_dowels(beams, self.dowels)
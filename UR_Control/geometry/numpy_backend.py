@@ -0,0 +1,590 @@
+"""
+The subset of Rhino.Geometry (and the Grasshopper DataTree) used by Beam,
+Dowel, Hole and FabricatableBeam, on NumPy arrays, to run them without Rhino.
+
+The names, arguments and results follow RhinoCommon (e.g. Plane.Flip swaps
+the x- and y-axis, Intersection.LinePlane returns the unbounded line
+parameter). There is no boolean of solids: Brep.CreateBooleanDifference
+returns None and Box.ToBrep / Cylinder.ToBrep return the primitives.
+"""
+
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _unitize(v):
+    length = np.sqrt(np.dot(v, v))
+    return v / length if length > 0. else v
+
+
+class _Coordinates(object):
+
+    def __init__(self, x=0., y=0., z=0.):
+        if isinstance(x, _Coordinates):
+            self.v = x.v.copy()
+        else:
+            self.v = np.array([x, y, z], dtype=float)
+
+    @classmethod
+    def _from_array(cls, v):
+        c = cls.__new__(cls)
+        c.v = np.asarray(v, dtype=float)
+        return c
+
+    X = property(lambda self: float(self.v[0]), lambda self, value: self.v.__setitem__(0, value))
+    Y = property(lambda self: float(self.v[1]), lambda self, value: self.v.__setitem__(1, value))
+    Z = property(lambda self: float(self.v[2]), lambda self, value: self.v.__setitem__(2, value))
+
+    def __getitem__(self, i):
+        return float(self.v[i])
+
+    def __len__(self):
+        return 3
+
+    def __iter__(self):
+        return iter(self.v.tolist())
+
+    def __mul__(self, factor):
+        return self._from_array(self.v * factor)
+
+    __rmul__ = __mul__
+
+    def __div__(self, factor):
+        return self._from_array(self.v / factor)
+
+    __truediv__ = __div__
+
+    def __neg__(self):
+        return self._from_array(-self.v)
+
+    def __eq__(self, other):
+        return type(self) == type(other) and bool((self.v == other.v).all())
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(self.v.tolist()))
+
+    def __repr__(self):
+        return "%s,%s,%s" % tuple(self.v.tolist())
+
+
+class Vector3d(_Coordinates):
+
+    @property
+    def Length(self):
+        return float(np.sqrt(np.dot(self.v, self.v)))
+
+    def Unitize(self):
+        length = self.Length
+        if length == 0.:
+            return False
+        self.v = self.v / length
+        return True
+
+    def Reverse(self):
+        self.v = -self.v
+        return True
+
+    def Transform(self, transform):
+        self.v = np.dot(transform.M[:3, :3], self.v)
+
+    def __add__(self, other):
+        if isinstance(other, Point3d):
+            return Point3d._from_array(self.v + other.v)
+        return Vector3d._from_array(self.v + other.v)
+
+    def __sub__(self, other):
+        return Vector3d._from_array(self.v - other.v)
+
+    def __mul__(self, other):
+        # the dot product, as in RhinoCommon
+        if isinstance(other, Vector3d):
+            return float(np.dot(self.v, other.v))
+        return Vector3d._from_array(self.v * other)
+
+    __rmul__ = __mul__
+
+    @staticmethod
+    def Add(a, b):
+        return a + b
+
+    @staticmethod
+    def Subtract(a, b):
+        return a - b
+
+    @staticmethod
+    def Multiply(a, b):
+        return a * b
+
+    @staticmethod
+    def CrossProduct(a, b):
+        return Vector3d._from_array(np.cross(a.v, b.v))
+
+    @staticmethod
+    def VectorAngle(a, b):
+        c = np.dot(_unitize(a.v), _unitize(b.v))
+        return math.acos(max(-1., min(1., float(c))))
+
+
+class Point3d(_Coordinates):
+
+    def DistanceTo(self, other):
+        d = self.v - other.v
+        return float(np.sqrt(np.dot(d, d)))
+
+    def Transform(self, transform):
+        self.v = transform._point(self.v)
+
+    def __add__(self, other):
+        return Point3d._from_array(self.v + other.v)
+
+    def __sub__(self, other):
+        if isinstance(other, Point3d):
+            return Vector3d._from_array(self.v - other.v)
+        return Point3d._from_array(self.v - other.v)
+
+    @staticmethod
+    def Add(a, b):
+        return a + b
+
+    @staticmethod
+    def Subtract(a, b):
+        return a - b
+
+
+class Interval(object):
+
+    def __init__(self, t0, t1=None):
+        if isinstance(t0, Interval):
+            t0, t1 = t0.T0, t0.T1
+        self.T0 = float(t0)
+        self.T1 = float(t1)
+
+    @property
+    def Min(self):
+        return min(self.T0, self.T1)
+
+    @property
+    def Max(self):
+        return max(self.T0, self.T1)
+
+    @property
+    def Length(self):
+        return self.T1 - self.T0
+
+    def __repr__(self):
+        return "%s,%s" % (self.T0, self.T1)
+
+
+class _WorldXY(object):
+
+    def __get__(self, instance, owner):
+        return owner(Point3d(0., 0., 0.), Vector3d(1., 0., 0.), Vector3d(0., 1., 0.))
+
+
+def _perpendicular_to(v):
+    """ The vector perpendicular to v of ON_3dVector::PerpendicularTo. """
+    x, y, z = v
+    ax, ay, az = abs(x), abs(y), abs(z)
+    p = [0., 0., 0.]
+    if ay > ax:
+        if az > ay:
+            i, j, k, a, b = 2, 1, 0, z, -y
+        elif az >= ax:
+            i, j, k, a, b = 1, 2, 0, y, -z
+        else:
+            i, j, k, a, b = 1, 0, 2, y, -x
+    elif az > ax:
+        i, j, k, a, b = 2, 0, 1, z, -x
+    elif az > ay:
+        i, j, k, a, b = 0, 2, 1, x, -z
+    else:
+        i, j, k, a, b = 0, 1, 2, x, -y
+    p[i], p[j], p[k] = b, a, 0.
+    return np.array(p)
+
+
+class Plane(object):
+    """ Plane(plane), Plane(origin, normal) or Plane(origin, xaxis, yaxis). """
+
+    WorldXY = _WorldXY()
+
+    def __init__(self, origin, xaxis=None, yaxis=None):
+        if isinstance(origin, Plane):
+            self.origin = origin.origin.copy()
+            self.x, self.y, self.z = origin.x.copy(), origin.y.copy(), origin.z.copy()
+        elif yaxis is None:
+            self.origin = np.array(origin.v)
+            self.z = _unitize(xaxis.v)
+            self.x = _unitize(_perpendicular_to(self.z))
+            self.y = _unitize(np.cross(self.z, self.x))
+        else:
+            self._set_frame(np.array(origin.v), xaxis.v, yaxis.v)
+
+    def _set_frame(self, origin, xaxis, yaxis):
+        self.origin = origin
+        self.x = _unitize(np.asarray(xaxis, dtype=float))
+        self.y = _unitize(yaxis - np.dot(yaxis, self.x) * self.x)
+        self.z = np.cross(self.x, self.y)
+
+    Origin = property(lambda self: Point3d._from_array(self.origin.copy()),
+                      lambda self, point: setattr(self, "origin", np.array(point.v)))
+    XAxis = property(lambda self: Vector3d._from_array(self.x.copy()))
+    YAxis = property(lambda self: Vector3d._from_array(self.y.copy()))
+    ZAxis = property(lambda self: Vector3d._from_array(self.z.copy()))
+    Normal = ZAxis
+
+    @property
+    def matrix(self):
+        """ The 4x4 matrix with the columns xaxis, yaxis, zaxis and origin. """
+        M = np.eye(4)
+        M[:3, 0], M[:3, 1], M[:3, 2], M[:3, 3] = self.x, self.y, self.z, self.origin
+        return M
+
+    @classmethod
+    def from_matrix(cls, M):
+        plane = cls.__new__(cls)
+        plane._set_frame(np.array(M[:3, 3], dtype=float), M[:3, 0], M[:3, 1])
+        return plane
+
+    def Translate(self, vector):
+        self.origin = self.origin + vector.v
+        return True
+
+    def Transform(self, transform):
+        origin = transform._point(self.origin)
+        xaxis = transform._point(self.origin + self.x) - origin
+        yaxis = transform._point(self.origin + self.y) - origin
+        self._set_frame(origin, xaxis, yaxis)
+        return True
+
+    def Flip(self):
+        self.x, self.y, self.z = self.y, self.x, -self.z
+
+    def PointAt(self, u, v, w=0.):
+        return Point3d._from_array(self.origin + u * self.x + v * self.y + w * self.z)
+
+    def ClosestParameter(self, point):
+        d = point.v - self.origin
+        return True, float(np.dot(d, self.x)), float(np.dot(d, self.y))
+
+    def DistanceTo(self, point):
+        return float(np.dot(point.v - self.origin, self.z))
+
+    def __repr__(self):
+        return "Origin=%s XAxis=%s, YAxis=%s, ZAxis=%s" % (self.Origin, self.XAxis, self.YAxis, self.ZAxis)
+
+
+class Transform(object):
+
+    def __init__(self, M=None):
+        self.M = np.eye(4) if M is None else np.array(M, dtype=float)
+
+    def _point(self, p):
+        return np.dot(self.M[:3, :3], p) + self.M[:3, 3]
+
+    def __mul__(self, other):
+        return Transform(np.dot(self.M, other.M))
+
+    def __getitem__(self, index):
+        return float(self.M[index])
+
+    @staticmethod
+    def Identity():
+        return Transform()
+
+    @staticmethod
+    def PlaneToPlane(source, target):
+        return Transform(np.dot(target.matrix, np.linalg.inv(source.matrix)))
+
+    @staticmethod
+    def Translation(vector):
+        M = np.eye(4)
+        M[:3, 3] = vector.v
+        return Transform(M)
+
+    @staticmethod
+    def Rotation(angle, axis, center):
+        k = _unitize(axis.v)
+        K = np.array([[0., -k[2], k[1]], [k[2], 0., -k[0]], [-k[1], k[0], 0.]])
+        R = np.eye(3) + math.sin(angle) * K + (1. - math.cos(angle)) * np.dot(K, K)
+        M = np.eye(4)
+        M[:3, :3] = R
+        M[:3, 3] = center.v - np.dot(R, center.v)
+        return Transform(M)
+
+    @staticmethod
+    def Scale(center, factor):
+        M = np.eye(4)
+        M[:3, :3] *= factor
+        M[:3, 3] = center.v * (1. - factor)
+        return Transform(M)
+
+
+class Line(object):
+
+    def __init__(self, start, end=None):
+        if isinstance(start, Line):
+            start, end = start.From, start.To
+        self.start = np.array(start.v, dtype=float)
+        self.end = np.array(end.v, dtype=float)
+
+    From = property(lambda self: Point3d._from_array(self.start.copy()),
+                    lambda self, point: setattr(self, "start", np.array(point.v)))
+    To = property(lambda self: Point3d._from_array(self.end.copy()),
+                  lambda self, point: setattr(self, "end", np.array(point.v)))
+
+    @property
+    def Direction(self):
+        return Vector3d._from_array(self.end - self.start)
+
+    @property
+    def Length(self):
+        d = self.end - self.start
+        return float(np.sqrt(np.dot(d, d)))
+
+    def PointAt(self, t):
+        return Point3d._from_array(self.start + t * (self.end - self.start))
+
+    def Transform(self, transform):
+        self.start = transform._point(self.start)
+        self.end = transform._point(self.end)
+        return True
+
+    def Extend(self, start_length, end_length):
+        direction = _unitize(self.end - self.start)
+        self.start = self.start - direction * start_length
+        self.end = self.end + direction * end_length
+        return True
+
+    def ToNurbsCurve(self):
+        return LineCurve(self)
+
+
+class LineCurve(object):
+    """ The curve of a line, for PerpendicularFrameAt and pipes. """
+
+    def __init__(self, line):
+        self.Line = Line(line)
+
+    def PointAt(self, t):
+        return self.Line.PointAt(t)
+
+    def PerpendicularFrameAt(self, t):
+        return True, Plane(self.Line.PointAt(t), self.Line.Direction)
+
+
+class PointContainment(object):
+    Unset = 0
+    Inside = 1
+    Outside = 2
+    Coincident = 3
+
+
+class PipeCapMode(object):
+    Flat = 1
+    Round = 2
+
+
+class Rectangle3d(object):
+
+    def __init__(self, plane, x, y):
+        self.Plane = Plane(plane)
+        self.X = Interval(x)
+        self.Y = Interval(y)
+
+    def Contains(self, point):
+        _, s, t = self.Plane.ClosestParameter(point)
+        if s < self.X.Min or s > self.X.Max or t < self.Y.Min or t > self.Y.Max:
+            return PointContainment.Outside
+        if s in (self.X.Min, self.X.Max) or t in (self.Y.Min, self.Y.Max):
+            return PointContainment.Coincident
+        return PointContainment.Inside
+
+    def ClosestPoint(self, point, include_interior=True):
+        _, s, t = self.Plane.ClosestParameter(point)
+        s = min(max(s, self.X.Min), self.X.Max)
+        t = min(max(t, self.Y.Min), self.Y.Max)
+        if not include_interior:
+            # the closest edge
+            distances = [s - self.X.Min, self.X.Max - s, t - self.Y.Min, self.Y.Max - t]
+            edge = distances.index(min(distances))
+            if edge == 0:
+                s = self.X.Min
+            elif edge == 1:
+                s = self.X.Max
+            elif edge == 2:
+                t = self.Y.Min
+            else:
+                t = self.Y.Max
+        return self.Plane.PointAt(s, t)
+
+
+class Box(object):
+
+    def __init__(self, plane, x, y, z):
+        self.Plane = Plane(plane)
+        self.X = Interval(x)
+        self.Y = Interval(y)
+        self.Z = Interval(z)
+
+    @property
+    def Center(self):
+        return self.Plane.PointAt((self.X.T0 + self.X.T1) * 0.5, (self.Y.T0 + self.Y.T1) * 0.5,
+                                  (self.Z.T0 + self.Z.T1) * 0.5)
+
+    def GetCorners(self):
+        return [self.Plane.PointAt(x, y, z) for z in (self.Z.Min, self.Z.Max)
+                for x, y in [(self.X.Min, self.Y.Min), (self.X.Max, self.Y.Min),
+                             (self.X.Max, self.Y.Max), (self.X.Min, self.Y.Max)]]
+
+    def Contains(self, point):
+        d = point.v - self.Plane.origin
+        s, t, u = np.dot(d, self.Plane.x), np.dot(d, self.Plane.y), np.dot(d, self.Plane.z)
+        return self.X.Min <= s <= self.X.Max and self.Y.Min <= t <= self.Y.Max and self.Z.Min <= u <= self.Z.Max
+
+    def Transform(self, transform):
+        return self.Plane.Transform(transform)
+
+    def ToBrep(self):
+        return Box(self.Plane, self.X, self.Y, self.Z)
+
+    def DuplicateBrep(self):
+        return self.ToBrep()
+
+
+class Sphere(object):
+
+    def __init__(self, center, radius):
+        self.Center = Point3d(center)
+        self.Radius = float(radius)
+
+    def Transform(self, transform):
+        self.Center.Transform(transform)
+        return True
+
+
+class Circle(object):
+
+    def __init__(self, plane, radius):
+        self.Plane = Plane(plane)
+        self.Radius = float(radius)
+
+    @property
+    def Center(self):
+        return self.Plane.Origin
+
+
+class Cylinder(object):
+    """ A cylinder on the plane of its circle from height 0 to height. """
+
+    def __init__(self, circle, height):
+        self.BasePlane = Plane(circle.Plane)
+        self.Radius = circle.Radius
+        self.Height1 = 0.
+        self.Height2 = float(height)
+
+    @property
+    def TotalHeight(self):
+        return self.Height2 - self.Height1
+
+    def Transform(self, transform):
+        return self.BasePlane.Transform(transform)
+
+    def ToBrep(self, cap_bottom=True, cap_top=True):
+        return Cylinder(Circle(self.BasePlane, self.Radius), self.Height2)
+
+    def DuplicateBrep(self):
+        return self.ToBrep()
+
+
+class Brep(object):
+
+    @staticmethod
+    def CreateBooleanDifference(first, second, tolerance):
+        # no booleans of solids without Rhino
+        return None
+
+    @staticmethod
+    def CreatePipe(rail, radius, *args):
+        line = rail.Line
+        return [Cylinder(Circle(Plane(line.From, line.Direction), radius), line.Length)]
+
+
+class Intersect(object):
+
+    class Intersection(object):
+
+        @staticmethod
+        def LinePlane(line, plane):
+            """ Returns (succeeded, the parameter on the unbounded line). """
+            a = plane.DistanceTo(line.From)
+            b = plane.DistanceTo(line.To)
+            if a == b:
+                return False, 0.
+            return True, a / (a - b)
+
+        @staticmethod
+        def LineLine(line_a, line_b):
+            """ Returns (succeeded, a, b): the parameters of the closest points
+            of the unbounded lines. """
+            u, v = line_a.end - line_a.start, line_b.end - line_b.start
+            w = line_a.start - line_b.start
+            uu, uv, vv, uw, vw = np.dot(u, u), np.dot(u, v), np.dot(v, v), np.dot(u, w), np.dot(v, w)
+            d = uu * vv - uv * uv
+            if d <= 1e-12 * uu * vv:
+                return False, 0., 0.
+            return True, float((uv * vw - vv * uw) / d), float((uu * vw - uv * uw) / d)
+
+
+# Grasshopper
+
+class DataTree(object):
+    """ The branches of the items by path. """
+
+    def __init__(self):
+        self.branches = OrderedDict()
+
+    def Add(self, item, path):
+        self.branches.setdefault(path, []).append(item)
+
+    def Branch(self, path):
+        return self.branches[path]
+
+    @property
+    def Paths(self):
+        return list(self.branches.keys())
+
+    @property
+    def BranchCount(self):
+        return len(self.branches)
+
+    @property
+    def DataCount(self):
+        return sum(len(items) for items in self.branches.values())
+
+
+class _Generic(object):
+    """ DataTree[System.Object]() """
+
+    def __init__(self, cls):
+        self.cls = cls
+
+    def __getitem__(self, item):
+        return self.cls
+
+
+def GH_Path(*indices):
+    return tuple(indices)
+
+
+class System(object):
+    Object = object
+
+
+datatree = _Generic(DataTree)
+ghpath = GH_Path
@@ -0,0 +1,58 @@
+"""
+A least recently used cache of beam solids (breps), keyed by the content of
+the beam: its base plane, its dimensions and the lines of its dowels (see
+Beam.solid_key). Beams with the same content share the solid, e.g. the
+copies of a beam or a beam between two runs of a Grasshopper definition.
+"""
+
+from collections import OrderedDict
+
+
+class SolidCache(object):
+    """ The cached solids are never handed out: get returns a copy, so that
+    the caller can transform it (as Hole.orient_to_drilling_station does).
+
+    Attributes:
+        hits, misses, evictions (int): the statistics since the last clear.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, function):
+        """ Returns a copy of the solid of key, and calls function to create
+        it if it is not in the cache. """
+        solid = self.entries.pop(key, None)
+        if solid is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            solid = function()
+            if len(self.entries) >= self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        # the most recently used at the end
+        self.entries[key] = solid
+        return solid.DuplicateBrep()
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        requests = self.hits + self.misses
+        return float(self.hits) / requests if requests else 0.
+
+    def __str__(self):
+        return "SolidCache: %i hits, %i misses (%.1f%%), %i evictions, %i/%i entries" % (
+            self.hits, self.misses, self.hit_rate * 100, self.evictions, len(self.entries), self.maxsize)
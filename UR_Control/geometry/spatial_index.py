@@ -0,0 +1,323 @@
+"""
+Spatial hashing of beams and dowels, in plain Python (runs in Rhino as well):
+
+- BeamIndex: the beams a dowel actually passes through (its extent against
+  the boxes of the beams, see BeamIndex.segment)
+- DowelIndex: coincident and near-duplicate dowels (parallel lines within a
+  distance), in O(n) expected hashing instead of comparing all pairs
+
+    index = BeamIndex(beams)
+    beams = index.beams_through(dowel)
+    beams = index.beams_through(dowel_of_a_plane, length=200.)
+    groups = DowelIndex(dowels, tolerance=1.0).duplicates()
+"""
+
+import math
+from collections import defaultdict
+
+# the smallest cell of the DowelIndex (mm), e.g. for tolerance 0
+MIN_CELL_SIZE = 1e-6
+
+
+def _xyz(v):
+    return (v.X, v.Y, v.Z)
+
+
+def _sub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _unitize(a):
+    """ The unit vector of a, None if a has no length. """
+    length = math.sqrt(_dot(a, a))
+    if length == 0.:
+        return None
+    return (a[0] / length, a[1] / length, a[2] / length)
+
+
+def _line(dowel):
+    """ The end points of the line of a dowel (Dowel.get_line). """
+    line = dowel.get_line()
+    return _xyz(line.PointAt(0.)), _xyz(line.PointAt(1.))
+
+
+def _point_at(start, end, t):
+    return tuple(a + t * (b - a) for a, b in zip(start, end))
+
+
+def _clip(box, start, end):
+    """ The parameters (t0, t1) of the segment inside the box (origin, axes,
+    half sizes), None if it misses the box (slab test). """
+    origin, axes, half = box
+    p, d = _sub(start, origin), _sub(end, start)
+    t0, t1 = 0., 1.
+    for axis, h in zip(axes, half):
+        a, b = _dot(p, axis), _dot(d, axis)
+        if abs(b) < 1e-12:
+            if abs(a) > h:
+                return None
+            continue
+        u0, u1 = (-h - a) / b, (h - a) / b
+        if u0 > u1:
+            u0, u1 = u1, u0
+        t0, t1 = max(t0, u0), min(t1, u1)
+        if t0 > t1:
+            return None
+    return t0, t1
+
+
+class SpatialHash(object):
+    """ Items by the cells (of edge length cell_size) their axis aligned
+    bounding boxes overlap. """
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.cells = defaultdict(list)
+
+    def cell(self, point):
+        return tuple(int(math.floor(v / self.cell_size)) for v in point)
+
+    def insert(self, item, lower, upper):
+        (i0, j0, k0), (i1, j1, k1) = self.cell(lower), self.cell(upper)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for k in range(k0, k1 + 1):
+                    self.cells[(i, j, k)].append(item)
+
+    def query_point(self, point):
+        return self.cells.get(self.cell(point), [])
+
+
+class BeamIndex(object):
+    """ The boxes of the beams in a spatial hash. A box is the one of
+    Beam.brep_representation: dx plus end_cover and extension at both ends
+    (if the beam has them, FabricatableBeam has not), dy and dz. """
+
+    def __init__(self, beams, cell_size=None):
+        self.beams = list(beams)
+        self.boxes = [self.box(beam) for beam in self.beams]
+        if cell_size is None:
+            # about the length of a beam
+            lengths = sorted(2 * half[0] for origin, axes, half in self.boxes)
+            cell_size = lengths[len(lengths) // 2] if lengths else 1000.
+        # the segments are sampled at half the cell size, the boxes padded by
+        # a quarter cell: a segment through a box has a sample in its cells
+        self.step = cell_size * 0.5
+        self.hash = SpatialHash(cell_size)
+        pad = self.step * 0.5
+        for i, (origin, axes, half) in enumerate(self.boxes):
+            extent = [sum(abs(axes[k][c]) * half[k] for k in range(3)) + pad for c in range(3)]
+            self.hash.insert(i, _sub(origin, extent), [origin[c] + extent[c] for c in range(3)])
+
+    @staticmethod
+    def box(beam):
+        """ The origin, the axes and the half sizes of the box of a beam. """
+        plane = beam.base_plane
+        total_extension = getattr(beam, "end_cover", 0) + getattr(beam, "extension", 0)
+        half = (beam.dx * 0.5 + total_extension, beam.dy * 0.5, beam.dz * 0.5)
+        return _xyz(plane.Origin), (_xyz(plane.XAxis), _xyz(plane.YAxis), _xyz(plane.ZAxis)), half
+
+    def candidates(self, start, end):
+        """ The indices of the beams whose cells the segment passes. """
+        length = math.sqrt(_dot(_sub(end, start), _sub(end, start)))
+        samples = max(1, int(math.ceil(length / self.step)))
+        found = set()
+        for s in range(samples + 1):
+            t = float(s) / samples
+            found.update(self.hash.query_point([start[c] + t * (end[c] - start[c]) for c in range(3)]))
+        return sorted(found)
+
+    def clip(self, i, start, end):
+        """ The parameters (t0, t1) of the segment inside the box of beam i,
+        None if it misses the box (slab test). """
+        return _clip(self.boxes[i], start, end)
+
+    def segment(self, dowel, length=None):
+        """ The end points of the extent of a dowel: its line, or for a dowel
+        given by a plane the segment of length along the normal centered at
+        the origin, or without a length the part of its line (Dowel.get_line)
+        from where it enters the first to where it leaves the last of the
+        beams it is linked to. None if the dowel is given by a plane without
+        a length and passes none of its beams: the line of Dowel.get_line,
+        2 * 999 long, is not the extent of the dowel. """
+        if dowel.line:
+            return _line(dowel)
+        if length is not None:
+            origin, normal = _xyz(dowel.base_plane.Origin), _unitize(_xyz(dowel.base_plane.Normal))
+            if normal is None:
+                return None
+            end = [o + n for o, n in zip(origin, normal)]
+            return _point_at(origin, end, -length * 0.5), _point_at(origin, end, length * 0.5)
+        start, end = _line(dowel)
+        clipped = [t for t in (_clip(self.box(beam), start, end) for beam in dowel.beam_list) if t]
+        if not clipped:
+            return None
+        return _point_at(start, end, min(t0 for t0, t1 in clipped)), _point_at(start, end, max(t1 for t0, t1 in clipped))
+
+    def beams_through_line(self, start, end):
+        """ The indices of the beams the segment (start, end) passes through,
+        in the order along the segment. """
+        hits = []
+        for i in self.candidates(start, end):
+            clipped = self.clip(i, start, end)
+            if clipped:
+                hits.append((clipped[0], i))
+        return [i for t, i in sorted(hits)]
+
+    def beams_through(self, dowel, length=None):
+        """ The beams the dowel (its extent, see segment) passes through, in
+        the order along the dowel. """
+        segment = self.segment(dowel, length)
+        if segment is None:
+            return []
+        return [self.beams[i] for i in self.beams_through_line(*segment)]
+
+    def incidences(self, dowels, length=None):
+        """ The pairs (beam index, dowel index) of the dowels through the
+        beams (their extent, see segment). """
+        pairs = []
+        for j, dowel in enumerate(dowels):
+            segment = self.segment(dowel, length)
+            if segment is not None:
+                pairs.extend((i, j) for i in self.beams_through_line(*segment))
+        return sorted(pairs)
+
+
+class DowelIndex(object):
+    """ The lines of the dowels hashed by the point closest to the center of
+    all dowels. Two dowels are duplicates if their directions differ by at
+    most angle_tolerance (rad), each midpoint is within tolerance (mm) of the
+    other line and the segments overlap along the line (the lines of dowels
+    given by a plane are 2 * 999 long, see Dowel.get_line). Dowels with a
+    line of no length have no direction and are no duplicates. """
+
+    def __init__(self, dowels, tolerance=1.0, angle_tolerance=1e-3):
+        self.dowels = list(dowels)
+        self.tolerance = float(tolerance)
+        self.angle_tolerance = float(angle_tolerance)
+        self.lines = [_line(dowel) for dowel in self.dowels]
+        self.directions = [_unitize(_sub(end, start)) for start, end in self.lines]
+        self.midpoints = [[(a + b) * 0.5 for a, b in zip(start, end)] for start, end in self.lines]
+
+        n = max(1, len(self.dowels))
+        self.center = [sum(m[c] for m in self.midpoints) / n for c in range(3)]
+        extent = max([math.sqrt(_dot(_sub(m, self.center), _sub(m, self.center))) for m in self.midpoints] + [0.])
+        # the closest points to the center of two duplicates are at most
+        # tolerance + 2 * extent * angle apart, a neighbour cell at most
+        cell_size = self.tolerance + 2 * extent * math.sin(min(self.angle_tolerance, math.pi * 0.5))
+        self.hash = SpatialHash(max(cell_size, MIN_CELL_SIZE))
+        self.feet = []
+        for j, (m, d) in enumerate(zip(self.midpoints, self.directions)):
+            if d is None:
+                self.feet.append(None)
+                continue
+            s = _dot(_sub(self.center, m), d)
+            foot = [m[c] + s * d[c] for c in range(3)]
+            self.feet.append(foot)
+            self.hash.insert(j, foot, foot)
+
+    def _distance_to_line(self, point, j):
+        v = _sub(point, self.midpoints[j])
+        s = _dot(v, self.directions[j])
+        return math.sqrt(max(0., _dot(v, v) - s * s))
+
+    def is_duplicate(self, i, j):
+        """ Whether the dowels i and j are duplicates. """
+        if self.directions[i] is None or self.directions[j] is None:
+            return False
+        c = abs(_dot(self.directions[i], self.directions[j]))
+        if c < math.cos(self.angle_tolerance):
+            return False
+        if self._distance_to_line(self.midpoints[i], j) > self.tolerance or \
+                self._distance_to_line(self.midpoints[j], i) > self.tolerance:
+            return False
+        # the segments overlap along the direction of i
+        d, m = self.directions[i], self.midpoints[i]
+        a0, a1 = sorted(_dot(_sub(p, m), d) for p in self.lines[i])
+        b0, b1 = sorted(_dot(_sub(p, m), d) for p in self.lines[j])
+        return a0 <= b1 + self.tolerance and b0 <= a1 + self.tolerance
+
+    def pairs(self):
+        """ All pairs (i, j), i < j, of duplicate dowels. """
+        found = []
+        for j, foot in enumerate(self.feet):
+            if foot is None:
+                continue
+            ci, cj, ck = self.hash.cell(foot)
+            for di in (-1, 0, 1):
+                for dj in (-1, 0, 1):
+                    for dk in (-1, 0, 1):
+                        for i in self.hash.cells.get((ci + di, cj + dj, ck + dk), []):
+                            if i < j and self.is_duplicate(i, j):
+                                found.append((i, j))
+        return sorted(found)
+
+    def duplicates(self):
+        """ The groups (lists of indices, sorted) of dowels which are
+        duplicates of each other (transitively), only groups of 2 or more. """
+        parent = list(range(len(self.dowels)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in self.pairs():
+            a, b = find(i), find(j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+        groups = defaultdict(list)
+        for i in range(len(self.dowels)):
+            groups[find(i)].append(i)
+        return [group for root, group in sorted(groups.items()) if len(group) > 1]
+
+    def unique(self):
+        """ The dowels without duplicates: the first of each group, in order. """
+        duplicate = set(j for group in self.duplicates() for j in group[1:])
+        return [dowel for j, dowel in enumerate(self.dowels) if j not in duplicate]
+
+
+def merge_duplicate_dowels(beams, dowels, tolerance=1.0, angle_tolerance=1e-3):
+    """ Replaces the duplicates of each group of DowelIndex.duplicates by its
+    first dowel in the dowel lists of the beams, and rebuilds the beam lists
+    of the dowels. Returns the dowels without duplicates. """
+    dowels = list(dowels)
+    replaced = {}
+    for group in DowelIndex(dowels, tolerance, angle_tolerance).duplicates():
+        for j in group[1:]:
+            replaced[id(dowels[j])] = dowels[group[0]]
+    unique = [dowel for dowel in dowels if id(dowel) not in replaced]
+    for dowel in unique:
+        dowel.beam_list = []
+    rebuilt = set(id(dowel) for dowel in unique)
+    for beam in beams:
+        dowel_list, linked = [], set()
+        for dowel in beam.dowel_list:
+            dowel = replaced.get(id(dowel), dowel)
+            if id(dowel) not in linked:
+                linked.add(id(dowel))
+                dowel_list.append(dowel)
+                if id(dowel) in rebuilt:
+                    dowel.beam_list.append(beam)
+        beam.dowel_list = dowel_list
+    return unique
+
+
+def link_dowels(beams, dowels, index=None, length=None):
+    """ Links every dowel to the beams it passes through (see
+    BeamIndex.beams_through) which it is not linked to yet. Returns the
+    number of new links. """
+    index = index or BeamIndex(beams)
+    added = 0
+    for dowel in dowels:
+        linked = set(id(beam) for beam in dowel.beam_list)
+        for beam in index.beams_through(dowel, length):
+            if id(beam) not in linked:
+                beam.add_dowel(dowel)
+                added += 1
+    return added
@@ -0,0 +1,4 @@
+'''
+Benchmarks for the communication and fabrication pipeline. Every module can be
+run as a script, e.g. python -m ur_online_control.benchmarks.server_reactor
+'''
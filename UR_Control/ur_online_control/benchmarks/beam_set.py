@@ -0,0 +1,80 @@
+'''
+The structure operations of FabricatableBeam (read_from_json,
+orient_structure, direct_all_beams, flip_whole_structure) beam by beam
+against BeamSet, for the beam files grasshopper/data/*.json, on the geometry
+backend of geometry/backend.py. The BeamSet results are compared with the
+FabricatableBeam results, plane by plane.
+'''
+from __future__ import print_function
+import os
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import numpy as np
+
+from geometry.backend import rg, BACKEND
+from geometry.fabricatable_beam import FabricatableBeam
+from geometry.beam_set import BeamSet, plane_to_matrix
+from ur_online_control.benchmarks.utilities import Timer, print_table
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "grasshopper", "data")
+DATA_SETS = ["1.json", "2.json", "3.json", "4.json", "5.json"]
+
+
+def beam_by_beam(path):
+    beams = FabricatableBeam.read_from_json(path)
+    beams = FabricatableBeam.orient_structure(beams, beams[0].base_plane)
+    beams = FabricatableBeam.direct_all_beams(beams, rg.Plane.WorldXY)
+    return FabricatableBeam.flip_whole_structure(beams)
+
+
+def columns(path):
+    beam_set = BeamSet.read_from_json(path)
+    src = beam_set[0].base_plane
+    return beam_set.orient(src).direct(rg.Plane.WorldXY).flip()
+
+
+def measure(function, *args):
+    """ Returns the result, the Timer and the traced memory peak in MB (None
+    without tracemalloc), the memory in a second run. """
+    with Timer() as timer:
+        result = function(*args)
+    peak = None
+    if tracemalloc:
+        tracemalloc.start()
+        function(*args)
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result, timer, peak
+
+
+def difference(beams, other_beams):
+    planes = [plane_to_matrix(p) for b in beams for p in [b.base_plane] + b.holes]
+    other_planes = [plane_to_matrix(p) for b in other_beams for p in [b.base_plane] + b.holes]
+    dims = [[b.dx, b.dy, b.dz] for b in beams]
+    other_dims = [[b.dx, b.dy, b.dz] for b in other_beams]
+    return max(np.abs(np.array(planes) - np.array(other_planes)).max(), np.abs(np.array(dims) - np.array(other_dims)).max())
+
+
+def main():
+    rows = []
+    for name in DATA_SETS:
+        path = os.path.join(DATA_DIR, name)
+        beams, each, each_peak = measure(beam_by_beam, path)
+        beam_set, batch, batch_peak = measure(columns, path)
+        materialized, lazy, lazy_peak = measure(beam_set.to_beams)
+        holes = sum(len(b.holes) for b in beams)
+        for method, timer, peak in [("FabricatableBeam", each, each_peak), ("BeamSet", batch, batch_peak),
+                                    ("BeamSet.to_beams", lazy, lazy_peak)]:
+            rows.append([name, "%i / %i" % (len(beams), holes), method, "%.1f" % (timer.wall * 1000),
+                         "-" if peak is None else "%.2f" % peak,
+                         "%.1e" % difference(beams, materialized) if method == "BeamSet" else ""])
+    print("backend: %s, read_from_json + orient + direct + flip" % BACKEND)
+    print_table(["data set", "beams / holes", "method", "time [ms]", "peak memory [MB]", "max difference"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+'''
+The solids of the beams of the structures of grasshopper/data/*.json (see
+benchmarks/constraints.py) with and without the SolidCache of
+Beam.brep_representation: the boolean differences of the breps with holes
+(without a cache, a first pass with the cache and a second one), and the
+beam breps made for Hole.get_tool_planes_as_tree (before, one per hole).
+
+The times are only reported inside Rhino: the NumPy backend computes no
+boolean difference (Brep.CreateBooleanDifference returns None), its times
+would not include the booleans the cache saves. Without Rhino the counts of
+the operations are reported only.
+'''
+from __future__ import print_function
+import os
+
+from geometry.backend import rg, BACKEND
+from geometry.beam import set_solid_cache
+from geometry.hole import Hole
+from geometry.solid_cache import SolidCache
+from ur_online_control.benchmarks.constraints import structure, DATA_DIR, DATA_SETS
+from ur_online_control.benchmarks.utilities import Silence, Timer, print_table
+
+
+def breps(beams, cache):
+    """ The breps with holes, returns the number of boolean differences. """
+    booleans = 0
+    for beam in beams:
+        misses = cache.misses if cache is not None else 0
+        beam.brep_representation(make_holes=True)
+        if cache is None or cache.misses > misses:
+            booleans += len(beam.dowel_list)
+    return booleans
+
+
+def tool_planes(beams, cache):
+    """ The tool planes, returns the number of beam breps made. """
+    misses = cache.misses if cache is not None else 0
+    with Silence():
+        Hole.get_tool_planes_as_tree(beams, rg.Plane.WorldXY)
+    return cache.misses - misses if cache is not None else len(beams)
+
+
+def main():
+    timed = BACKEND == "rhino"
+    rows = []
+    for name in DATA_SETS:
+        beams = structure(os.path.join(DATA_DIR, name))
+        holes = sum(len(beam.dowel_list) for beam in beams)
+
+        timers, counts = [], []
+        for cache, passes in [(None, 1), (SolidCache(), 2)]:
+            previous = set_solid_cache(cache)
+            for i in range(passes):
+                with Timer() as timer:
+                    counts.append(breps(beams, cache))
+                timers.append(timer)
+            with Timer() as timer:
+                counts.append(tool_planes(beams, cache))
+            timers.append(timer)
+            set_solid_cache(previous)
+
+        row = [name, "%i / %i" % (len(beams), holes), "%i / %i / %i" % (counts[0], counts[2], counts[3]),
+               "%i / %i / %i" % (holes, counts[1], counts[4])]
+        if timed:
+            row += ["%.1f" % (timers[i].wall * 1000) for i in (0, 2, 3, 1, 4)]
+        rows.append(row)
+
+    print("backend: %s" % BACKEND)
+    header = ["data set", "beams / dowels", "booleans uncached / first / second",
+              "tool plane breps per hole / uncached / cached"]
+    if timed:
+        header += ["uncached [ms]", "first [ms]", "second [ms]", "tool planes uncached [ms]", "tool planes cached [ms]"]
+    else:
+        print("no times: the %s backend computes no boolean differences" % BACKEND)
+    print_table(header, rows)
+
+
+if __name__ == "__main__":
+    main()
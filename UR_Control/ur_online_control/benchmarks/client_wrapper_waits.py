@@ -0,0 +1,79 @@
+'''
+The dead time of ClientWrapper.wait_for_ready and wait_for_command_executed
+against the URClient simulator: the waits blocking on the container compared
+with polling the container every 100 ms (as it was done before).
+'''
+from __future__ import print_function
+import time
+
+import ur_online_control.communication.container as container
+from ur_online_control.communication.server import Server
+from ur_online_control.communication.server.ur_simulator import URClient
+from ur_online_control.communication.client_wrapper import ClientWrapper
+from ur_online_control.communication.states import *
+from ur_online_control.benchmarks.utilities import Silence, percentile, print_table
+
+
+def wait_for_ready_before(ur):
+    state, number = container.CONNECTED_CLIENTS.get(ur.identifier)
+    while state != READY_TO_PROGRAM:
+        time.sleep(0.1)
+        state, number = container.CONNECTED_CLIENTS.get(ur.identifier)
+    return state
+
+
+def wait_for_command_executed_before(ur, number):
+    state, numex = container.CONNECTED_CLIENTS.get(ur.identifier)
+    while numex <= number:
+        time.sleep(0.1)
+        state, numex = container.CONNECTED_CLIENTS.get(ur.identifier)
+    return numex
+
+
+def measure(ur, wait, commands, execution_time, repetitions):
+    """ Sends the commands, waits and returns the dead time per wait (the time
+    of the wait minus the execution time of the first command). """
+    dead_times = []
+    for i in range(repetitions):
+        start = time.time()
+        for j in range(commands):
+            ur.send_command_movel([100., 200., 300., 0., 3.14, 0.], v=100.)
+        wait(ur)
+        dead_times.append(time.time() - start - execution_time)
+        ur.wait_for_ready()
+    return dead_times
+
+
+def main(execution_time=0.02, repetitions=30, port=30021):
+    with Silence():
+        server = Server("127.0.0.1", port)
+        server.client_ips.update({"UR": "127.0.0.1"})
+        server.start()
+
+        robot = URClient("127.0.0.1", port, execution_time=execution_time)
+        robot.connect_to_server()
+        robot.start()
+        ur = ClientWrapper("UR")
+        ur.wait_for_connected()
+
+        # the counters are reset on READY_TO_PROGRAM, so for wait_for_command_executed
+        # more commands are sent (enough to outlast the polling), and only the first one is waited for
+        cases = [("wait_for_ready", "polling", wait_for_ready_before, 1),
+                 ("wait_for_ready", "condition", lambda ur: ur.wait_for_ready(), 1),
+                 ("wait_for_command_executed", "polling", lambda ur: wait_for_command_executed_before(ur, 0), 10),
+                 ("wait_for_command_executed", "condition", lambda ur: ur.wait_for_command_executed(0), 10)]
+        results = [measure(ur, wait, commands, execution_time, repetitions) for name, mode, wait, commands in cases]
+
+        ur.quit()
+        time.sleep(0.5)
+        robot.close()
+        server.close()
+
+    ms = 1000.
+    rows = [[name, mode, "%.2f" % (sum(r) / len(r) * ms), "%.2f" % (percentile(r, 50) * ms), "%.2f" % (max(r) * ms)]
+            for (name, mode, wait, commands), r in zip(cases, results)]
+    print_table(["wait", "mode", "dead time mean [ms]", "p50 [ms]", "max [ms]"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+'''
+Streams a path of movel commands to a fake UR (which executes every command
+immediately), once with one MSG_COMMAND frame per command and once with
+MSG_COMMAND_BATCH frames, so the throughput is only limited by the protocol.
+'''
+from __future__ import print_function
+import struct
+import time
+
+from ur_online_control.communication.server import Server
+from ur_online_control.communication.client_wrapper import ClientWrapper
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.msg_codecs import BATCH_COMMAND_SIZE
+from ur_online_control.benchmarks.utilities import Silence, RawClient, print_table
+
+
+def run(batch, port, number=2000):
+    name = "MSG_COMMAND_BATCH" if batch else "MSG_COMMAND"
+    identifier = "UR_%s" % name # every run needs its own queues in the container
+
+    with Silence():
+        server = Server("127.0.0.1", port)
+        server.client_ips.update({"UR": "127.0.0.1"})
+        server.start()
+
+        robot = RawClient(identifier, "127.0.0.1", port)
+        ur = ClientWrapper(identifier)
+        ur.wait_for_connected()
+        if not batch:
+            server.client_sockets[0].batch_command_ids = []
+
+        frames_rcv, frames_snd = 0, 0
+        start = time.time()
+        for i in range(number):
+            ur.send_command_movel([100. + i, 200., 300., 0., 3.14, 0.], v=100.)
+
+        executed = 0
+        while executed < number:
+            msg_id, raw = robot.recv_frame()
+            frames_rcv += 1
+            ints = struct.unpack("!%ii" % (len(raw) // 4), raw)
+            if msg_id == MSG_COMMAND:
+                counters = [ints[1]]
+            elif msg_id == MSG_COMMAND_BATCH:
+                counters = [ints[1 + i * BATCH_COMMAND_SIZE + 1] for i in range(ints[0])]
+            else:
+                continue
+            robot.send_frame(MSG_COMMAND_RECEIVED, struct.pack("!i", counters[-1]))
+            frames_snd += 1
+            for counter in counters:
+                robot.send_frame(MSG_COMMAND_EXECUTED, struct.pack("!i", counter))
+                frames_snd += 1
+            executed = counters[-1]
+        elapsed = time.time() - start
+
+        ur.wait_for_ready()
+        robot.close()
+        time.sleep(0.2)
+        server.close()
+
+    return [name, "%i" % number, "%i" % frames_rcv, "%i" % frames_snd, "%.0f" % (number / elapsed)]
+
+
+def main():
+    rows = [run(False, 30015), run(True, 30016)]
+    print_table(["message", "commands", "frames to robot", "frames from robot", "commands/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+'''
+Stress scenario for the command stack of the ActuatorSocket: several threads
+send movel commands concurrently, which are executed by the URClient simulator
+(without execution time). Every command carries (sender, sequence number) in
+its pose, the simulator records what it received, and at the end it is checked
+that no command was lost or duplicated and that the command counters are
+consecutive.
+'''
+from __future__ import print_function
+import struct
+import sys
+import time
+from threading import Thread
+
+from ur_online_control.communication.server import Server
+from ur_online_control.communication.server.ur_simulator import URClient
+from ur_online_control.communication.client_wrapper import ClientWrapper
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.msg_codecs import BATCH_COMMAND_SIZE
+from ur_online_control.benchmarks.utilities import Silence, print_table
+
+MULT = 100000.0
+
+
+class RecordingURClient(URClient):
+    """ Records the counters and the (sender, sequence number) of all commands. """
+
+    def __init__(self, host, port):
+        super(RecordingURClient, self).__init__(host, port, execution_time=0)
+        self.counters = []
+        self.commands = []
+
+    def _process_other_messages(self, msg_len, msg_id, raw_msg):
+        if msg_id in [MSG_COMMAND, MSG_COMMAND_BATCH]:
+            ints = struct.unpack("!%ii" % ((msg_len - 4) // 4), raw_msg)
+            if msg_id == MSG_COMMAND:
+                cmds = [ints]
+            else:
+                cmds = [ints[1 + i * BATCH_COMMAND_SIZE:1 + (i + 1) * BATCH_COMMAND_SIZE] for i in range(ints[0])]
+            for cmd in cmds:
+                self.counters.append(cmd[1])
+                x, y, z = [int(round(v / MULT)) for v in cmd[2:5]]
+                self.commands.append((z, x * 1000 + y))
+        super(RecordingURClient, self)._process_other_messages(msg_len, msg_id, raw_msg)
+
+
+def sender(ur, sender_id, number):
+    for i in range(number):
+        # the values are multiplied with MULT and sent as integers, so they must be small
+        ur.send_command_movel([float(i // 1000), float(i % 1000), float(sender_id), 0., 0., 0.], v=100.)
+
+
+def main(number=100000, senders=4, port=30019, timeout=600):
+    with Silence():
+        server = Server("127.0.0.1", port)
+        server.client_ips.update({"UR": "127.0.0.1"})
+        server.start()
+
+        robot = RecordingURClient("127.0.0.1", port)
+        robot.connect_to_server()
+        robot.start()
+        ur = ClientWrapper("UR")
+        ur.wait_for_connected()
+
+        start = time.time()
+        per_sender = number // senders
+        threads = [Thread(target=sender, args=(ur, i, per_sender)) for i in range(senders)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        while len(robot.commands) < per_sender * senders and time.time() - start < timeout:
+            time.sleep(0.1)
+        elapsed = time.time() - start
+
+        ur.quit()
+        time.sleep(0.5)
+        robot.close()
+        server.close()
+
+    sent = set((s, i) for s in range(senders) for i in range(per_sender))
+    received = robot.commands
+    lost = len(sent - set(received))
+    duplicated = len(received) - len(set(received))
+    # the counters start again at 1 whenever the stack ran empty (READY_TO_PROGRAM)
+    gaps = sum(1 for a, b in zip(robot.counters, robot.counters[1:]) if b != a + 1 and b != 1)
+
+    print_table(["commands", "senders", "received", "lost", "duplicated", "counter gaps", "commands/s"],
+                [["%i" % len(sent), "%i" % senders, "%i" % len(received), "%i" % lost, "%i" % duplicated,
+                  "%i" % gaps, "%.0f" % (len(received) / elapsed)]])
+
+    if lost or duplicated or gaps:
+        print("FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+'''
+Streams short movel segments to a fake UR, which models the buffer of the
+URScript program (MAX_BUFFER_SIZE), the execution time of a segment and the
+latency of its messages, once with the fixed stack_size (= buffer size of the
+robot) and once with the adaptive stack_size. Reports how long the robot ran
+dry, i.e. waited for the next command.
+'''
+from __future__ import print_function
+import heapq
+import select
+import struct
+import time
+from collections import deque
+
+from ur_online_control.communication.server import Server
+from ur_online_control.communication.server.frame_decoder import FrameDecoder
+from ur_online_control.communication.client_wrapper import ClientWrapper
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.msg_codecs import BATCH_COMMAND_SIZE
+from ur_online_control.benchmarks.utilities import Silence, RawClient, print_table
+
+
+class FakeRobot(RawClient):
+    """ Executes the commands one after the other, every command takes
+    execution_time, and all messages to the server are delayed by latency. """
+
+    def __init__(self, identifier, host, port, buffer_size, execution_time, latency):
+        super(FakeRobot, self).__init__(identifier, host, port)
+        self.send_frame(MSG_BUFFER_SIZE, struct.pack("!i", buffer_size))
+        self.buffer_size = buffer_size
+        self.execution_time = execution_time
+        self.latency = latency
+        self.decoder = FrameDecoder()
+        self.outbox = [] # heap of (time, counter, msg_id)
+        self.dry_time = 0.
+        self.underruns = 0
+
+    def receive(self, pending):
+        if self.decoder.recv_from(self.socket) == 0:
+            raise EOFError("server closed the connection")
+        for msg_len, msg_id, raw_msg in self.decoder.frames():
+            ints = struct.unpack("!%ii" % (len(raw_msg) // 4), raw_msg)
+            if msg_id == MSG_COMMAND:
+                pending.append(ints[1])
+            elif msg_id == MSG_COMMAND_BATCH:
+                pending.extend([ints[1 + i * BATCH_COMMAND_SIZE + 1] for i in range(ints[0])])
+
+    def schedule(self, msg_id, counter):
+        heapq.heappush(self.outbox, (time.time() + self.latency, counter, msg_id))
+
+    def run(self, number):
+        pending = deque() # received from the network, but not yet in the buffer
+        buffer = deque()
+        current, current_end = None, None
+        dry_since = None
+        executed = 0
+
+        while executed < number:
+            now = time.time()
+            while self.outbox and self.outbox[0][0] <= now:
+                t, counter, msg_id = heapq.heappop(self.outbox)
+                self.send_frame(msg_id, struct.pack("!i", counter))
+
+            if current is not None and now >= current_end:
+                self.schedule(MSG_COMMAND_EXECUTED, current)
+                executed, current = current, None
+
+            # the command being executed still occupies its place, see execute_from_buffer
+            moved = None
+            while pending and len(buffer) + (current is not None) < self.buffer_size:
+                moved = pending.popleft()
+                buffer.append(moved)
+            if moved is not None:
+                self.schedule(MSG_COMMAND_RECEIVED, moved)
+
+            if current is None and buffer:
+                current, current_end = buffer.popleft(), now + self.execution_time
+                if dry_since is not None:
+                    self.dry_time += now - dry_since
+                    dry_since = None
+            elif current is None and executed and executed < number and dry_since is None:
+                dry_since = now
+                self.underruns += 1
+
+            deadlines = [t for t, c, m in self.outbox[:1]] + ([current_end] if current is not None else [])
+            timeout = max(0., min(deadlines) - now) if deadlines else 0.1
+            readable = select.select([self.socket], [], [], timeout)[0]
+            if readable:
+                self.receive(pending)
+
+        while self.outbox:
+            t, counter, msg_id = heapq.heappop(self.outbox)
+            time.sleep(max(0., t - time.time()))
+            self.send_frame(msg_id, struct.pack("!i", counter))
+
+
+def run(adaptive, port, number=500, buffer_size=5, execution_time=0.002, latency=0.01):
+    name = "adaptive" if adaptive else "fixed"
+    identifier = "UR_%s" % name.upper()
+
+    with Silence():
+        server = Server("127.0.0.1", port)
+        server.client_ips.update({"UR": "127.0.0.1"})
+        server.start()
+
+        robot = FakeRobot(identifier, "127.0.0.1", port, buffer_size, execution_time, latency)
+        ur = ClientWrapper(identifier)
+        ur.wait_for_connected()
+        time.sleep(0.1)
+        actuator = server.client_sockets[0]
+        actuator.adaptive_stack_size = adaptive
+
+        start = time.time()
+        for i in range(number):
+            ur.send_command_movel([100. + i, 200., 300., 0., 3.14, 0.], v=100., r=1.)
+        robot.run(number)
+        elapsed = time.time() - start
+
+        ur.wait_for_ready()
+        occupancy = [o for t, o, s in ur.get_buffer_occupancy()]
+        robot.close()
+        time.sleep(0.2)
+        server.close()
+
+    ms = 1000.
+    return [name, "%i" % buffer_size, "%i" % actuator.stack_size, "%.0f" % (elapsed * ms),
+            "%.0f" % (number * execution_time * ms), "%.0f" % (robot.dry_time * ms),
+            "%i" % robot.underruns, "%i" % actuator.underruns, "%i" % max(occupancy)]
+
+
+def main():
+    rows = [run(False, 30017), run(True, 30018)]
+    print_table(["stack_size", "robot buffer", "final stack_size", "time [ms]", "motion [ms]",
+                 "dry [ms]", "underruns (robot)", "underruns (server)", "max occupancy"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+'''
+The constraint checks of Beam and Dowel object by object
+(check_boundary_constraints, check_angle_constraints, get_distance_from_edges,
+check_spacing_constraints) against check_constraints of
+geometry/constraints.py, for the structures of grasshopper/data/*.json on the
+geometry backend of geometry/backend.py.
+
+A structure is built from the hole planes: the holes of different beams on
+the same line are one dowel through these beams.
+'''
+from __future__ import print_function
+import os
+
+import numpy as np
+
+from geometry.backend import rg, BACKEND
+from geometry.beam import Beam
+from geometry.dowel import Dowel
+from geometry.fabricatable_beam import FabricatableBeam
+from geometry.constraints import check_constraints, edge_distances
+from geometry.spatial_index import merge_duplicate_dowels
+from ur_online_control.benchmarks.utilities import Silence, Timer, print_table
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "grasshopper", "data")
+DATA_SETS = ["1.json", "2.json", "3.json", "4.json", "5.json"]
+
+
+def structure(path, tolerance=1.0, scale=1.0):
+    """ The beams with the dowels through the holes on the same line
+    (within tolerance mm), scaled as FabricatableBeam.read_from_json. """
+    fabricatable_beams = FabricatableBeam.read_from_json(path, scale)
+    beams = [Beam(b.base_plane, b.dx, b.dy, b.dz) for b in fabricatable_beams]
+    dowels = []
+    for beam, fabricatable_beam in zip(beams, fabricatable_beams):
+        for hole in fabricatable_beam.holes:
+            dowel = Dowel(base_plane=rg.Plane(hole))
+            beam.add_dowel(dowel)
+            dowels.append(dowel)
+    merge_duplicate_dowels(beams, dowels, tolerance)
+    return beams
+
+
+def object_by_object(beams, dowels):
+    with Silence():
+        boundary = sum(len(beam.check_boundary_constraints() or []) for beam in beams)
+        angle = sum(len(beam.check_angle_constraints()) for beam in beams)
+        edge = [dowel.get_distance_from_edges() for dowel in dowels]
+        spacing = sum(len(dowel.check_spacing_constraints() or []) for dowel in dowels)
+    return boundary, angle, edge, spacing
+
+
+def main(repeat=5):
+    rows = []
+    for name in DATA_SETS:
+        beams = structure(os.path.join(DATA_DIR, name))
+        report = check_constraints(beams)
+        dowels = report.structure.dowels
+
+        with Timer() as each:
+            for i in range(repeat):
+                boundary, angle, edge, spacing = object_by_object(beams, dowels)
+        with Timer() as batch:
+            for i in range(repeat):
+                report = check_constraints(beams)
+        with Timer() as batch_checks:
+            for i in range(repeat):
+                check_constraints(report.structure)
+
+        edge_difference = np.abs(np.array(edge) - edge_distances(report.structure)[1]).max()
+        same = [boundary == len(report.boundary), angle == len(report.angle), spacing == len(report.spacing)]
+        rows.append([name, "%i / %i / %i" % (len(beams), len(dowels), len(report.structure.incidence_beams)),
+                     "%i / %i / %i / %i" % (len(report.boundary), len(report.angle), len(report.edge), len(report.spacing)),
+                     "%.1f" % (each.wall / repeat * 1000), "%.1f" % (batch.wall / repeat * 1000),
+                     "%.2f" % (batch_checks.wall / repeat * 1000),
+                     "yes" if all(same) else "no", "%.1e" % edge_difference])
+    print("backend: %s" % BACKEND)
+    print_table(["data set", "beams / dowels / incidences", "boundary / angle / edge / spacing",
+                 "objects [ms]", "check_constraints [ms]", "checks only [ms]", "same counts", "max edge difference"],
+                rows)
+
+
+if __name__ == "__main__":
+    main()
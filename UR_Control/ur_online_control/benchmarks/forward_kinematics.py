@@ -0,0 +1,88 @@
+'''
+forward_ros configuration by configuration against forward_ros_batch, with
+and without Jacobians. The batch poses are compared with forward_ros, the
+Jacobians with finite differences of forward_ros, and forward_kinematics_batch
+(imported through the ur package, which needs numpy only) with forward_ros of
+the shifted first joint.
+'''
+from __future__ import print_function
+import math
+
+import numpy as np
+
+from ur_online_control.ur.kinematics import forward_kinematics_batch
+from ur_online_control.ur.kinematics.ur_kin_ros import forward_ros, forward_ros_batch
+from ur_online_control.benchmarks.utilities import Timer, print_table
+
+UR5_PARAMS = [89.159, -425.0, -392.25, 109.15, 94.65, 82.3]
+UR10_PARAMS = [127.3, -612.0, -572.3, 163.941, 115.7, 92.2]
+
+
+def finite_difference_jacobian(q, ur_params, h=1e-6):
+    """ The Jacobian of forward_ros at q by central differences. """
+    J = np.zeros((6, 6))
+    for i in range(6):
+        qp, qm = list(q), list(q)
+        qp[i] += h
+        qm[i] -= h
+        Tp = np.array(forward_ros(qp, ur_params)).reshape(4, 4)
+        Tm = np.array(forward_ros(qm, ur_params)).reshape(4, 4)
+        J[:3, i] = (Tp[:3, 3] - Tm[:3, 3]) / (2 * h)
+        # the angular velocity from dR/dq R^T (skew-symmetric)
+        W = np.dot((Tp[:3, :3] - Tm[:3, :3]) / (2 * h), np.array(forward_ros(q, ur_params)).reshape(4, 4)[:3, :3].T)
+        J[3:, i] = [W[2, 1], W[0, 2], W[1, 0]]
+    return J
+
+
+def check(ur_params, number=1000, seed=0):
+    """ Returns the max differences of the poses, the Jacobians (relative)
+    and the frames of forward_kinematics_batch. """
+    q = np.random.RandomState(seed).uniform(-2 * math.pi, 2 * math.pi, (number, 6))
+    T, J = forward_ros_batch(q, ur_params, jacobians=True)
+    frames = forward_kinematics_batch(q, ur_params)
+    pose_difference, jacobian_difference, frame_difference = 0., 0., 0.
+    for n in range(number):
+        reference = np.array(forward_ros(list(q[n]), ur_params)).reshape(4, 4)
+        pose_difference = max(pose_difference, np.abs(T[n] - reference).max())
+        # forward_kinematics: the first joint rotated by pi, the columns zaxis, xaxis, yaxis, point
+        shifted = [q[n][0] + math.pi] + list(q[n][1:])
+        reference = np.array(forward_ros(shifted, ur_params)).reshape(4, 4)[:, [1, 2, 0, 3]]
+        frame_difference = max(frame_difference, np.abs(frames[n] - reference).max())
+        reference = finite_difference_jacobian(list(q[n]), ur_params)
+        jacobian_difference = max(jacobian_difference, np.abs(J[n] - reference).max() / np.abs(reference).max())
+    return pose_difference, jacobian_difference, frame_difference
+
+
+def main(number=100000):
+    q = np.random.RandomState(1).uniform(-math.pi, math.pi, (number, 6))
+    configurations = [list(c) for c in q]
+
+    with Timer() as each:
+        for c in configurations:
+            forward_ros(c, UR5_PARAMS)
+    with Timer() as batch:
+        forward_ros_batch(q, UR5_PARAMS)
+    with Timer() as batch_jacobians:
+        T, J = forward_ros_batch(q, UR5_PARAMS, jacobians=True)
+
+    rows = [["forward_ros", "%i" % number, "%.2f" % each.wall, "%.0f" % (number / each.wall), "1.0"]]
+    for name, timer in [("forward_ros_batch", batch), ("forward_ros_batch + jacobians", batch_jacobians)]:
+        rows.append([name, "%i" % number, "%.3f" % timer.wall, "%.0f" % (number / timer.wall), "%.1f" % (each.wall / timer.wall)])
+    print_table(["method", "configurations", "time [s]", "configurations/s", "speedup"], rows)
+
+    # close to singular: the smallest singular value of the Jacobian (translation scaled to m)
+    scaled = J.copy()
+    scaled[:, :3] /= 1000.
+    sigma = np.linalg.svd(scaled, compute_uv=False)[:, -1]
+    print("%i of %i configurations with a smallest singular value < 0.01" % ((sigma < 0.01).sum(), number))
+
+    rows = []
+    for name, ur_params in [("UR5", UR5_PARAMS), ("UR10", UR10_PARAMS)]:
+        differences = check(ur_params)
+        rows.append([name] + ["%.1e" % d for d in differences])
+    print_table(["robot", "max pose difference to forward_ros", "max relative jacobian difference",
+                 "max forward_kinematics_batch difference"], rows)
+
+
+if __name__ == "__main__":
+    main()
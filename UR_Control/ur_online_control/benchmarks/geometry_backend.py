@@ -0,0 +1,123 @@
+'''
+Hole planning with Beam, Dowel and Hole of UR_Control/geometry on the
+geometry backend of geometry/backend.py, for the beam files
+grasshopper/data/*.json: the drilling planes (safe, top, bottom) of every
+hole at the drilling station.
+
+    python -m ur_online_control.benchmarks.geometry_backend record planes.json
+
+records the planes (inside Rhino: the Rhino outputs),
+
+    python -m ur_online_control.benchmarks.geometry_backend planes.json
+
+compares the planes of the backend with a recording, without a recording with
+the plain Python port of Hole in benchmarks/pipeline.py. The port only shows
+that both compute the same, the Rhino conventions of the backend are asserted
+against the recorded Rhino outputs of benchmarks/rhino_fixture.py.
+'''
+from __future__ import print_function
+import json
+import os
+import sys
+
+from geometry.backend import rg, BACKEND
+from geometry.beam import Beam
+from geometry.dowel import Dowel
+from geometry.hole import Hole
+from geometry.fabricatable_beam import FabricatableBeam
+from ur_online_control.benchmarks import rhino_fixture
+from ur_online_control.benchmarks.utilities import Silence, Timer, print_table
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "grasshopper", "data")
+DATA_SETS = ["1.json", "2.json", "3.json", "4.json", "5.json"]
+
+# as benchmarks/pipeline.py
+SCALE = 0.2
+DRILL_ORIGIN = [-400., -250., 250.]
+DOWEL_RADIUS = 12.0
+SAFE_BUFFER = 2.0
+SAFE_PLANE_DIFF = 100.
+
+
+def load(path, scale=SCALE):
+    """ The beams of a data set as Beam with a Dowel along each hole plane. """
+    beams = []
+    for fabricatable_beam in FabricatableBeam.read_from_json(path, scale):
+        beam = Beam(fabricatable_beam.base_plane, fabricatable_beam.dx, fabricatable_beam.dy, fabricatable_beam.dz)
+        for hole in fabricatable_beam.holes:
+            beam.add_dowel(Dowel(base_plane=hole, dowel_radius=DOWEL_RADIUS))
+        beams.append(beam)
+    return beams
+
+
+def plan_holes(beams):
+    """ Per beam the planes n * (safe, top, bottom) at the drilling station. """
+    drill_plane = rg.Plane(rg.Point3d(*DRILL_ORIGIN), rg.Vector3d(1, 0, 0), rg.Vector3d(0, 1, 0))
+    planned = []
+    for beam in beams:
+        planes = []
+        for hole in Hole.create_holes(beam, safe_buffer=SAFE_BUFFER):
+            hole.orient_to_drilling_station(drill_plane)
+            planes.extend(hole.get_tool_planes(safe_plane_diff=SAFE_PLANE_DIFF))
+        planned.append(planes)
+    return planned
+
+
+def plane_to_list(plane):
+    return [plane.Origin.X, plane.Origin.Y, plane.Origin.Z, plane.XAxis.X, plane.XAxis.Y, plane.XAxis.Z,
+            plane.YAxis.X, plane.YAxis.Y, plane.YAxis.Z]
+
+
+def run(data_sets=DATA_SETS):
+    """ Returns per data set the planes as lists and the Timer. """
+    results = {}
+    for name in data_sets:
+        with Silence():
+            with Timer() as timer:
+                planned = plan_holes(load(os.path.join(DATA_DIR, name)))
+        results[name] = ([[plane_to_list(plane) for plane in planes] for planes in planned], timer)
+    return results
+
+
+def port_of_pipeline(name):
+    """ The planes of the plain Python port, in the layout of plane_to_list. """
+    from ur_online_control.benchmarks import pipeline
+    planned = pipeline.plan_holes(pipeline.load(os.path.join(DATA_DIR, name), SCALE))
+    return [[[T[0][3], T[1][3], T[2][3], T[0][0], T[1][0], T[2][0], T[0][1], T[1][1], T[2][1]]
+             for T in planes[1:-2]] for planes in planned]
+
+
+def difference(planned, reference):
+    if [len(planes) for planes in planned] != [len(planes) for planes in reference]:
+        return float("inf")
+    return max([abs(a - b) for planes, reference_planes in zip(planned, reference)
+                for plane, reference_plane in zip(planes, reference_planes)
+                for a, b in zip(plane, reference_plane)] + [0.])
+
+
+def main(argv):
+    results = run()
+    if len(argv) > 2 and argv[1] == "record":
+        with open(argv[2], "w") as f:
+            json.dump(dict((name, planned) for name, (planned, timer) in results.items()), f)
+        print("recorded the planes of the %s backend to %s" % (BACKEND, argv[2]))
+        return
+
+    recording = None
+    if len(argv) > 1:
+        with open(argv[1]) as f:
+            recording = json.load(f)
+    rows = []
+    for name in DATA_SETS:
+        planned, timer = results[name]
+        reference = recording[name] if recording else port_of_pipeline(name)
+        rows.append([name, "%i" % len(planned), "%i" % (sum(len(planes) for planes in planned) // 3),
+                     "%.1f" % (timer.wall * 1000), "%.1e" % difference(planned, reference)])
+    print("backend: %s, reference: %s" % (BACKEND, argv[1] if recording else "benchmarks/pipeline.py"))
+    print_table(["data set", "beams", "holes", "load + plan holes [ms]", "max difference [mm]"], rows)
+    print()
+    rhino_fixture.compare()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
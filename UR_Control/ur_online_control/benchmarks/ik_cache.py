@@ -0,0 +1,131 @@
+'''
+Interactive re-planning of a 200 beam structure with and without IKCache:
+every slider move recomputes all tool frames (with numerical noise), but only
+moves the frames of a few beams by some millimetres. The cache is keyed by
+the tool0 frame in the robot coordinate system, as in UR.inverse_kinematics.
+'''
+from __future__ import print_function
+import math
+import random
+
+from ur_online_control.ur.kinematics.ur_kin_ros import forward_ros, inverse_ros
+from ur_online_control.ur.kinematics.ik_cache import IKCache
+from ur_online_control.benchmarks.utilities import Timer, print_table
+
+UR5_PARAMS = [89.159, -425.0, -392.25, 109.15, 94.65, 82.3]
+
+
+class Frame(object):
+    """ The attributes of compas' Frame used by IKCache. """
+
+    def __init__(self, point, xaxis, yaxis):
+        self.point = point
+        self.xaxis = xaxis
+        self.yaxis = yaxis
+
+
+def frame_from_joints(q):
+    T = forward_ros(q, UR5_PARAMS)
+    return Frame([T[3], T[7], T[11]], [T[1], T[5], T[9]], [T[2], T[6], T[10]])
+
+
+def moved(frame, vector):
+    return Frame([a + b for a, b in zip(frame.point, vector)], frame.xaxis, frame.yaxis)
+
+
+def matrix(frame):
+    x, y, p = frame.xaxis, frame.yaxis, frame.point
+    z = [x[1] * y[2] - x[2] * y[1], x[2] * y[0] - x[0] * y[2], x[0] * y[1] - x[1] * y[0]]
+    return [[x[i], y[i], z[i], p[i]] for i in range(3)] + [[0., 0., 0., 1.]]
+
+
+def multiply(A, B):
+    return [[sum(A[i][k] * B[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+
+
+def invert(T):
+    R = [[T[j][i] for j in range(3)] for i in range(3)]
+    p = [-sum(R[i][k] * T[k][3] for k in range(3)) for i in range(3)]
+    return [R[0] + [p[0]], R[1] + [p[1]], R[2] + [p[2]], [0., 0., 0., 1.]]
+
+
+def tool0_frame(frame, tool_frame, base_frame):
+    """ As UR.inverse_kinematics_tcp: the tcp frame into the base frame and
+    the tool0 frame from the tcp frame. """
+    M = multiply(multiply(invert(matrix(base_frame)), matrix(frame)), invert(matrix(tool_frame)))
+    return Frame([M[0][3], M[1][3], M[2][3]], [M[0][0], M[1][0], M[2][0]], [M[0][1], M[1][1], M[2][1]])
+
+
+def solve(frame):
+    """ As ur_kinematics.inverse_kinematics of the tool0 frame. """
+    x, y, p = frame.xaxis, frame.yaxis, frame.point
+    z = [x[1] * y[2] - x[2] * y[1], x[2] * y[0] - x[0] * y[2], x[0] * y[1] - x[1] * y[0]]
+    T = [z[0], x[0], y[0], p[0],
+         z[1], x[1], y[1], p[1],
+         z[2], x[2], y[2], p[2],
+         0., 0., 0., 1.]
+    try:
+        qsols = inverse_ros(T, UR5_PARAMS)
+    except (ZeroDivisionError, ValueError):
+        return []
+    for q in qsols:
+        q[0] -= math.pi
+    return qsols
+
+
+def structure(beams, frames_per_beam, rnd):
+    frames = []
+    for i in range(beams):
+        base = [rnd.uniform(-math.pi, math.pi), rnd.uniform(-2.5, -0.5), rnd.uniform(0.5, 2.5),
+                rnd.uniform(-math.pi, math.pi), rnd.uniform(0.3, 2.8), rnd.uniform(-math.pi, math.pi)]
+        frames.append([frame_from_joints([a + rnd.uniform(-0.1, 0.1) for a in base]) for j in range(frames_per_beam)])
+    return frames
+
+
+def slider_move(frames, offsets, moving_beams, rnd):
+    """ The frames of moving_beams move by some mm, all get numerical noise. """
+    for i in rnd.sample(range(len(frames)), moving_beams):
+        offsets[i] = [rnd.uniform(-5., 5.) for k in range(3)]
+    return [[moved(frame, [o + rnd.uniform(-1e-9, 1e-9) for o in offsets[i]]) for frame in beam]
+            for i, beam in enumerate(frames)]
+
+
+def flatten(iterations):
+    return [solutions for iteration in iterations for beam in iteration for solutions in beam]
+
+
+def main(beams=200, frames_per_beam=20, moves=20, moving_beams=10, tolerance=0.01):
+    rnd = random.Random(0)
+    frames = structure(beams, frames_per_beam, rnd)
+    offsets = [[0., 0., 0.] for beam in frames]
+    tool_frame = Frame([0., 0., 0.], [1., 0., 0.], [0., 1., 0.])
+    base_frame = Frame([0., 0., 0.], [1., 0., 0.], [0., 1., 0.])
+    iterations = [slider_move(frames, offsets, moving_beams, rnd) for i in range(moves)]
+
+    rows = []
+    with Timer() as timer:
+        exact = [[[solve(tool0_frame(frame, tool_frame, base_frame)) for frame in beam] for beam in iteration]
+                 for iteration in iterations]
+    rows.append(["no cache", "%.1f" % (timer.wall / moves * 1000), "-", "-"])
+
+    def cached_solve(cache, frame):
+        frame = tool0_frame(frame, tool_frame, base_frame)
+        return cache.get(lambda: solve(frame), frame)
+
+    for cache in [IKCache(maxsize=1000, tolerance=tolerance), IKCache(maxsize=beams * frames_per_beam, tolerance=tolerance),
+                  IKCache(tolerance=tolerance)]:
+        with Timer() as timer:
+            cached = [[[cached_solve(cache, frame) for frame in beam] for beam in iteration] for iteration in iterations]
+        error = 0.
+        for solutions, exact_solutions in zip(flatten(cached), flatten(exact)):
+            for q, r in zip(solutions, exact_solutions):
+                error = max([error] + [abs(a - b) for a, b in zip(q, r)])
+        rows.append(["IKCache(maxsize=%i)" % cache.maxsize, "%.1f" % (timer.wall / moves * 1000),
+                     "%.1f" % (cache.hit_rate * 100), "%.1e" % error])
+    print("%i beams, %i frames, %i slider moves, %i beams moved per move, tolerance %.2f mm" % (
+        beams, beams * frames_per_beam, moves, moving_beams, tolerance))
+    print_table(["ik", "re-plan [ms]", "hits [%]", "max joint error [rad]"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+'''
+inverse_ros pose by pose against inverse_ros_batch on the same poses: random
+joint values of a UR5 through forward_ros, a third of the poses moved so that
+many are not reachable. The batch solutions must agree with inverse_ros.
+'''
+from __future__ import print_function
+import math
+import random
+
+import numpy as np
+
+from ur_online_control.ur.kinematics.ur_kin_ros import forward_ros, inverse_ros, inverse_ros_batch
+from ur_online_control.benchmarks.utilities import Timer, print_table
+
+UR5_PARAMS = [89.159, -425.0, -392.25, 109.15, 94.65, 82.3]
+
+
+def random_poses(number, seed=0):
+    rnd = random.Random(seed)
+    poses = []
+    for i in range(number):
+        T = forward_ros([rnd.uniform(-math.pi, math.pi) for j in range(6)], UR5_PARAMS)
+        if i % 3 == 0:
+            T[3] += rnd.uniform(-500., 500.)
+            T[11] += rnd.uniform(-500., 500.)
+        poses.append(T)
+    return poses
+
+
+def solve_each(poses):
+    solutions = []
+    for T in poses:
+        try:
+            solutions.append(inverse_ros(T, UR5_PARAMS))
+        except (ZeroDivisionError, ValueError):
+            solutions.append([])
+    return solutions
+
+
+def max_difference(solutions, q_sols, valid):
+    """ The largest difference of a joint value, or None if the solutions differ in number. """
+    difference = 0.
+    for n, qs in enumerate(solutions):
+        if len(qs) != valid[n].sum():
+            return None
+        if len(qs):
+            difference = max(difference, np.abs(np.array(qs) - q_sols[n][valid[n]]).max())
+    return difference
+
+
+def main(number=100000):
+    poses = random_poses(number)
+    array = np.array(poses)
+
+    with Timer() as each:
+        solutions = solve_each(poses)
+    with Timer() as batch:
+        q_sols, valid = inverse_ros_batch(array, UR5_PARAMS)
+    difference = max_difference(solutions, q_sols, valid)
+
+    rows = [["inverse_ros", "%i" % number, "%.2f" % each.wall, "%.0f" % (number / each.wall), "1.0"],
+            ["inverse_ros_batch", "%i" % number, "%.2f" % batch.wall, "%.0f" % (number / batch.wall),
+             "%.1f" % (each.wall / batch.wall)]]
+    print_table(["method", "poses", "time [s]", "poses/s", "speedup"], rows)
+    print("%i solutions, %i poses without solution, max difference: %s" % (
+        valid.sum(), (~valid.any(axis=1)).sum(), "different number of solutions" if difference is None else "%.1e rad" % difference))
+
+
+if __name__ == "__main__":
+    main()
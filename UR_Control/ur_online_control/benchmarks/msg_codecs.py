@@ -0,0 +1,116 @@
+'''
+Messages per second of the precompiled codecs compared with building the
+format string and the parameter list for every message (as it was done before).
+The commands and batches are packed by URSocket in place into its send
+buffer, as _send_command and _send_batch do (the buffer is emptied after
+each message, as _flush does).
+'''
+from __future__ import print_function
+import socket
+import struct
+import time
+
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.msg_codecs import get_codecs
+from ur_online_control.communication.server.actuator_socket import URSocket
+
+MULT = 100000.0
+BYTEORDER = "!"
+
+
+def format_command_before(msg_id, command_id, counter, cmd):
+    msg_command_length = 4 * (len(cmd) + 1 + 1 + 1)
+    cmd = [int(c * MULT) for c in cmd]
+    params = [msg_command_length, msg_id, command_id, counter] + cmd
+    return struct.pack(BYTEORDER + "%ii" % len(params), *params)
+
+
+def format_command_after(msg_id, command_id, counter, cmd, ur_socket):
+    ur_socket.command_counter = counter
+    ur_socket._append_command(ur_socket.snd_buffer, msg_id, (command_id, cmd))
+    del ur_socket.snd_buffer[:]
+
+
+def format_batch_before(cmds, counter):
+    params = [MSG_COMMAND_BATCH, len(cmds)]
+    for msg_id, (command_id, cmd) in cmds:
+        counter += 1
+        params += [command_id, counter] + [int(c * MULT) for c in cmd]
+    params = [4 * len(params)] + params
+    return struct.pack(BYTEORDER + "%ii" % len(params), *params)
+
+
+def format_batch_after(cmds, counter, ur_socket):
+    ur_socket.command_counter = counter
+    ur_socket._append_command_batch(ur_socket.snd_buffer, cmds)
+    del ur_socket.snd_buffer[:]
+
+
+def sent(ur_socket, append, *args):
+    """ The bytes URSocket appends to its send buffer. """
+    append(ur_socket.snd_buffer, *args)
+    buf = bytes(ur_socket.snd_buffer)
+    del ur_socket.snd_buffer[:]
+    return buf
+
+
+def format_float_list_before(msg_id, msg):
+    msg_snd_len = struct.calcsize(str(len(msg)) + "f") + 4
+    msg = [float(item) for item in msg]
+    params = [msg_snd_len, msg_id] + msg
+    return struct.pack(BYTEORDER + "2i" + str(len(msg)) + "f", *params)
+
+
+def format_float_list_after(msg_id, msg, buffer, codecs=get_codecs(BYTEORDER)):
+    codec = codecs.float_list(len(msg))
+    codec.pack_into(buffer, 0, codec.msg_length, msg_id, *msg)
+    return buffer
+
+
+def parse_pose_before(raw_msg):
+    current_pose_tuple = struct.unpack_from(BYTEORDER + "%ii" % (6), raw_msg)
+    return [s / MULT for s in current_pose_tuple]
+
+
+def parse_pose_after(raw_msg, codecs=get_codecs(BYTEORDER)):
+    return [s / MULT for s in codecs.pose.unpack_from(raw_msg)]
+
+
+def rate(func, args, number):
+    start = time.time()
+    for i in range(number):
+        func(*args)
+    return number / (time.time() - start)
+
+
+def main(number=200000):
+    movel = [100.0, 200.0, 300.0, 0.1, 0.2, 0.3, 0.0, 200.0, 1.0, 0.0]
+    float_list = [float(i) for i in range(1000)]
+    buffer = bytearray(get_codecs(BYTEORDER).float_list(len(float_list)).size)
+    raw_pose = memoryview(struct.pack(BYTEORDER + "6i", *range(6)))
+    batch = [(MSG_COMMAND, (COMMAND_ID_MOVEL, movel))] * 10
+
+    a, b = socket.socketpair()
+    ur_socket = URSocket(a, "127.0.0.1", None)
+    ur_socket.command_counter = 1
+    assert format_command_before(MSG_COMMAND, COMMAND_ID_MOVEL, 1, movel) == \
+        sent(ur_socket, ur_socket._append_command, MSG_COMMAND, (COMMAND_ID_MOVEL, movel))
+    assert format_batch_before(batch, 1) == sent(ur_socket, ur_socket._append_command_batch, batch)
+    assert format_float_list_before(MSG_FLOAT_LIST, float_list) == bytes(format_float_list_after(MSG_FLOAT_LIST, float_list, buffer))
+
+    cases = [("MSG_COMMAND movel", format_command_before, format_command_after, (MSG_COMMAND, COMMAND_ID_MOVEL, 1, movel), (ur_socket,), number),
+             ("MSG_COMMAND_BATCH 10", format_batch_before, format_batch_after, (batch, 1), (ur_socket,), number // 10),
+             ("MSG_FLOAT_LIST 1000", format_float_list_before, format_float_list_after, (MSG_FLOAT_LIST, float_list), (buffer,), number // 100),
+             ("MSG_CURRENT_POSE_JOINT", parse_pose_before, parse_pose_after, (raw_pose,), (), number)]
+
+    print("%-24s %14s %14s %8s" % ("message", "before [msg/s]", "after [msg/s]", "speedup"))
+    for name, before, after, args, extra_args, n in cases:
+        r_before = rate(before, args, n)
+        r_after = rate(after, args + extra_args, n)
+        print("%-24s %14.0f %14.0f %7.2fx" % (name, r_before, r_after, r_after / r_before))
+    a.close()
+    b.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+'''
+Throughput of the Scheduler: the same interleaved command stream (with a sync
+every sync_every commands, e.g. a handover) executed by one URClient simulator
+or distributed to two of them (UR1 and UR2).
+'''
+from __future__ import print_function
+import time
+
+from ur_online_control.communication.server import Server
+from ur_online_control.communication.server.ur_simulator import URClient
+from ur_online_control.communication.scheduler import ActuatorGroup, Scheduler
+from ur_online_control.benchmarks.utilities import Silence, print_table
+
+
+def run(server, port, identifiers, number, sync_every, execution_time, window):
+    robots = []
+    for identifier in identifiers:
+        server.add_client(identifier, "127.0.0.1", "UR")
+        robot = URClient("127.0.0.1", port, execution_time=execution_time, identifier=identifier)
+        robot.connect_to_server()
+        robot.start()
+        robots.append(robot)
+    group = ActuatorGroup("cell", identifiers)
+    group.wait_for_connected()
+
+    scheduler = Scheduler(group, window=window)
+    for i in range(number):
+        if i and i % sync_every == 0:
+            scheduler.sync()
+        scheduler.add_movel(identifiers[i % len(identifiers)], [float(i % 1000), 200., 300., 0., 3.14, 0.], v=100.)
+    scheduler.run()
+
+    group.quit()
+    time.sleep(0.5)
+    for robot in robots:
+        robot.close()
+    return scheduler.progress()
+
+
+def main(number=400, sync_every=40, execution_time=0.01, window=10, port=30023):
+    cases = [("1 robot", ["UR0"]), ("2 robots", ["UR1", "UR2"])]
+    results = []
+    with Silence():
+        server = Server("127.0.0.1", port)
+        server.start()
+        for name, identifiers in cases:
+            results.append(run(server, port, identifiers, number, sync_every, execution_time, window))
+        server.close()
+
+    rows = []
+    for (name, identifiers), progress in zip(cases, results):
+        sent, executed, total, rate = progress["cell"]
+        per_robot = ", ".join("%s %i" % (identifier, progress[identifier][1]) for identifier in identifiers)
+        rows.append([name, per_robot, "%i/%i" % (executed, total), "%.1f" % rate])
+    print_table(["case", "executed per robot", "executed", "commands/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+'''
+IK branch selection for a whole path: the greedy selection of
+calculate_configurations_for_path (from each of the 8 solutions of the first
+frame the closest solution of the next frame, the best of the 8 paths) against
+select_path (dynamic programming over all solutions and their equivalent
+angles within the joint limits of the UR controller), which must have the
+travel of the exact lattice (every combination of the equivalent angles a
+node, brute force) on the first holes.
+
+The path is a drilling sequence of a UR5: 4 frames per hole (approach and
+drilling), the holes at random poses, so that the robot has to choose a
+branch for each hole.
+'''
+from __future__ import print_function
+import math
+
+import numpy as np
+
+from ur_online_control.ur.kinematics.ur_kin_ros import forward_ros, inverse_ros_batch
+from ur_online_control.ur.kinematics.path_calculation import select_path, UR_JOINT_LIMITS
+from ur_online_control.benchmarks.utilities import Timer, print_table
+
+UR5_PARAMS = [89.159, -425.0, -392.25, 109.15, 94.65, 82.3]
+
+
+def drilling_path(holes, seed=0):
+    rnd = np.random.RandomState(seed)
+    q = []
+    for hole in rnd.uniform(-math.pi, math.pi, (holes, 6)):
+        for i in range(4):
+            q.append(hole + np.array([0., 0.02, -0.04, 0.02, 0., 0.]) * i)
+    return np.array([forward_ros(list(c), UR5_PARAMS) for c in q])
+
+
+def greedy(solutions, valid):
+    """ The selection of calculate_configurations_for_path with format_joint_positions,
+    the best of the paths starting at each solution of the first frame. """
+    paths = [solutions[0][valid[0]]]
+    for t in range(1, len(solutions)):
+        previous = paths[-1]
+        candidates = solutions[t][valid[t]]
+        delta = candidates[None, :, :] - previous[:, None, :]
+        # the closest of a, a - 2 pi sign(a), a + 2 pi sign(a)
+        shifts = np.stack([np.zeros_like(delta), -2 * math.pi * np.sign(candidates)[None] + 0 * delta,
+                           2 * math.pi * np.sign(candidates)[None] + 0 * delta])
+        choice = np.argmin(np.abs(delta[None] + shifts), axis=0)
+        formatted = candidates[None, :, :] + np.take_along_axis(shifts, choice[None], axis=0)[0]
+        cost = np.abs(formatted - previous[:, None, :]).sum(axis=2)
+        selected = np.argmin(cost, axis=1)
+        paths.append(formatted[np.arange(len(previous)), selected])
+    paths = np.array(paths)  # (N,K,6)
+    travel = np.abs(np.diff(paths, axis=0)).sum(axis=(0, 2))
+    return paths[:, int(np.argmin(travel))]
+
+
+def lattice(solutions, valid, joint_limits=UR_JOINT_LIMITS):
+    """ The exact optimum of the travel: every combination of the equivalent
+    angles within the limits of every solution is a node (2^6 per solution). """
+    import itertools
+    offsets = [[2 * math.pi * n for n in range(int(math.floor((l - 2 * math.pi) / (2 * math.pi))) + 1,
+                                               int(math.floor(u / (2 * math.pi))) + 1)] for l, u in joint_limits]
+    shifts = np.array(list(itertools.product(*offsets)))
+    lower = np.array([l for l, u in joint_limits])
+    upper = np.array([u for l, u in joint_limits])
+
+    def nodes(t):
+        equivalent = (solutions[t][valid[t]] % (2 * math.pi))[:, None, :] + shifts[None]
+        equivalent = equivalent.reshape(-1, 6)
+        return equivalent[((equivalent >= lower) & (equivalent <= upper)).all(axis=1)]
+
+    values = nodes(0)
+    travel, node_values, back = np.zeros(len(values)), [values], [None]
+    for t in range(1, len(solutions)):
+        previous, values = values, nodes(t)
+        total = travel[:, None] + np.abs(values[None] - previous[:, None]).sum(axis=2)
+        selected = np.argmin(total, axis=0)
+        travel = total[selected, np.arange(len(values))]
+        node_values.append(values)
+        back.append(selected)
+    node, path = int(np.argmin(travel)), []
+    for t in range(len(solutions) - 1, -1, -1):
+        path.append(node_values[t][node])
+        if t:
+            node = back[t][node]
+    return np.array(path[::-1])
+
+
+def measures(path, joint_limits=UR_JOINT_LIMITS):
+    steps = np.abs(np.diff(path, axis=0))
+    lower = np.array([l for l, u in joint_limits])
+    upper = np.array([u for l, u in joint_limits])
+    outside = int(((path < lower) | (path > upper)).any(axis=1).sum())
+    return ["%.1f" % steps.sum(), "%.3f" % steps.max(), "%i" % outside]
+
+
+def main(holes=3000, exact_holes=30):
+    T = drilling_path(holes)
+    solutions, valid = inverse_ros_batch(T, UR5_PARAMS)
+    # the random holes are not all reachable
+    reachable = valid.any(axis=1)
+    solutions, valid = solutions[reachable], valid[reachable]
+    # the exact lattice has 2^6 nodes per solution, only the first holes
+    first = slice(0, exact_holes * 4)
+
+    rows, travels = [], {}
+    for name, function in [("greedy (calculate_configurations_for_path)", lambda: greedy(solutions, valid)),
+                           ("select_path travel", lambda: select_path(solutions, valid)),
+                           ("select_path velocity", lambda: select_path(solutions, valid, cost="velocity")),
+                           ("greedy, first %i holes" % exact_holes, lambda: greedy(solutions[first], valid[first])),
+                           ("select_path travel, first %i holes" % exact_holes,
+                            lambda: select_path(solutions[first], valid[first])),
+                           ("exact lattice travel, first %i holes" % exact_holes,
+                            lambda: lattice(solutions[first], valid[first]))]:
+        with Timer() as timer:
+            path = function()
+        rows.append([name] + measures(path) + ["%.2f" % timer.wall])
+        travels[name] = np.abs(np.diff(path, axis=0)).sum()
+    print("%i frames, %i solutions" % (len(solutions), valid.sum()))
+    print_table(["selection", "joint travel [rad]", "max joint step [rad]", "outside +-2 pi", "time [s]"], rows)
+    selected = travels["select_path travel, first %i holes" % exact_holes]
+    exact = travels["exact lattice travel, first %i holes" % exact_holes]
+    assert abs(selected - exact) < 1e-9, "select_path %.6f, lattice %.6f" % (selected, exact)
+
+
+if __name__ == "__main__":
+    main()
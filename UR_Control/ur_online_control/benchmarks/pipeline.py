@@ -0,0 +1,294 @@
+'''
+The fabrication pipeline from the beam files grasshopper/data/*.json to the
+commands sent by main_dowel_gripping_v1 and main_dowel_drilling_v1, stage by
+stage, with the classes of the repository (the geometry on the backend of
+geometry/backend.py, the NumPy one without Rhino):
+
+- load: the beams and their dowels (FabricatableBeam.read_from_json, scaled
+  to fit the UR5, Beam and Dowel, see benchmarks/constraints.py)
+- plan holes: the safe, top and bottom planes of the holes at the drilling
+  station (Hole.get_tool_planes_as_tree) and per beam the picking, placing and
+  safe placing planes
+- ik: the joints of the gripping path (inverse_ros_batch and select_path of
+  ur/kinematics, the conventions of the simulator)
+- format: the flattened command list Grasshopper sends and format_commands
+- stream gripping / drilling: the main script runs as a process (the server),
+  the benchmark is the Grasshopper client and the simulated UR (URClient).
+  The commands are counted when the simulator receives them.
+
+For every stage the wall time, the peak memory and the items per second. The
+memory of the local stages is traced in a second run (tracemalloc, Python 3
+only), that of the streams is the peak resident memory of the main script
+process (VmHWM, Linux only).
+'''
+from __future__ import print_function
+import math
+import os
+import subprocess
+import sys
+from threading import Event, Thread
+from collections import deque
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import numpy as np
+
+from geometry.backend import rg, ghpath, BACKEND
+from geometry.hole import Hole
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.formatting import format_commands
+from ur_online_control.communication.server import BaseClient
+from ur_online_control.communication.server.ur_simulator import URClient, UR5_PARAMS, HOME_JOINTS, \
+    pose_to_matrix, matrix_to_pose, multiply_matrices, invert_matrix
+from ur_online_control.ur.kinematics.ur_kin_ros import inverse_ros_batch
+from ur_online_control.ur.kinematics.path_calculation import select_path
+from ur_online_control.benchmarks.constraints import structure, DATA_DIR, DATA_SETS
+from ur_online_control.benchmarks.utilities import Silence, Timer, print_table
+
+COMMUNICATION_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "communication")
+
+# the setup in the robot base frame, in mm (the structure is scaled down to fit the UR5)
+SCALE = 0.2
+TOOL = [0., 0., 150., 0., 0., 0.]
+PICK_PLANE = rg.Plane(rg.Point3d(300., -400., 50.), rg.Vector3d(1., 0., 0.), rg.Vector3d(0., 1., 0.))
+DRILL_PLANE = rg.Plane(rg.Point3d(-400., -250., 250.), rg.Vector3d(1., 0., 0.), rg.Vector3d(0., 1., 0.))
+PLACE_PLANE = rg.Plane(rg.Point3d(0., 450., -100.), rg.Vector3d(1., 0., 0.), rg.Vector3d(0., 1., 0.))
+# the tool points down onto the planes
+FLIP = pose_to_matrix([0., 0., 0., math.pi, 0., 0.])
+
+# as main_dowel_gripping_v1
+SPEED = 1500.0
+SAFETY_Z_HEIGHT = 100.0
+RADIUS = 0.
+LEN_COMMAND = 8
+
+
+class URCounter(URClient):
+    """ The simulated UR, counts the commands it receives. """
+
+    def __init__(self, *args, **kwargs):
+        super(URCounter, self).__init__(*args, **kwargs)
+        self.received = 0
+
+    def add_to_buffer(self, cmd):
+        self.received += 1
+        super(URCounter, self).add_to_buffer(cmd)
+
+
+class MainScript(object):
+    """ A main script of communication/ as a process, with its arguments
+    server_address, server_port and ur_ip. The clients can connect when it
+    waits for them (the ip of the UR is registered after the server started),
+    a round of its fabrication loop is done when it prints "all done!"; the
+    loop never ends, the process is terminated by close. """
+
+    def __init__(self, name, port, timeout=30.):
+        self.name = name
+        path = os.path.join(COMMUNICATION_DIR, name + ".py")
+        self.timeout = timeout
+        self.output = deque(maxlen=20)
+        self.waiting, self.done, self.exited = Event(), Event(), Event()
+        self.process = subprocess.Popen([sys.executable, "-u", path, "127.0.0.1", str(port), "127.0.0.1"],
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        universal_newlines=True)
+        self.reader = Thread(target=self.read)
+        self.reader.daemon = True
+        self.reader.start()
+        self.wait(self.waiting, "waiting for the clients")
+
+    def read(self):
+        for line in iter(self.process.stdout.readline, ""):
+            self.output.append(line.rstrip())
+            if "Waiting until client" in line:
+                self.waiting.set()
+            elif "all done!" in line:
+                self.done.set()
+        self.exited.set()
+
+    def wait(self, event, what):
+        for i in range(int(self.timeout * 10)):
+            if event.wait(0.1):
+                return
+            if self.exited.is_set():
+                break
+        raise RuntimeError("%s is not %s:\n%s" % (self.name, what, "\n".join(self.output)))
+
+    def peak_memory(self):
+        """ The peak resident memory of the process in MB, None if unknown. """
+        try:
+            with open("/proc/%i/status" % self.process.pid) as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024.
+        except IOError:
+            pass
+        return None
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+        self.process.stdout.close()
+
+
+# the stages
+
+def load(path, scale=SCALE):
+    return structure(path, scale=scale)
+
+
+def plan_holes(beams):
+    """ Returns per beam the planes [picking, n * (safe, top, bottom), placing,
+    safe placing]. The beam is gripped at its base plane and placed with the
+    structure at PLACE_PLANE (its center, at its lowest point). """
+    safe_planes, top_planes, bottom_planes, beam_breps = Hole.get_tool_planes_as_tree(beams, DRILL_PLANE)
+    origins = [beam.base_plane.Origin for beam in beams]
+    center = rg.Point3d((min(o.X for o in origins) + max(o.X for o in origins)) * 0.5,
+                        (min(o.Y for o in origins) + max(o.Y for o in origins)) * 0.5, min(o.Z for o in origins))
+    to_place = rg.Transform.PlaneToPlane(rg.Plane(center, rg.Vector3d(1., 0., 0.), rg.Vector3d(0., 1., 0.)),
+                                         PLACE_PLANE)
+    planned = []
+    for i, beam in enumerate(beams):
+        planes = [rg.Plane(PICK_PLANE)]
+        if ghpath(i) in safe_planes.Paths:
+            for planes_of_hole in zip(*[tree.Branch(ghpath(i)) for tree in [safe_planes, top_planes, bottom_planes]]):
+                planes += planes_of_hole
+        placing_plane = rg.Plane(beam.base_plane)
+        placing_plane.Transform(to_place)
+        safe_placing_plane = rg.Plane(placing_plane)
+        safe_placing_plane.Translate(rg.Vector3d(0., 0., SAFETY_Z_HEIGHT))
+        planned.append(planes + [placing_plane, safe_placing_plane])
+    return planned
+
+
+def plane_to_matrix(plane):
+    o, x, y, z = plane.Origin, plane.XAxis, plane.YAxis, plane.ZAxis
+    return [[x.X, y.X, z.X, o.X], [x.Y, y.Y, z.Y, o.Y], [x.Z, y.Z, z.Z, o.Z], [0., 0., 0., 1.]]
+
+
+def tool_poses(planned):
+    """ The planes as poses [x, y, z, ax, ay, az] of the tool pointing down. """
+    return [[matrix_to_pose(multiply_matrices(plane_to_matrix(plane), FLIP)) for plane in planes]
+            for planes in planned]
+
+
+def solve_ik(poses, ur_params=UR5_PARAMS):
+    """ The joints of the gripping path from HOME_JOINTS, as URClient.inverse_kinematics
+    (the tcp TOOL), returns the (N,6) joints of the reachable poses, the
+    number of unreachable poses and the joint travel. """
+    tcp = invert_matrix(pose_to_matrix(TOOL))
+    T = []
+    for pose in [pose for beam_poses in poses for pose in beam_poses]:
+        F = multiply_matrices(pose_to_matrix(pose), tcp)
+        T.append([F[0][2], F[0][0], F[0][1], F[0][3],
+                  F[1][2], F[1][0], F[1][1], F[1][3],
+                  F[2][2], F[2][0], F[2][1], F[2][3],
+                  0., 0., 0., 1.])
+    solutions, valid = inverse_ros_batch(T, ur_params)
+    solutions[:, :, 0] -= math.pi
+    solutions[:, :, 5] -= math.pi
+    reachable = valid.any(axis=1)
+    path = select_path(solutions[reachable], valid[reachable], HOME_JOINTS)
+    travel = np.abs(np.diff(np.vstack([[HOME_JOINTS], path]), axis=0)).sum()
+    return path, int((~reachable).sum()), travel
+
+
+def format_gripping(poses):
+    """ Grasshopper sends all commands flattened and the number of holes per
+    beam, the main script formats them again with format_commands. """
+    commands_flattened = []
+    for beam_poses in poses:
+        for pose in beam_poses:
+            commands_flattened += pose + [SPEED, RADIUS]
+    commands = format_commands(commands_flattened, LEN_COMMAND)
+    number_of_holes_list = [float((len(beam_poses) - 3) // 3) for beam_poses in poses]
+    return commands_flattened, commands, number_of_holes_list
+
+
+def format_drilling(poses):
+    """ The safe, top and bottom poses of all holes, flattened. """
+    commands_flattened = []
+    for beam_poses in poses:
+        for pose in beam_poses[1:-2]:
+            commands_flattened += pose + [SPEED, RADIUS]
+    return commands_flattened
+
+
+def stream(name, port, messages, time_scale):
+    """ Sends messages to the main script name in a round of its fabrication
+    loop, returns the number of commands the simulator received, the Timer,
+    the peak memory of the main script and the simulated time. """
+    with Silence():
+        script = MainScript(name, port)
+        robot = URCounter("127.0.0.1", port, time_scale=time_scale, publish_rate=10, verbose=False)
+        gh = BaseClient("GH", "127.0.0.1", port)
+        try:
+            robot.connect_to_server()
+            robot.start()
+            gh.connect_to_server()
+            gh.start()
+            with Timer() as timer:
+                for msg_id, msg in messages:
+                    gh.send(msg_id, msg)
+                script.wait(script.done, "done")
+            peak = script.peak_memory()
+        finally:
+            gh.close()
+            robot.close()
+            script.close()
+    return robot.received, timer, peak, robot.simulated_time
+
+
+def measure(function, *args):
+    """ Returns the result, the Timer and the traced memory peak in MB (None
+    without tracemalloc) of function(*args), the memory in a second run. """
+    with Timer() as timer:
+        result = function(*args)
+    peak = None
+    if tracemalloc:
+        tracemalloc.start()
+        function(*args)
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result, timer, peak
+
+
+def main(data_sets=DATA_SETS, time_scale=1000., port=30036):
+    rows = []
+    simulated = []
+
+    def row(name, stage, items, timer, peak):
+        rows.append([name, stage, items, "%.1f" % (timer.wall * 1000), "-" if peak is None else "%.2f" % peak,
+                     "%.0f" % (float(items.split()[0]) / timer.wall) if timer.wall > 0 else "-"])
+
+    for i, name in enumerate(data_sets):
+        beams, timer, peak = measure(load, os.path.join(DATA_DIR, name))
+        row(name, "load", "%i beams" % len(beams), timer, peak)
+        with Silence():
+            planned, timer, peak = measure(plan_holes, beams)
+        row(name, "plan holes", "%i planes" % sum(len(planes) for planes in planned), timer, peak)
+        poses = tool_poses(planned)
+        (path, unreachable, travel), timer, peak = measure(solve_ik, poses)
+        row(name, "ik", "%i poses (%i unreachable, %.1f rad)" % (sum(len(p) for p in poses), unreachable, travel),
+            timer, peak)
+        (gripping, commands, number_of_holes_list), timer, peak = measure(format_gripping, poses)
+        row(name, "format", "%i commands" % len(commands), timer, peak)
+        drilling = format_drilling(poses)
+
+        received, timer, peak, gripping_time = stream("main_dowel_gripping_v1", port + 2 * i, [
+            (MSG_INT, 1), (MSG_FLOAT_LIST, TOOL), (MSG_INT, LEN_COMMAND), (MSG_FLOAT_LIST, gripping),
+            (MSG_FLOAT_LIST, number_of_holes_list)], time_scale)
+        row(name, "stream gripping", "%i commands" % received, timer, peak)
+        received, timer, peak, drilling_time = stream("main_dowel_drilling_v1", port + 2 * i + 1, [
+            (MSG_INT, 1), (MSG_FLOAT_LIST, TOOL), (MSG_INT, LEN_COMMAND), (MSG_FLOAT_LIST, drilling)], time_scale)
+        row(name, "stream drilling", "%i commands" % received, timer, peak)
+        simulated.append("%s %.0f / %.0f s" % (name, gripping_time, drilling_time))
+    print("backend: %s" % BACKEND)
+    print_table(["data set", "stage", "items", "time [ms]", "peak memory [MB]", "items/s"], rows)
+    print("simulated fabrication time gripping / drilling (x%.0f): %s" % (time_scale, ", ".join(simulated)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+'''
+Put/get throughput of the queue backends for float lists as they come from
+Grasshopper: a producer thread (the client socket) puts the lists, the main
+thread (the ClientWrapper) gets them.
+'''
+from __future__ import print_function
+import time
+from threading import Thread
+
+from ur_online_control.communication.queues import QUEUE_BACKENDS, create_queue
+from ur_online_control.benchmarks.utilities import print_table
+
+
+def producer(queue, item, number):
+    for i in range(number):
+        queue.put(item)
+
+
+def rate(backend, size, number):
+    queue = create_queue(backend)
+    float_list = [float(i) for i in range(size)]
+    thread = Thread(target=producer, args=(queue, float_list, number))
+    start = time.time()
+    thread.start()
+    for i in range(number):
+        msg = queue.get(block=True)
+    elapsed = time.time() - start
+    thread.join()
+    assert msg == float_list
+    return number / elapsed
+
+
+def main(sizes=[100, 1000, 10000, 50000], total_floats=2000000):
+    rows = []
+    for size in sizes:
+        number = max(10, total_floats // size)
+        rates = dict((backend, rate(backend, size, number)) for backend in ["process", "thread"])
+        rows.append(["%i" % size, "%i" % number, "%.0f" % rates["process"], "%.0f" % rates["thread"],
+                     "%.1fx" % (rates["thread"] / rates["process"])])
+    print_table(["floats", "lists", "process [lists/s]", "thread [lists/s]", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+'''
+A reachability map of a UR10 with a 150 mm tool, mounted at a base frame:
+build time and file size, and queries of random tcp frames against IK frame
+by frame (inverse_ros), how often the map gives the same answer.
+'''
+from __future__ import print_function
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from ur_online_control.ur.kinematics.ur_kin_ros import inverse_ros
+from ur_online_control.ur.kinematics.reachability import ReachabilityMap, invert_matrices
+from ur_online_control.benchmarks.utilities import Timer, print_table
+
+UR10_PARAMS = [127.3, -612.0, -572.3, 163.941, 115.7, 92.2]
+
+
+def translation(x, y, z):
+    T = np.eye(4)
+    T[:3, 3] = [x, y, z]
+    return T
+
+
+def random_frames(number, base, reach, seed=0):
+    """ Random tcp frames in WCS around the robot. """
+    rnd = np.random.RandomState(seed)
+    frames = np.zeros((number, 4, 4))
+    for n in range(number):
+        # a random rotation from a quaternion
+        a, b, c, d = rnd.normal(size=4)
+        a, b, c, d = np.array([a, b, c, d]) / math.sqrt(a * a + b * b + c * c + d * d)
+        frames[n, :3, :3] = [[a*a + b*b - c*c - d*d, 2*(b*c - a*d), 2*(b*d + a*c)],
+                             [2*(b*c + a*d), a*a - b*b + c*c - d*d, 2*(c*d - a*b)],
+                             [2*(b*d - a*c), 2*(c*d + a*b), a*a - b*b - c*c + d*d]]
+        frames[n, :3, 3] = rnd.uniform(-reach, reach, 3)
+        frames[n, 3, 3] = 1.
+    return np.matmul(base, frames)
+
+
+def reachable_by_ik(frames, base, tool):
+    tool0 = np.matmul(np.matmul(invert_matrices(base), frames), invert_matrices(tool))
+    result = []
+    for M in tool0:
+        T = list(M[:, [2, 0, 1, 3]].ravel())
+        try:
+            result.append(len(inverse_ros(T, UR10_PARAMS)) > 0)
+        except (ZeroDivisionError, ValueError):
+            result.append(False)
+    return np.array(result)
+
+
+def main(number=10000):
+    tool = translation(0., 0., 150.)
+    base = translation(1500., 800., 0.)
+    path = os.path.join(tempfile.gettempdir(), "reachability_ur10.npz")
+
+    frames = random_frames(number, base, 1400.)
+    with Timer() as ik:
+        exact = reachable_by_ik(frames, base, tool)
+
+    rows = []
+    for resolution, directions, rotations in [(150., 16, 4), (100., 16, 4), (100., 32, 8)]:
+        with Timer() as build:
+            rmap = ReachabilityMap.build(UR10_PARAMS, tool=tool, resolution=resolution, directions=directions,
+                                         rotations=rotations)
+        rmap.save(path)
+        rmap = ReachabilityMap.load(path, base=base)
+        with Timer() as query:
+            reachable = rmap.reachable(frames)
+        rows.append(["%.0f mm, %i orientations" % (resolution, len(rmap.orientations)), "%i" % rmap.branches.size,
+                     "%.1f" % build.wall, "%.2f" % (os.path.getsize(path) / 1e6), "%.1f" % (query.wall * 1000),
+                     "%.1f" % (100. * (reachable == exact).mean())])
+        os.remove(path)
+    print("%i random frames, %.1f%% reachable, IK frame by frame: %.0f ms" % (number, 100. * exact.mean(), ik.wall * 1000))
+    print_table(["map", "samples", "build [s]", "file [MB]", "query [ms]", "same as IK [%]"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+'''
+Capture and replay: a fabrication loop (movel commands in blocks, each
+followed by wait_for_ready) runs once against the URClient simulator with
+capturing, then the captured robot is replayed against the same loop with the
+original timing, 10 times faster and as fast as possible. For every replay the
+commands the Server sent are compared with the capture. Exits with 1 if they
+differ, so it can run as regression test without a robot.
+'''
+from __future__ import print_function
+import os
+import sys
+import tempfile
+import time
+
+from ur_online_control.communication.server import Server, ReplayClient
+from ur_online_control.communication.server.ur_simulator import URClient
+from ur_online_control.communication.client_wrapper import ClientWrapper
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.benchmarks.utilities import Silence, print_table
+
+
+def fabrication(identifier, blocks, commands):
+    """ The server side of the fabrication, returns its duration. """
+    ur = ClientWrapper(identifier)
+    ur.wait_for_connected()
+    start = time.time()
+    for i in range(blocks):
+        for j in range(commands):
+            ur.send_command_movel([float(i), float(j), 300., 0., 3.14, 0.], v=100.)
+        ur.wait_for_ready()
+    elapsed = time.time() - start
+    ur.quit()
+    return elapsed
+
+
+def main(blocks=20, commands=10, execution_time=0.005, port=30033):
+    path = os.path.join(tempfile.gettempdir(), "benchmark_capture_%s.bin")
+    rows = []
+    failed = False
+    with Silence():
+        server = Server("127.0.0.1", port, capture_path=path)
+        server.add_client("UR", "127.0.0.1")
+        server.start()
+        robot = URClient("127.0.0.1", port, execution_time=execution_time, identifier="UR")
+        robot.connect_to_server()
+        robot.start()
+        elapsed = fabrication("UR", blocks, commands)
+        time.sleep(0.5)
+        robot.close()
+        server.capture_path = None
+        rows.append(["capture (simulator)", "-", "%i" % (blocks * commands), "%.2f" % elapsed, "-"])
+
+        for i, speed in enumerate([1., 10., None]):
+            identifier = "UR_replay%i" % i
+            replay = ReplayClient(path % "UR", "127.0.0.1", port, speed=speed, identifier=identifier)
+            replay.connect_to_server()
+            replay.start()
+            elapsed = fabrication(identifier, blocks, commands)
+            replay.join()
+            ok = replay.received.get(MSG_COMMAND) == replay.expected.get(MSG_COMMAND) and not replay.desyncs
+            failed = failed or not ok
+            rows.append(["replay x%s" % (speed or "max"), "%i" % replay.sent, "%i/%i" % (replay.received.get(MSG_COMMAND, 0), replay.expected.get(MSG_COMMAND, 0)),
+                         "%.2f" % elapsed, "%i" % replay.desyncs])
+        server.close()
+    os.remove(path % "UR")
+
+    print_table(["run", "frames sent", "commands (replay/capture)", "time [s]", "desyncs"], rows)
+    if failed:
+        print("The replay differs from the capture.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
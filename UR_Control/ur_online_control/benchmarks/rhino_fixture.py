@@ -0,0 +1,296 @@
+'''
+Recorded Rhino outputs for the conventions which geometry/numpy_backend.py
+reimplements, for every hole of the beam files grasshopper/data/*.json (the
+hole plane H, the beam plane B, the dowel line L through H along its normal,
+as Dowel.get_line, and the top and bottom face planes of the beam):
+
+- plane_normal: the axes of Plane(H.Origin, H.ZAxis) (ON_3dVector::PerpendicularTo)
+- flip: the axes of H after Plane.Flip
+- plane_to_plane: the 3x4 matrix of Transform.PlaneToPlane(H, DRILL_PLANE)
+- line_plane: the parameters of Intersection.LinePlane of L with the top and
+  the bottom face plane
+- rectangle_contains: Rectangle3d(face plane, dx, dy).Contains of these points
+
+The fixture is recorded with RhinoCommon inside Rhino (all sections, run
+record(path) from the Python editor) or with rhino3dm, the OpenNURBS of
+Rhino for CPython (all but rectangle_contains, which it does not have):
+
+    python -m ur_online_control.benchmarks.rhino_fixture record3dm [fixture.json]
+
+and the backend of geometry/backend.py is asserted against it:
+
+    python -m ur_online_control.benchmarks.rhino_fixture [fixture.json]
+
+Rectangle3d.Contains is also asserted against exact_contains, the rule of
+RhinoCommon in exact rational arithmetic on the same float inputs: on the
+points of the data sets, and on boundary_cases, rectangles on axis aligned
+planes with points exactly on the edges and the corners (Coincident).
+'''
+from __future__ import print_function
+import itertools
+import json
+import math
+import os
+import sys
+from fractions import Fraction
+
+from ur_online_control.benchmarks.utilities import print_table
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "grasshopper", "data")
+DATA_SETS = ["1.json", "2.json", "3.json", "4.json", "5.json"]
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "rhino_geometry.json")
+SECTIONS = ["plane_normal", "flip", "plane_to_plane", "line_plane", "rectangle_contains"]
+
+DRILL_PLANE = ([-400., -250., 250.], [1., 1., 0.], [0., 0.5, 1.])
+DOWEL_LENGTH = 999.
+TOLERANCE = 1e-9
+DIGITS = 12
+
+
+def _xyz(v):
+    return [v.X, v.Y, v.Z]
+
+
+def _axes(plane):
+    return _xyz(plane.XAxis) + _xyz(plane.YAxis) + _xyz(plane.ZAxis)
+
+
+class RhinoCommon(object):
+    """ rg of geometry/backend.py: RhinoCommon inside Rhino, else the NumPy backend. """
+
+    def __init__(self):
+        from geometry.backend import rg, BACKEND
+        self.rg = rg
+        self.name = BACKEND
+        self.containment = dict((getattr(rg.PointContainment, name), name)
+                                for name in ["Unset", "Inside", "Outside", "Coincident"])
+
+    def plane(self, origin, xaxis, yaxis):
+        return self.rg.Plane(self.rg.Point3d(*origin), self.rg.Vector3d(*xaxis), self.rg.Vector3d(*yaxis))
+
+    def plane_normal(self, origin, normal):
+        return self.rg.Plane(self.rg.Point3d(*origin), self.rg.Vector3d(*normal))
+
+    def flip(self, plane):
+        plane = self.rg.Plane(plane)
+        plane.Flip()
+        return plane
+
+    def plane_to_plane(self, a, b):
+        T = self.rg.Transform.PlaneToPlane(a, b)
+        return [T[i, j] for i in range(3) for j in range(4)]
+
+    def line_plane(self, start, end, plane):
+        line = self.rg.Line(self.rg.Point3d(*start), self.rg.Point3d(*end))
+        succeeded, t = self.rg.Intersect.Intersection.LinePlane(line, plane)
+        return t if succeeded else float("nan")
+
+    def rectangle_contains(self, plane, x, y, point):
+        rectangle = self.rg.Rectangle3d(plane, self.rg.Interval(*x), self.rg.Interval(*y))
+        return self.containment[rectangle.Contains(self.rg.Point3d(*point))]
+
+
+class Rhino3dm(object):
+    """ rhino3dm (OpenNURBS), without Rectangle3d. Plane.Flip of RhinoCommon
+    swaps the x and y axes and negates the z axis, which is the plane of
+    ON_Plane(origin, y, x). """
+
+    rectangle_contains = None
+
+    def __init__(self):
+        import rhino3dm
+        self.r3 = rhino3dm
+        self.name = "rhino3dm %s" % rhino3dm.__version__
+
+    def plane(self, origin, xaxis, yaxis):
+        return self.r3.Plane(self.r3.Point3d(*origin), self.r3.Vector3d(*xaxis), self.r3.Vector3d(*yaxis))
+
+    def plane_normal(self, origin, normal):
+        return self.r3.Plane(self.r3.Point3d(*origin), self.r3.Vector3d(*normal))
+
+    def flip(self, plane):
+        return self.r3.Plane(plane.Origin, plane.YAxis, plane.XAxis)
+
+    def plane_to_plane(self, a, b):
+        T = self.r3.Transform.PlaneToPlane(a, b)
+        return [getattr(T, "M%i%i" % (i, j)) for i in range(3) for j in range(4)]
+
+    def line_plane(self, start, end, plane):
+        line = self.r3.Line(self.r3.Point3d(*start), self.r3.Point3d(*end))
+        succeeded, t = self.r3.Intersection.LinePlane(line, plane)
+        return t if succeeded else float("nan")
+
+
+def _plane_of(d):
+    return [d["x"], d["y"], d["z"]], [d["xx"], d["xy"], d["xz"]], [d["yx"], d["yy"], d["yz"]]
+
+
+def evaluate(api, path):
+    """ The sections (lists per hole) of the beams of a data set with api. """
+    with open(path) as f:
+        data = json.load(f)
+    drill_plane = api.plane(*DRILL_PLANE)
+    results = dict((section, []) for section in SECTIONS + ["rectangle_contains_exact"])
+    for d in data:
+        beam_plane = api.plane(*_plane_of(d["plane"]))
+        origin, z = _xyz(beam_plane.Origin), _xyz(beam_plane.ZAxis)
+        faces = [api.plane([o + s * float(d["dz"]) * 0.5 * n for o, n in zip(origin, z)],
+                           _xyz(beam_plane.XAxis), _xyz(beam_plane.YAxis)) for s in (1, -1)]
+        x, y = (-float(d["dx"]) * 0.5, float(d["dx"]) * 0.5), (-float(d["dy"]) * 0.5, float(d["dy"]) * 0.5)
+        for hole in d["holes"]:
+            plane = api.plane(*_plane_of(hole))
+            origin, normal = _xyz(plane.Origin), _xyz(plane.ZAxis)
+            results["plane_normal"].append(_axes(api.plane_normal(origin, normal)))
+            results["flip"].append(_axes(api.flip(plane)))
+            results["plane_to_plane"].append(api.plane_to_plane(plane, drill_plane))
+            start = [o + DOWEL_LENGTH * n for o, n in zip(origin, normal)]
+            end = [o - DOWEL_LENGTH * n for o, n in zip(origin, normal)]
+            ts = [api.line_plane(start, end, face) for face in faces]
+            results["line_plane"].append(ts)
+            if api.rectangle_contains is not None:
+                points = [[a + t * (b - a) for a, b in zip(start, end)] for t in ts]
+                results["rectangle_contains"].append([api.rectangle_contains(face, x, y, point)
+                                                      for face, point in zip(faces, points)])
+                results["rectangle_contains_exact"].append([
+                    exact_contains((_xyz(face.Origin), _xyz(face.XAxis), _xyz(face.YAxis)), x, y, point)
+                    for face, point in zip(faces, points)])
+    if api.rectangle_contains is None:
+        del results["rectangle_contains"], results["rectangle_contains_exact"]
+    return results
+
+
+def exact_contains(plane, x, y, point):
+    """ Rectangle3d(plane, x, y).Contains(point) in exact rational arithmetic
+    on the floats, without Rhino: the parameters of the point on the plane
+    (origin, xaxis, yaxis) are (point - origin) * axis (ON_Plane), outside
+    the intervals it is Outside, on one of their ends Coincident. """
+    origin, xaxis, yaxis = plane
+    v = [Fraction(p) - Fraction(o) for p, o in zip(point, origin)]
+    s = sum(a * Fraction(b) for a, b in zip(v, xaxis))
+    t = sum(a * Fraction(b) for a, b in zip(v, yaxis))
+    (x0, x1), (y0, y1) = sorted(Fraction(a) for a in x), sorted(Fraction(a) for a in y)
+    if s < x0 or s > x1 or t < y0 or t > y1:
+        return "Outside"
+    if s in (x0, x1) or t in (y0, y1):
+        return "Coincident"
+    return "Inside"
+
+
+def boundary_cases():
+    """ (plane, x, y, point) of rectangles on the planes of the signed world
+    axes at an origin, with points at the ends, the middle and just beyond
+    the intervals, on and off the plane: all coordinates are binary
+    fractions, so that a point on an edge or a corner is exactly on it in
+    floats too. """
+    origin = [12.5, -3.25, 0.75]
+    units = [[1., 0., 0.], [0., 1., 0.], [0., 0., 1.]]
+    cases = []
+    for i, j in itertools.permutations(range(3), 2):
+        for si, sj in itertools.product((1., -1.), repeat=2):
+            xaxis, yaxis = [si * c for c in units[i]], [sj * c for c in units[j]]
+            normal = [xaxis[1] * yaxis[2] - xaxis[2] * yaxis[1], xaxis[2] * yaxis[0] - xaxis[0] * yaxis[2],
+                      xaxis[0] * yaxis[1] - xaxis[1] * yaxis[0]]
+            for x, y in [((-2.5, 3.75), (-1.25, 0.5)), ((3.75, -2.5), (0.5, -1.25))]:
+                ss = [min(x) - 0.125, min(x), 0.625, max(x), max(x) + 0.125]
+                ts = [min(y) - 0.125, min(y), -0.375, max(y), max(y) + 0.125]
+                for s, t, h in itertools.product(ss, ts, (0., 0.375)):
+                    point = [o + s * a + t * b + h * n for o, a, b, n in zip(origin, xaxis, yaxis, normal)]
+                    cases.append(((origin, xaxis, yaxis), x, y, point))
+    return cases
+
+
+def check_boundary_cases(api):
+    """ The number of the boundary_cases per containment of exact_contains,
+    and the number of those where api differs. """
+    counts, differences = {}, 0
+    for plane, x, y, point in boundary_cases():
+        expected = exact_contains(plane, x, y, point)
+        counts[expected] = counts.get(expected, 0) + 1
+        if api.rectangle_contains(api.plane(*plane), x, y, point) != expected:
+            differences += 1
+    return counts, differences
+
+
+def _rounded(value):
+    if isinstance(value, list):
+        return [_rounded(v) for v in value]
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value, DIGITS)
+    return value
+
+
+def record(path=FIXTURE, api=None):
+    """ Records the fixture with api (RhinoCommon by default). """
+    api = api or RhinoCommon()
+    fixture = {"source": api.name}
+    for name in DATA_SETS:
+        results = evaluate(api, os.path.join(DATA_DIR, name))
+        results.pop("rectangle_contains_exact", None)
+        fixture[name] = _rounded(results)
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, "w") as f:
+        json.dump(fixture, f, sort_keys=True, separators=(",", ":"))
+    print("recorded %s to %s" % (api.name, path))
+
+
+def _difference(values, reference):
+    """ The largest difference of the floats, inf if a string differs. """
+    if isinstance(reference, list):
+        return max([_difference(v, r) for v, r in zip(values, reference)] + [0.])
+    if reference is None:
+        return 0. if math.isnan(values) else float("inf")
+    if isinstance(reference, float) or isinstance(reference, int):
+        return abs(values - reference)
+    return 0. if values == reference else float("inf")
+
+
+def compare(path=FIXTURE, api=None):
+    """ Asserts the outputs of api (the backend by default) against the
+    fixture, returns the table rows (data set, section, count, difference). """
+    api = api or RhinoCommon()
+    with open(path) as f:
+        fixture = json.load(f)
+    rows, failed = [], []
+    for name in DATA_SETS:
+        results = evaluate(api, os.path.join(DATA_DIR, name))
+        for section in SECTIONS:
+            if section not in fixture[name]:
+                rows.append([name, section, "-", "not recorded (%s)" % fixture["source"]])
+                continue
+            reference = fixture[name][section]
+            difference = _difference(results[section], reference) if len(results[section]) == len(reference) \
+                else float("inf")
+            rows.append([name, section, "%i" % len(reference), "%.1e" % difference])
+            if not difference <= TOLERANCE:
+                failed.append("%s %s: %.1e" % (name, section, difference))
+        if api.rectangle_contains is not None:
+            differences = sum(a != b for values, reference in zip(results["rectangle_contains"],
+                                                                  results["rectangle_contains_exact"])
+                              for a, b in zip(values, reference))
+            rows.append([name, "rectangle_contains (exact_contains)", "%i" % len(results["rectangle_contains"]),
+                         "%i differ" % differences])
+            if differences:
+                failed.append("%s rectangle_contains: %i differ from exact_contains" % (name, differences))
+    if api.rectangle_contains is not None:
+        counts, differences = check_boundary_cases(api)
+        rows.append(["boundary_cases", "rectangle_contains (exact_contains)",
+                     ", ".join("%i %s" % (counts[c], c) for c in sorted(counts)), "%i differ" % differences])
+        if differences:
+            failed.append("boundary_cases rectangle_contains: %i differ from exact_contains" % differences)
+    print("%s against the fixture of %s (%s)" % (api.name, fixture["source"], path))
+    print_table(["data set", "section", "holes", "max difference"], rows)
+    assert not failed, "differences to the fixture above %.0e: %s" % (TOLERANCE, ", ".join(failed))
+    return rows
+
+
+def main(argv):
+    if len(argv) > 1 and argv[1] in ("record", "record3dm"):
+        record(argv[2] if len(argv) > 2 else FIXTURE, Rhino3dm() if argv[1] == "record3dm" else None)
+    else:
+        compare(argv[1] if len(argv) > 1 else FIXTURE)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,62 @@
+'''
+Compares the Reactor (one event loop for all client sockets) with the old
+thread-per-socket model of the Server:
+- cpu usage while the clients are connected but idle
+- round-trip latency GH -> server -> script -> server -> GH
+'''
+from __future__ import print_function
+import time
+
+from ur_online_control.communication.server import Server
+from ur_online_control.communication.client_wrapper import ClientWrapper
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.benchmarks.utilities import Timer, Silence, RawClient, percentile, print_table
+
+
+def run(reactor, port, idle_clients=4, idle_time=2.0, round_trips=500):
+    name = "REACTOR" if reactor else "THREADED"
+
+    with Silence():
+        server = Server("127.0.0.1", port, reactor=reactor)
+        server.start()
+
+        clients = [RawClient("IDLE%i_%s" % (i, name), "127.0.0.1", port) for i in range(idle_clients)]
+        echo_client = RawClient("ECHO_%s" % name, "127.0.0.1", port)
+        echo = ClientWrapper("ECHO_%s" % name)
+        echo.wait_for_connected()
+        time.sleep(0.2)
+
+        # 1. cpu usage of idle sockets
+        with Timer() as t:
+            time.sleep(idle_time)
+        cpu_usage = t.cpu / t.wall
+
+        # 2. round-trip latency
+        latencies = []
+        for i in range(round_trips):
+            start = time.time()
+            echo_client.send_int(i)
+            echo.wait_for_int()
+            echo.send_float_list([float(i)])
+            echo_client.recv_frame()
+            latencies.append(time.time() - start)
+
+        for client in clients + [echo_client]:
+            client.close()
+        time.sleep(0.2)
+        server.close()
+
+    ms = 1000.
+    return [name, "%.1f %%" % (cpu_usage * 100),
+            "%.3f" % (sum(latencies) / len(latencies) * ms),
+            "%.3f" % (percentile(latencies, 50) * ms),
+            "%.3f" % (percentile(latencies, 99) * ms)]
+
+
+def main():
+    rows = [run(False, 30013), run(True, 30014)]
+    print_table(["model", "cpu idle", "rtt mean [ms]", "rtt p50 [ms]", "rtt p99 [ms]"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+'''
+A pick and place fabrication script (movel, gripper digital out, wait)
+executed end-to-end by URClient simulators with simulated motion times,
+several robots in one process, faster than real time. The simulated time is
+the duration the script would take on the robots.
+'''
+from __future__ import print_function
+import time
+
+from ur_online_control.communication.server import Server
+from ur_online_control.communication.server.ur_simulator import URClient
+from ur_online_control.communication.client_wrapper import ClientWrapper
+from ur_online_control.benchmarks.utilities import Silence, Timer, print_table
+
+
+def pick_and_place(ur, elements, v=250.):
+    """ 10 commands per element, returns the number of commands. """
+    for i in range(elements):
+        pick = [-200. - 50 * i, 400., 200., 0., 3.14, 0.]
+        place = [200., 400. + 50 * i, 200., 0., 3.14, 0.]
+        for plane, gripper in [(pick, True), (place, False)]:
+            above = plane[:2] + [plane[2] + 100.] + plane[3:]
+            ur.send_command_movel(above, v=v)
+            ur.send_command_movel(plane, v=v / 2)
+            ur.send_command_digital_out(0, gripper)
+            ur.send_command_wait(0.2)
+            ur.send_command_movel(above, v=v / 2)
+    return elements * 10
+
+
+def run(server, port, number, time_scale, elements):
+    identifiers = ["UR_%i_%i" % (number, time_scale) + "_%i" % i for i in range(number)]
+    robots, wrappers = [], []
+    for identifier in identifiers:
+        # one after the other, the backlog of the Server is small
+        server.add_client(identifier, "127.0.0.1", "UR")
+        robot = URClient("127.0.0.1", port, identifier=identifier, time_scale=time_scale, publish_rate=10, verbose=False)
+        robot.connect_to_server()
+        robot.start()
+        robots.append(robot)
+        ur = ClientWrapper(identifier)
+        ur.wait_for_connected()
+        wrappers.append(ur)
+
+    commands = 0
+    with Timer() as timer:
+        for ur in wrappers:
+            commands += pick_and_place(ur, elements)
+        for ur in wrappers:
+            ur.wait_for_ready()
+    for ur in wrappers:
+        ur.quit()
+    time.sleep(0.5)
+    for robot in robots:
+        robot.close()
+    simulated = max(robot.simulated_time for robot in robots)
+    return simulated, timer, commands
+
+
+def main(elements=5, port=30035):
+    rows = []
+    with Silence():
+        server = Server("127.0.0.1", port)
+        server.start()
+        for number in [1, 4, 16]:
+            for time_scale in [10, 100]:
+                simulated, timer, commands = run(server, port, number, time_scale, elements)
+                rows.append(["%i" % number, "%i" % time_scale, "%.1f" % simulated, "%.2f" % timer.wall,
+                             "%.1f" % (simulated / timer.wall), "%.0f" % (commands / timer.wall), "%.2f" % timer.cpu])
+        server.close()
+    print_table(["robots", "time scale", "simulated [s]", "wall [s]", "x real time", "commands/s", "cpu [s]"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+'''
+Duplicate dowels and dowel - beam incidences of geometry/spatial_index.py
+(DowelIndex, BeamIndex) against comparing all pairs, for structures of
+grasshopper/data/*.json: a dowel for every hole, so the dowels of the holes
+of the beams of a joint are duplicates. The incidences are those of the
+merged dowels (merge_duplicate_dowels): a dowel given by a plane extends
+over the beams it is linked to (BeamIndex.segment), and must pass through
+all of them. Larger structures are copies of the five data sets side by side.
+'''
+from __future__ import print_function
+import os
+
+from geometry.backend import rg, BACKEND
+from geometry.beam import Beam
+from geometry.dowel import Dowel
+from geometry.fabricatable_beam import FabricatableBeam
+from geometry.spatial_index import BeamIndex, DowelIndex, merge_duplicate_dowels
+from ur_online_control.benchmarks.utilities import Timer, print_table
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "grasshopper", "data")
+DATA_SETS = ["1.json", "2.json", "3.json", "4.json", "5.json"]
+
+
+def structure(data_sets, copies=1, spacing=20000.):
+    """ The beams and a dowel per hole (linked to the beam of the hole). """
+    beams, dowels, k = [], [], 0
+    for c in range(copies):
+        for name in data_sets:
+            translation = rg.Transform.Translation(rg.Vector3d(spacing * k, 0, 0))
+            k += 1
+            for fabricatable_beam in FabricatableBeam.read_from_json(os.path.join(DATA_DIR, name)):
+                fabricatable_beam = fabricatable_beam.transform(translation)
+                beam = Beam(fabricatable_beam.base_plane, fabricatable_beam.dx, fabricatable_beam.dy,
+                            fabricatable_beam.dz, end_cover=0)
+                for hole in fabricatable_beam.holes:
+                    dowel = Dowel(base_plane=hole)
+                    beam.add_dowel(dowel)
+                    dowels.append(dowel)
+                beams.append(beam)
+    return beams, dowels
+
+
+def all_duplicate_pairs(index):
+    n = len(index.dowels)
+    return [(i, j) for i in range(n) for j in range(i + 1, n) if index.is_duplicate(i, j)]
+
+
+def all_incidences(index, dowels):
+    pairs = []
+    for j, dowel in enumerate(dowels):
+        start, end = index.segment(dowel)
+        pairs.extend((i, j) for i in range(len(index.beams)) if index.clip(i, start, end))
+    return sorted(pairs)
+
+
+def main(max_all_pairs=1500):
+    rows = []
+    for data_sets, copies in [(DATA_SETS[:1], 1), (DATA_SETS, 1), (DATA_SETS, 5)]:
+        beams, dowels = structure(data_sets, copies)
+        with Timer() as dowel_index_timer:
+            dowel_index = DowelIndex(dowels)
+            pairs = dowel_index.pairs()
+        groups = dowel_index.duplicates()
+        holes = len(dowels)
+        dowels = merge_duplicate_dowels(beams, dowels)
+        with Timer() as beam_index_timer:
+            beam_index = BeamIndex(beams)
+            incidences = beam_index.incidences(dowels)
+        # every merged dowel passes through the beams of its holes
+        beam_numbers = dict((id(beam), i) for i, beam in enumerate(beams))
+        found = set(incidences)
+        linked = [(beam_numbers[id(beam)], j) for j, dowel in enumerate(dowels) for beam in dowel.beam_list]
+        own = sum(pair in found for pair in linked)
+        assert own == len(linked), "%i of %i linked beams passed" % (own, len(linked))
+
+        if holes <= max_all_pairs:
+            with Timer() as pairs_timer:
+                same_pairs = all_duplicate_pairs(dowel_index) == pairs
+            with Timer() as incidences_timer:
+                same_incidences = all_incidences(beam_index, dowels) == incidences
+            compared = ["%.0f" % (pairs_timer.wall * 1000), "%.0f" % (incidences_timer.wall * 1000),
+                        "yes" if same_pairs and same_incidences else "no"]
+        else:
+            compared = ["-", "-", "-"]
+        rows.append(["%i / %i" % (len(beams), holes), "%i" % (holes - sum(len(g) - 1 for g in groups)),
+                     "%i / %i" % (len(incidences), own), "%.0f" % (dowel_index_timer.wall * 1000),
+                     "%.0f" % (beam_index_timer.wall * 1000)] + compared)
+    print("backend: %s" % BACKEND)
+    print_table(["beams / dowels", "unique dowels", "incidences / of linked beams", "DowelIndex [ms]",
+                 "BeamIndex [ms]", "all pairs dowels [ms]", "all pairs beams [ms]", "same"], rows)
+
+
+if __name__ == "__main__":
+    main()
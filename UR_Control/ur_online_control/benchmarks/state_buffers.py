@@ -0,0 +1,54 @@
+'''
+The receive buffers of a state channel: a robot publishing its pose at 125 Hz
+for an hour, stored in a LifoQueue (as before) and in the RingBuffer (with and
+without decimation). The memory is measured with tracemalloc (Python 3 only).
+'''
+from __future__ import print_function
+import sys
+import time
+
+if (sys.version_info > (3, 0)):
+    from queue import LifoQueue
+    import tracemalloc
+else:
+    from Queue import LifoQueue
+    tracemalloc = None
+
+from ur_online_control.communication.ring_buffer import RingBuffer, np
+from ur_online_control.benchmarks.utilities import print_table
+
+
+def measure(buffer, number):
+    if tracemalloc:
+        tracemalloc.start()
+    start = time.time()
+    for i in range(number):
+        buffer.put([100. + i, 200., 300., 0., 3.14, 0.]) # a new list, as decoded from the socket
+    elapsed = time.time() - start
+    memory = tracemalloc.get_traced_memory()[0] if tracemalloc else None
+    if tracemalloc:
+        tracemalloc.stop()
+    start = time.time()
+    for i in range(1000):
+        latest = buffer.get(block=False) if isinstance(buffer, LifoQueue) else buffer.latest()
+    latest_time = (time.time() - start) / 1000
+    return elapsed, memory, latest_time
+
+
+def main(rate=125, seconds=3600):
+    number = rate * seconds
+    cases = [("LifoQueue", LifoQueue()),
+             ("RingBuffer(1000)", RingBuffer(1000)),
+             ("RingBuffer(1000, decimation 5)", RingBuffer(1000, 5))]
+    rows = []
+    for name, buffer in cases:
+        elapsed, memory, latest_time = measure(buffer, number)
+        records = buffer.qsize() if isinstance(buffer, LifoQueue) else len(buffer)
+        rows.append([name, "%i" % records, "%.2f" % (elapsed / number * 1e6),
+                     "%.1f" % (memory / 1e6) if memory is not None else "-", "%.2f" % (latest_time * 1e6)])
+    print("%i poses (%i s at %i Hz), numpy: %s" % (number, seconds, rate, np is not None))
+    print_table(["buffer", "records", "put [us]", "memory [MB]", "latest [us]"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+'''
+The TelemetryRecorder: the time per record (in the receive path of the
+ActuatorSocket) and, with numpy, the time to open the log and to compute the
+cycle times without loading the file.
+'''
+from __future__ import print_function
+import os
+import tempfile
+import time
+
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.telemetry import TelemetryRecorder, read_telemetry, cycle_times
+from ur_online_control.benchmarks.utilities import print_table
+
+
+def record(path, number, capacity):
+    """ Records number records like a robot publishing both poses and executing
+    a command every 10 poses, returns the seconds per record. """
+    recorder = TelemetryRecorder(path, capacity)
+    pose = [100., 200., 300., 0., 3.14, 0.]
+    t = 0.
+    start = time.time()
+    for i in range(number // 3):
+        t += 0.008
+        recorder.record(MSG_CURRENT_POSE_CARTESIAN, i // 10, pose, t)
+        recorder.record(MSG_CURRENT_POSE_JOINT, i // 10, pose, t)
+        recorder.record(MSG_COMMAND_EXECUTED, i, pose, t)
+    elapsed = time.time() - start
+    recorder.close()
+    return elapsed / (number // 3 * 3)
+
+
+def main(number=3000000):
+    path = os.path.join(tempfile.gettempdir(), "benchmark.telemetry")
+    rows = []
+    for capacity in [number, number // 16]:
+        per_record = record(path, number, capacity)
+        rows.append(["%i" % number, "%i" % capacity, "%.2f" % (per_record * 1e6), "%.0f" % (os.path.getsize(path) / 1e6)])
+    print_table(["records", "preallocated", "record [us]", "file [MB]"], rows)
+
+    try:
+        import numpy
+    except ImportError:
+        print("Reading the log needs numpy.")
+        os.remove(path)
+        return
+    start = time.time()
+    records = read_telemetry(path)
+    opened = time.time() - start
+    start = time.time()
+    counters, seconds = cycle_times(records)
+    analysed = time.time() - start
+    print_table(["open [ms]", "cycle times [ms]", "commands", "mean cycle time [s]"],
+                [["%.2f" % (opened * 1e3), "%.1f" % (analysed * 1e3), "%i" % (len(counters) + 1), "%.3f" % seconds.mean()]])
+    del records
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
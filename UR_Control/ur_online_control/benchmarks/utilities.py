@@ -0,0 +1,98 @@
+from __future__ import print_function
+import os
+import socket
+import struct
+import sys
+import time
+
+from ur_online_control.communication.msg_identifiers import *
+
+
+def cpu_time():
+    """ Returns the user + system time of this process in seconds. """
+    t = os.times()
+    return t[0] + t[1]
+
+
+class Timer(object):
+    """ Measures wall and cpu time of a with-block. """
+
+    def __enter__(self):
+        self.wall_start = time.time()
+        self.cpu_start = cpu_time()
+        return self
+
+    def __exit__(self, *args):
+        self.wall = time.time() - self.wall_start
+        self.cpu = cpu_time() - self.cpu_start
+
+
+class Silence(object):
+    """ Suppresses the print statements of the library within a with-block. """
+
+    def write(self, msg):
+        pass
+
+    def flush(self):
+        pass
+
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = self
+        return self
+
+    def __exit__(self, *args):
+        sys.stdout = self.stdout
+
+
+def percentile(values, p):
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(p / 100. * (len(values) - 1))))
+    return values[idx]
+
+
+def print_table(header, rows):
+    widths = [max(len(str(r[i])) for r in [header] + rows) for i in range(len(header))]
+    fmt = "  ".join(["%%-%is" % w for w in widths])
+    print(fmt % tuple(header))
+    print(fmt % tuple(["-" * w for w in widths]))
+    for row in rows:
+        print(fmt % tuple(row))
+
+
+class RawClient(object):
+    """ A blocking client speaking the framed protocol without any threads,
+    so that it does not add its own load to the measurements. """
+
+    def __init__(self, identifier, host, port, byteorder="!"):
+        self.identifier = identifier
+        self.byteorder = byteorder
+        self.socket = socket.create_connection((host, port))
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        name = identifier.encode("ascii")
+        self.send_frame(MSG_IDENTIFIER, name)
+
+    def send_frame(self, msg_id, payload=b""):
+        header = struct.pack(self.byteorder + "2i", len(payload) + 4, msg_id)
+        self.socket.sendall(header + payload)
+
+    def send_int(self, value):
+        self.send_frame(MSG_INT, struct.pack(self.byteorder + "i", value))
+
+    def recv_exactly(self, n):
+        buf = b""
+        while len(buf) < n:
+            chunk = self.socket.recv(n - len(buf))
+            if not chunk:
+                raise socket.error("connection closed")
+            buf += chunk
+        return buf
+
+    def recv_frame(self):
+        msg_length = struct.unpack(self.byteorder + "i", self.recv_exactly(4))[0]
+        raw = self.recv_exactly(msg_length)
+        msg_id = struct.unpack_from(self.byteorder + "i", raw)[0]
+        return msg_id, raw[4:]
+
+    def close(self):
+        self.socket.close()
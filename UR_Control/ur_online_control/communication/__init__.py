@@ -1,3 +1,3 @@
-from msg_identifiers import *
-from states import *
-from utilities import *
+from .msg_identifiers import *
+from .states import *
+from .utilities import *
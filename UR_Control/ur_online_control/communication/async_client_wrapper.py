@@ -0,0 +1,177 @@
+'''
+An asyncio variant of the ClientWrapper, for fabrication scripts written as
+coroutines, e.g. to compute the commands for the next beam while the robot is
+still placing the current one. Python 3.7+ only.
+'''
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty
+
+import ur_online_control.communication.container as container
+from ur_online_control.communication.client_wrapper import ClientWrapper, msg_identifier_names
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.states import *
+
+# the blocking waits run in these threads, so that the event loop never blocks
+EXECUTOR = ThreadPoolExecutor(max_workers=32)
+
+# the threads check in this interval, if the awaiting coroutine was cancelled
+CANCEL_INTERVAL = 0.1
+
+
+def _remaining(end_time):
+    if end_time is None:
+        return CANCEL_INTERVAL
+    return min(CANCEL_INTERVAL, end_time - time.time())
+
+
+def _wait_for_client(cancelled, identifier, predicate, timeout):
+    end_time = None if timeout is None else time.time() + timeout
+    while not cancelled.is_set():
+        remaining = _remaining(end_time)
+        ok, value = container.CONNECTED_CLIENTS.wait(identifier, predicate, max(0, remaining))
+        if ok or remaining <= 0:
+            return ok, value
+    return False, None
+
+
+def _get(cancelled, queue, timeout):
+    end_time = None if timeout is None else time.time() + timeout
+    while not cancelled.is_set():
+        remaining = _remaining(end_time)
+        if remaining <= 0:
+            return None
+        try:
+            msg = queue.get(timeout=remaining)
+        except Empty: # Queue
+            continue
+        if msg is not None: # RingBuffer
+            return msg
+    return None
+
+
+class AsyncClientWrapper(object):
+
+    """ Mirrors the ClientWrapper, but all waits are coroutines. The send methods
+    (send_command_movel, quit, ...) are the ones of the ClientWrapper, they just
+    put the message on the send queue and do not block.
+
+    The waits block in threads of the executor on the same container and queues
+    as the ClientWrapper, so both run on the same Server.
+
+    Example:
+        ur = AsyncClientWrapper("UR")
+        await ur.wait_for_connected()
+        ur.send_command_movel([x, y, z, ax, ay, az], v=50)
+        await ur.wait_for_ready()
+        async for pose in ur.current_poses_joint():
+            ...
+    """
+
+    def __init__(self, identifier, executor=None):
+        self.identifier = identifier
+        self.client = ClientWrapper(identifier)
+        self.executor = executor or EXECUTOR
+
+    def __getattr__(self, name):
+        # everything that does not block is used from the ClientWrapper
+        return getattr(self.client, name)
+
+    async def _run(self, func, *args):
+        """ Runs func(cancelled, *args) in the executor, cancelled is set when
+        the coroutine is done or cancelled, so that the thread returns. """
+        cancelled = threading.Event()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, func, cancelled, *args)
+        finally:
+            cancelled.set()
+
+    async def wait_for_connected(self, timeout=None):
+        """ Returns False if the client is not connected after timeout. """
+        ok, value = await self._run(_wait_for_client, self.identifier, None, timeout)
+        if not ok:
+            print("Client %s is NOT connected after %.1f seconds." % (self.identifier, timeout))
+            return False
+        return self.client.wait_for_connected() # returns immediately
+
+    async def wait_for_message(self, msg_id, timeout=None):
+        """ Returns the next message of the type msg_id, or None after timeout. """
+        if not self.connected:
+            print("Client %s is NOT yet connected." % self.identifier)
+            return
+        if msg_id not in self.rcv_queues:
+            print("Client %s does NOT send messages of type %s." % (self.identifier, msg_identifier_names[msg_id]))
+            return
+        return await self._run(_get, self.rcv_queues[msg_id], timeout)
+
+    async def wait_for_float_list(self, timeout=None):
+        return await self.wait_for_message(MSG_FLOAT_LIST, timeout)
+
+    async def wait_for_int_list(self, timeout=None):
+        return await self.wait_for_message(MSG_INT_LIST, timeout)
+
+    async def wait_for_int(self, timeout=None):
+        return await self.wait_for_message(MSG_INT, timeout)
+
+    async def wait_for_ready(self, timeout=None):
+        """ Returns the state, READY_TO_PROGRAM unless the timeout expired. """
+        ok, value = await self._run(_wait_for_client, self.identifier, lambda value: value[0] == READY_TO_PROGRAM, timeout)
+        return value[0] if value else None
+
+    async def wait_for_command_executed(self, number, timeout=None):
+        """ Returns the number of executed commands, more than number unless the timeout expired. """
+        ok, value = await self._run(_wait_for_client, self.identifier, lambda value: value[1] > number, timeout)
+        return value[1] if value else 0
+
+    async def get_current_pose_joint(self, timeout=None):
+        return await self.wait_for_message(MSG_CURRENT_POSE_JOINT, timeout)
+
+    async def messages(self, msg_id):
+        """ An async iterator over all messages of the type msg_id. """
+        while True:
+            msg = await self.wait_for_message(msg_id)
+            if msg is None:
+                return
+            yield msg
+
+    def current_poses_joint(self):
+        return self.messages(MSG_CURRENT_POSE_JOINT)
+
+    def current_poses_cartesian(self):
+        return self.messages(MSG_CURRENT_POSE_CARTESIAN)
+
+
+if __name__ == "__main__":
+    from ur_online_control.communication.server import Server
+    from ur_online_control.communication.server.ur_simulator import URClient
+
+    async def calculate_commands(beam):
+        await asyncio.sleep(0.5) # e.g. inverse kinematics for the next beam
+        return [[100. * beam, 200., 300. + 10 * i, 0., 3.14, 0.] for i in range(5)]
+
+    async def main():
+        ur = AsyncClientWrapper("UR")
+        await ur.wait_for_connected()
+
+        commands = await calculate_commands(0)
+        for beam in range(1, 4):
+            for pose in commands:
+                ur.send_command_movel(pose, v=50)
+            # calculate the next beam while the robot is moving
+            commands, state = await asyncio.gather(calculate_commands(beam), ur.wait_for_ready())
+        ur.quit()
+
+    server = Server("127.0.0.1", 30003)
+    server.client_ips.update({"UR": "127.0.0.1"})
+    server.start()
+    robot = URClient("127.0.0.1", 30003, execution_time=0.1)
+    robot.connect_to_server()
+    robot.start()
+
+    asyncio.run(main())
+    time.sleep(0.5)
+    robot.close()
+    server.close()
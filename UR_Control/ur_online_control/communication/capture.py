@@ -0,0 +1,102 @@
+'''
+Capture of the raw socket traffic of a client, see Server.capture_path. The
+ReplayClient (server/replay_client.py) plays the captured client side back.
+
+A capture file has the header MAGIC and the records
+    [time (float64), direction (char), byteorder (char), length (uint32)] [bytes]
+where direction is RECEIVED (from the client) or SENT (to the client), and the
+bytes are one or more complete frames [length] [msg_id] [payload].
+'''
+import struct
+import time
+from threading import Lock
+
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.msg_codecs import BATCH_COMMAND_SIZE
+
+MAGIC = b"URCP\x01\x00\x00\x00"
+RECORD = struct.Struct("<dccI")
+RECEIVED = b"R"
+SENT = b"S"
+
+
+class CaptureWriter(object):
+
+    """ Appends the frames of one connection to a capture file. """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = Lock()
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.records = 0
+
+    def write(self, direction, byteorder, *chunks):
+        """ Writes the frame (given in chunks, e.g. header and payload) with the current time. """
+        length = sum(len(chunk) for chunk in chunks)
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(RECORD.pack(time.time(), direction, byteorder.encode("ascii"), length))
+            for chunk in chunks:
+                self.file.write(chunk)
+            self.records += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def split_frames(data, byteorder):
+    """ Returns the frames in data, which contains only complete frames. """
+    frames = []
+    start = 0
+    while start < len(data):
+        msg_length = struct.unpack_from(byteorder + "i", data, start)[0]
+        frames.append(data[start:start + 4 + msg_length])
+        start += 4 + msg_length
+    return frames
+
+
+def read_capture(path):
+    """ Returns the captured frames as list of (time, direction, byteorder, msg_id, frame). """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise Exception("%s is not a capture file." % path)
+    records = []
+    offset = len(MAGIC)
+    while offset + RECORD.size <= len(data):
+        timestamp, direction, byteorder, length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if offset + length > len(data):
+            break # the last record was not written completely
+        byteorder = byteorder.decode("ascii")
+        for frame in split_frames(data[offset:offset + length], byteorder):
+            msg_id = struct.unpack_from(byteorder + "i", frame, 4)[0]
+            records.append((timestamp, direction, byteorder, msg_id, frame))
+        offset += length
+    return records
+
+
+def command_counters(msg_id, payload, byteorder):
+    """ Returns the counters of the commands in a MSG_COMMAND or MSG_COMMAND_BATCH
+    payload, or an empty list for other messages. """
+    if msg_id == MSG_COMMAND:
+        return [struct.unpack_from(byteorder + "i", payload, 4)[0]]
+    if msg_id == MSG_COMMAND_BATCH:
+        number = struct.unpack_from(byteorder + "i", payload)[0]
+        return [struct.unpack_from(byteorder + "i", payload, 4 + (i * BATCH_COMMAND_SIZE + 1) * 4)[0] for i in range(number)]
+    return []
+
+
+def count_frame(counts, msg_id, payload, byteorder):
+    """ Counts the frames by msg_id, but the commands in MSG_COMMAND and
+    MSG_COMMAND_BATCH together as MSG_COMMAND: how they are batched depends on
+    the timing, the number of commands does not. """
+    if msg_id == MSG_COMMAND_BATCH:
+        counts[MSG_COMMAND] = counts.get(MSG_COMMAND, 0) + struct.unpack_from(byteorder + "i", payload)[0]
+    else:
+        counts[msg_id] = counts.get(msg_id, 0) + 1
@@ -31,16 +31,18 @@ class ClientWrapper(object):
 
         self.waiting_time_queue = 0.1
 
-    def wait_for_connected(self):
+    def wait_for_connected(self, timeout=None):
+        """ Blocks until the client is connected, returns False if the timeout expired. """
         print("Waiting until client %s is connected..." % self.identifier)
-        connected_clients = list(container.CONNECTED_CLIENTS.keys())
-        while self.identifier not in connected_clients:
-            time.sleep(0.1)
-            connected_clients = list(container.CONNECTED_CLIENTS.keys())
+        ok, value = container.CONNECTED_CLIENTS.wait(self.identifier, timeout=timeout)
+        if not ok:
+            print("Client %s is NOT connected after %.1f seconds." % (self.identifier, timeout))
+            return False
         print("Client %s is connected." % self.identifier)
         self.connected = True
         self.snd_queue = container.SND_QUEUE.get(self.identifier)
         self.rcv_queues = container.RCV_QUEUES.get(self.identifier)
+        return True
         """
 
         for msg_id in self.rcv_queues:
@@ -73,19 +75,22 @@ class ClientWrapper(object):
         # still needs to be implemented
         return self.wait_for_message(MSG_INT)
 
-    def wait_for_ready(self):
-        state, number = container.CONNECTED_CLIENTS.get(self.identifier)
-        while state != READY_TO_PROGRAM:
-            time.sleep(0.1)
-            state, number = container.CONNECTED_CLIENTS.get(self.identifier)
-        return state
-
-    def wait_for_command_executed(self, number):
-        state, numex = container.CONNECTED_CLIENTS.get(self.identifier)
-        while numex <= number:
-            time.sleep(0.1)
-            state, numex = container.CONNECTED_CLIENTS.get(self.identifier)
-        return numex
+    def wait_for_ready(self, timeout=None):
+        """ Blocks until the client is READY_TO_PROGRAM (or the timeout expired) and returns the state. """
+        ok, value = container.CONNECTED_CLIENTS.wait(self.identifier, lambda value: value[0] == READY_TO_PROGRAM, timeout)
+        if not ok:
+            print("Client %s is NOT ready after %.1f seconds." % (self.identifier, timeout))
+            return value[0] if value else None
+        return value[0]
+
+    def wait_for_command_executed(self, number, timeout=None):
+        """ Blocks until more than number commands are executed (or the timeout
+        expired) and returns the number of executed commands. """
+        ok, value = container.CONNECTED_CLIENTS.wait(self.identifier, lambda value: value[1] > number, timeout)
+        if not ok:
+            print("Client %s has NOT executed command %i after %.1f seconds." % (self.identifier, number + 1, timeout))
+            return value[1] if value else 0
+        return value[1]
 
     def wait_for_digital_in(self, number):
         msg = self.wait_for_message(MSG_DIGITAL_IN)
@@ -101,6 +106,23 @@ class ClientWrapper(object):
         msg = self.wait_for_message(MSG_CURRENT_POSE_JOINT)
         return msg
 
+    def get_latest(self, msg_id):
+        """ Returns the latest value of a state channel (e.g. MSG_CURRENT_POSE_JOINT) without waiting, or None. """
+        return self.rcv_queues[msg_id].latest()
+
+    def get_history(self, msg_id, number=None, seconds=None):
+        """ Returns (times, values) of the last number values, or of the last
+        seconds, of a state channel (e.g. MSG_CURRENT_POSE_JOINT), see RingBuffer.window. """
+        return self.rcv_queues[msg_id].window(number, seconds)
+
+    def get_buffer_occupancy(self):
+        """ Returns the recorded (time, occupancy, stack_size) of an actuator, where
+        occupancy is the number of received but not yet executed commands. If
+        the occupancy drops to 0 while commands are still sent, the actuator ran dry. """
+        if self.identifier not in container.BUFFER_OCCUPANCY.keys():
+            return []
+        return list(container.BUFFER_OCCUPANCY.get(self.identifier))
+
     def send(self, msg_id, msg=None):
         container.CONNECTED_CLIENTS.put(self.identifier, [EXECUTING, 0])
         self.snd_queue.put((msg_id, msg))
@@ -138,6 +160,10 @@ class ClientWrapper(object):
     def quit(self):
         self.send(MSG_QUIT)
 
+    def send_publish_rate(self, publish_rate):
+        """ Sets the rate (Hz) the actuator publishes its state with, 0: not at all. """
+        self.snd_queue.put((MSG_PUBLISH_RATE, publish_rate)) # does not change the state
+
     def send_tcp(self, tcp):
         self.send(MSG_TCP, tcp)
 
@@ -4,16 +4,25 @@ Created on 11.10.2017
 @author: rustr
 '''
 
-from threading import Lock
-from multiprocessing import Queue
+from threading import Lock, Condition
 import time
 from collections import deque
 
 class Container:
 
+    """ A thread-safe dictionary. Every put notifies the threads waiting
+    for the key, see wait. """
+
     def __init__(self):
         self.storage = {}
         self.lock = Lock()
+        self.conditions = {} # key: Condition (sharing the lock)
+
+    def _condition(self, key):
+        # must be called with the lock
+        if key not in self.conditions:
+            self.conditions[key] = Condition(self.lock)
+        return self.conditions[key]
 
     def put(self, key, value = None):
         self.lock.acquire()
@@ -24,8 +33,42 @@ class Container:
                 self.storage.update({key: value})
         else:
             self.storage.update({key: value})
+        self._condition(key).notify_all()
         self.lock.release()
 
+    def wait(self, key, predicate = None, timeout = None):
+        """ Blocks until the key is in the container and predicate(value) is True.
+
+        Args:
+            key: the key to wait for.
+            predicate (function, optional): is called with the value after every put of the key.
+            timeout (float, optional): the maximum time to wait in seconds.
+
+        Returns:
+            (bool, value): False if the timeout expired, and the (last) value or None.
+        """
+        if timeout is not None:
+            end_time = time.time() + timeout
+        self.lock.acquire()
+        try:
+            condition = self._condition(key)
+            while True:
+                if key in self.storage:
+                    value = self.storage[key]
+                    if predicate is None or predicate(value):
+                        return True, value
+                else:
+                    value = None
+                if timeout is None:
+                    condition.wait()
+                else:
+                    remaining = end_time - time.time()
+                    if remaining <= 0:
+                        return False, value
+                    condition.wait(remaining)
+        finally:
+            self.lock.release()
+
     def get(self, key):
         self.lock.acquire()
         value = self.storage[key]
@@ -45,3 +88,5 @@ class Container:
 RCV_QUEUES = Container()
 SND_QUEUE = Container()
 CONNECTED_CLIENTS = Container()
+BUFFER_OCCUPANCY = Container() # identifier: deque of (time, occupancy, stack_size)
+COMMANDS_EXECUTED = Container() # identifier: number of commands executed since the connection
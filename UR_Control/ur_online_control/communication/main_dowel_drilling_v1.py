@@ -91,7 +91,7 @@ def main():
 
         # drilling movements
         print ("\nstarting with the main loop")
-        for i in range(0, len(commands_flattened_drilling) - 2, 3):
+        for i in range(0, len(commands_drilling) - 2, 3):
             sequence_count = round((i + 1)/2)
             print ("\tstart %i" % sequence_count)
             x1, y1, z1, ax1, ay1, az1, speed, radius = commands_drilling[i]
@@ -218,7 +218,8 @@ def main():
 
             beam_count += 1
 
-            used_plane_count += number_of_holes * 3 + 2
+            # picking, 3 planes per hole, placing and safe placing
+            used_plane_count += number_of_holes * 3 + 3
 
         #moving back to the start
         print ("moving back to the start safety position")
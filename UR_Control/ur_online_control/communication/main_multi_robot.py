@@ -0,0 +1,83 @@
+from __future__ import print_function
+import time
+import sys
+import os
+
+# set the paths to find library
+file_dir = os.path.dirname( __file__)
+parent_dir = os.path.abspath(os.path.join(file_dir, "..", ".."))
+sys.path.append(file_dir)
+sys.path.append(parent_dir)
+
+from ur_online_control.communication.server import Server
+from ur_online_control.communication.client_wrapper import ClientWrapper
+from ur_online_control.communication.scheduler import ActuatorGroup, Scheduler
+from ur_online_control.communication.formatting import format_commands
+
+if len(sys.argv) > 1:
+    server_address = sys.argv[1]
+    server_port = int(sys.argv[2])
+    ur1_ip = sys.argv[3]
+    ur2_ip = sys.argv[4]
+    print(sys.argv)
+else:
+    #server_address = "192.168.10.12"
+    server_address = "127.0.0.1"
+    server_port = 30003
+    #ur1_ip = "192.168.10.11"
+    #ur2_ip = "192.168.10.13"
+    ur1_ip = "127.0.0.1"
+    ur2_ip = "127.0.0.1"
+
+
+def main():
+
+    # start the server, UR1 and UR2 are both URs (see template_ur1_calibration.gh and template_ur2_calibration.gh)
+    server = Server(server_address, server_port)
+    server.start()
+    server.add_client("UR1", ur1_ip, "UR")
+    server.add_client("UR2", ur2_ip, "UR")
+
+    gh = ClientWrapper("GH")
+    cell = ActuatorGroup("cell", ["UR1", "UR2"])
+
+    # wait for the clients to be connected
+    gh.wait_for_connected()
+    cell.wait_for_connected()
+
+    # now enter fabrication loop
+    while True:
+        # let gh control if we should continue
+        continue_fabrication = gh.wait_for_int()
+        print("continue_fabrication: %i" % continue_fabrication)
+        if not continue_fabrication:
+            break
+
+        # the commands of both robots: [robot (1 or 2), x, y, z, ax, ay, az, speed, radius]
+        len_command = gh.wait_for_int()
+        commands_flattened = gh.wait_for_float_list()
+        commands = format_commands(commands_flattened, len_command)
+        print("We received %i commands." % len(commands))
+
+        scheduler = Scheduler(cell, window=10)
+        for robot, x, y, z, ax, ay, az, speed, radius in commands:
+            if robot == 0:
+                # both robots finish their commands, e.g. for a handover
+                scheduler.sync()
+            else:
+                scheduler.add_movel("UR%i" % robot, [x, y, z, ax, ay, az], v=speed, r=radius)
+        scheduler.run(report_interval=5.)
+
+        gh.send_float_list([p[1] for p in scheduler.progress().values()])
+        print("============================================================")
+
+    cell.quit()
+    gh.quit()
+    server.close()
+
+    print("Please press a key to terminate the program.")
+    junk = sys.stdin.readline()
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
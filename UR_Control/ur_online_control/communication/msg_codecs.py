@@ -0,0 +1,121 @@
+import struct
+
+from ur_online_control.communication.msg_identifiers import *
+
+
+# the number of integers per command in MSG_COMMAND_BATCH: command_id, counter,
+# and 10 values (movel/movej), so the URScript can read them with a fixed length
+BATCH_COMMAND_SIZE = 12
+
+
+class Codec(object):
+
+    """ A precompiled struct.Struct for one message layout.
+
+    Attributes:
+        size (int): the size of the packed message in bytes.
+        msg_length (int): the message length which is sent in the header
+            (size without the length field itself).
+    """
+
+    def __init__(self, byteorder, fmt):
+        self.struct = struct.Struct(byteorder + fmt)
+        self.size = self.struct.size
+        self.msg_length = self.size - 4
+        self.padding = b"\x00" * self.size
+
+        # bound methods of the struct, to avoid another python call in the hot path
+        self.pack = self.struct.pack # (*values)
+        self.pack_into = self.struct.pack_into # (buffer, offset, *values)
+        self.unpack_from = self.struct.unpack_from # (buffer, offset=0)
+
+    def append_to(self, buffer, *values):
+        """ Packs the values at the end of the bytearray buffer. """
+        offset = len(buffer)
+        buffer += self.padding
+        self.struct.pack_into(buffer, offset, *values)
+
+
+class MessageCodecs(object):
+
+    """ The codecs of all messages for one byteorder, keyed by msg_id and, for
+    MSG_COMMAND, by command_id. Messages with a variable length (float lists,
+    strings, digital in) are cached per length.
+
+    Do not instantiate directly, use get_codecs(byteorder).
+    """
+
+    def __init__(self, byteorder):
+        self.byteorder = byteorder
+
+        # [length, msg_id, values]
+        self.msg = {MSG_QUIT: Codec(byteorder, "2i"),
+                    MSG_POPUP: Codec(byteorder, "2i"),
+                    MSG_CURRENT_POSE_CARTESIAN: Codec(byteorder, "2i"),
+                    MSG_CURRENT_POSE_JOINT: Codec(byteorder, "2i"),
+                    MSG_INT: Codec(byteorder, "3i"),
+                    MSG_SPEED: Codec(byteorder, "3i"),
+                    MSG_DIGITAL_IN: Codec(byteorder, "3i"),
+                    MSG_ANALOG_IN: Codec(byteorder, "3i"),
+                    MSG_COMMAND_RECEIVED: Codec(byteorder, "3i"),
+                    MSG_COMMAND_EXECUTED: Codec(byteorder, "3i"),
+                    MSG_BUFFER_SIZE: Codec(byteorder, "3i"),
+                    MSG_PUBLISH_RATE: Codec(byteorder, "3i"),
+                    MSG_TCP: Codec(byteorder, "8i"), # x, y, z, ax, ay, az
+                    }
+
+        # [length, MSG_COMMAND, command_id, command_counter, values]
+        self.command = {COMMAND_ID_MOVEL: Codec(byteorder, "14i"), # x, y, z, ax, ay, az, acc, speed, radius, time
+                        COMMAND_ID_MOVEJ: Codec(byteorder, "14i"), # j1, j2, j3, j4, j5, j6, acc, speed, radius, time
+                        COMMAND_ID_DIGITAL_OUT: Codec(byteorder, "6i"), # number, value
+                        COMMAND_ID_WAIT: Codec(byteorder, "5i"), # time
+                        COMMAND_ID_TCP: Codec(byteorder, "10i"), # x, y, z, ax, ay, az
+                        COMMAND_ID_POPUP: Codec(byteorder, "4i"),
+                        }
+
+        # MSG_COMMAND_BATCH packed in place: the header [length, MSG_COMMAND_BATCH,
+        # number] and number * [command_id, command_counter, 10 values]
+        self.batch_header = Codec(byteorder, "3i")
+        self.batch_command = Codec(byteorder, "%ii" % BATCH_COMMAND_SIZE)
+
+        # payloads of received messages (without length and msg_id)
+        self.pose = Codec(byteorder, "6i") # MSG_CURRENT_POSE_CARTESIAN, MSG_CURRENT_POSE_JOINT
+        self.counter = Codec(byteorder, "i") # MSG_COMMAND_RECEIVED, MSG_COMMAND_EXECUTED, MSG_INT, MSG_BUFFER_SIZE, MSG_PUBLISH_RATE
+
+        self.float_lists = {}
+        self.strings = {}
+        self.floats_cache = {}
+        self.ints_cache = {}
+
+    def float_list(self, number):
+        """ [length, MSG_FLOAT_LIST, number floats] """
+        if number not in self.float_lists:
+            self.float_lists[number] = Codec(self.byteorder, "2i%if" % number)
+        return self.float_lists[number]
+
+    def string(self, number):
+        """ [length, msg_id, string with number characters] """
+        if number not in self.strings:
+            self.strings[number] = Codec(self.byteorder, "2i%is" % number)
+        return self.strings[number]
+
+    def floats(self, number):
+        """ number floats, e.g. the payload of MSG_FLOAT_LIST """
+        if number not in self.floats_cache:
+            self.floats_cache[number] = Codec(self.byteorder, "%if" % number)
+        return self.floats_cache[number]
+
+    def ints(self, number):
+        """ number integers, e.g. the payload of MSG_CURRENT_DIGITAL_IN """
+        if number not in self.ints_cache:
+            self.ints_cache[number] = Codec(self.byteorder, "%ii" % number)
+        return self.ints_cache[number]
+
+
+CODECS = {}
+
+def get_codecs(byteorder="!"):
+    """ Returns the (shared) MessageCodecs for the byteorder. """
+    if byteorder not in CODECS:
+        CODECS[byteorder] = MessageCodecs(byteorder)
+    return CODECS[byteorder]
@@ -13,7 +13,7 @@ MSG_CURRENT_POSE_JOINT = 6 # [j1j2j3j4j5j6]
 MSG_CURRENT_DIGITAL_IN = 7 # get a list of xx digital in number, values
 MSG_ANALOG_IN = 8
 MSG_ANALOG_OUT = 9
-MSG_DIGITAL_IN = 10,
+MSG_DIGITAL_IN = 10
 MSG_DIGITAL_OUT = 11
 MSG_SPEED = 12 # set a global speed var 0 - 1
 MSG_INT_LIST = 13
@@ -24,6 +24,9 @@ MSG_INT = 17
 
 MSG_TCP = 18
 MSG_POPUP = 19
+MSG_COMMAND_BATCH = 20 # [number, number * [command_id, counter, position, orientation, optional values]]
+MSG_BUFFER_SIZE = 21 # [size] the number of commands the actuator can buffer, sent after the identifier
+MSG_PUBLISH_RATE = 22 # [rate] the rate (Hz) the actuator publishes its state with, sent after the identifier and on request
 
 COMMAND_ID_MOVEL = 1 
 COMMAND_ID_MOVEJ = 2
@@ -53,7 +56,10 @@ msg_identifier_dict = {'MSG_IDENTIFIER': 1,
                        'MSG_QUIT': 16,
                        'MSG_INT': 17,
                        'MSG_TCP': 18,
-                       'MSG_POPUP': 19
+                       'MSG_POPUP': 19,
+                       'MSG_COMMAND_BATCH': 20,
+                       'MSG_BUFFER_SIZE': 21,
+                       'MSG_PUBLISH_RATE': 22
                        }
 
 # different command identifiers are sent after msg_id MSG_COMMAND
@@ -0,0 +1,31 @@
+import sys
+import multiprocessing
+
+if (sys.version_info > (3, 0)):
+    from queue import Queue
+else:
+    from Queue import Queue
+
+# The queues between the client sockets and the ClientWrappers. Producer and
+# consumer usually live in the same process, where a thread queue just passes
+# the references. A multiprocessing queue pickles every item and sends it
+# through a pipe, it is only needed if the ClientWrappers run in another
+# process (and then the Server must run without the Reactor, whose send queues
+# are always thread queues).
+QUEUE_BACKENDS = {"thread": Queue,
+                  "process": multiprocessing.Queue}
+
+QUEUE_BACKEND = "thread"
+
+
+def set_queue_backend(name):
+    """ Sets the backend of all queues created afterwards, "thread" or "process". """
+    global QUEUE_BACKEND
+    if name not in QUEUE_BACKENDS:
+        raise Exception("Queue backend %s unknown, use one of %s." % (name, list(QUEUE_BACKENDS.keys())))
+    QUEUE_BACKEND = name
+
+
+def create_queue(backend=None):
+    """ Returns a new queue of the backend (or the current QUEUE_BACKEND). """
+    return QUEUE_BACKENDS[backend or QUEUE_BACKEND]()
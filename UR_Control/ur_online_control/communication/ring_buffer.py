@@ -0,0 +1,130 @@
+import time
+from collections import deque
+from threading import Lock, Condition
+
+try:
+    import numpy as np
+except ImportError:
+    np = None # the RingBuffer falls back to a deque
+
+
+class RingBuffer(object):
+
+    """ A fixed-size buffer for a state channel of an actuator (e.g. the current
+    joint pose published at 125 Hz). It keeps the last capacity records with
+    their time, the oldest are overwritten, so memory does not grow during a
+    long fabrication.
+
+    It replaces the LifoQueue as receive queue of the channel: get returns the
+    latest value and blocks until there is a value which was not yet returned.
+    latest returns the latest value without waiting (O(1)), window the history.
+
+    With numpy the values are stored in a preallocated array (the shape is set
+    by the first value), otherwise in a deque.
+
+    Args:
+        capacity (int): the number of records that are kept.
+        decimation (int): only every decimation-th value is recorded.
+    """
+
+    def __init__(self, capacity=1000, decimation=1):
+        self.capacity = capacity
+        self.decimation = max(1, int(decimation))
+        self.lock = Lock()
+        self.new_value = Condition(self.lock)
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.received = 0 # all values, also the dropped ones
+            self.count = 0 # the recorded values
+            self.read = 0 # count at the last get
+            self.times = None
+            self.values = None
+            self.records = deque(maxlen=self.capacity)
+
+    def put(self, value, timestamp=None):
+        with self.lock:
+            self.received += 1
+            if (self.received - 1) % self.decimation:
+                return
+            timestamp = time.time() if timestamp is None else timestamp
+            if np is None:
+                self.records.append((timestamp, value))
+            else:
+                if self.values is None:
+                    value = np.asarray(value)
+                    self.times = np.zeros(self.capacity)
+                    self.values = np.zeros((self.capacity,) + value.shape, dtype=value.dtype)
+                index = self.count % self.capacity
+                self.times[index] = timestamp
+                self.values[index] = value
+            self.count += 1
+            self.new_value.notify_all()
+
+    def _latest(self):
+        # must be called with the lock, count > 0
+        if np is None:
+            return self.records[-1][1]
+        return self.values[(self.count - 1) % self.capacity].tolist()
+
+    def latest(self):
+        """ Returns the latest value, or None if nothing was recorded yet. """
+        with self.lock:
+            if not self.count:
+                return None
+            return self._latest()
+
+    def empty(self):
+        """ True if there is no value which was not yet returned by get. """
+        with self.lock:
+            return self.count == self.read
+
+    def get(self, block=True, timeout=None):
+        """ Returns the latest value, and waits for a new one if it was already returned.
+        Returns None if there is no new value after timeout (or if block is False). """
+        with self.lock:
+            if block and self.count == self.read:
+                if timeout is None:
+                    while self.count == self.read:
+                        self.new_value.wait()
+                else:
+                    end_time = time.time() + timeout
+                    while self.count == self.read:
+                        remaining = end_time - time.time()
+                        if remaining <= 0:
+                            break
+                        self.new_value.wait(remaining)
+            if self.count == self.read:
+                return None
+            self.read = self.count
+            return self._latest()
+
+    def window(self, number=None, seconds=None):
+        """ Returns (times, values) of the last number records, or of the
+        records of the last seconds, oldest first. With numpy as arrays. """
+        with self.lock:
+            available = min(self.count, self.capacity)
+            number = available if number is None else min(number, available)
+            if np is None:
+                records = list(self.records)[available - number:]
+                times = [t for t, v in records]
+                values = [v for t, v in records]
+            else:
+                indices = np.arange(self.count - number, self.count) % self.capacity
+                times = self.times[indices] if number else np.zeros(0)
+                values = self.values[indices] if number else np.zeros(0)
+        if seconds is not None and len(times):
+            start = time.time() - seconds
+            if np is None:
+                first = next((i for i, t in enumerate(times) if t >= start), len(times))
+            else:
+                first = int(np.searchsorted(times, start))
+            times, values = times[first:], values[first:]
+        return times, values
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def __repr__(self):
+        return "RingBuffer(%i/%i, decimation %i)" % (len(self), self.capacity, self.decimation)
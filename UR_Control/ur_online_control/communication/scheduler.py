@@ -0,0 +1,194 @@
+from __future__ import print_function
+import time
+from collections import OrderedDict
+from threading import Thread, Lock
+
+import ur_online_control.communication.container as container
+from ur_online_control.communication.client_wrapper import ClientWrapper
+from ur_online_control.communication.msg_identifiers import *
+
+
+class ActuatorGroup(object):
+
+    """ A named group of actuators, e.g. the robots which work on the same
+    workpiece. The ClientWrappers are accessed by their identifiers.
+
+    Example:
+        cell = ActuatorGroup("cell", ["UR1", "UR2"])
+        cell.wait_for_connected()
+        cell["UR1"].send_command_movel(pose, v=50)
+        cell.wait_for_ready()
+    """
+
+    def __init__(self, name, identifiers):
+        self.name = name
+        self.clients = OrderedDict((identifier, ClientWrapper(identifier)) for identifier in identifiers)
+
+    @property
+    def identifiers(self):
+        return list(self.clients.keys())
+
+    def __getitem__(self, identifier):
+        return self.clients[identifier]
+
+    def __iter__(self):
+        return iter(self.clients.values())
+
+    def __len__(self):
+        return len(self.clients)
+
+    def wait_for_connected(self, timeout=None):
+        """ Blocks until all actuators are connected, returns False if the timeout expired. """
+        end_time = None if timeout is None else time.time() + timeout
+        for client in self:
+            remaining = None if end_time is None else max(0, end_time - time.time())
+            if not client.wait_for_connected(remaining):
+                return False
+        return True
+
+    def wait_for_ready(self, timeout=None):
+        """ Blocks until all actuators are READY_TO_PROGRAM, returns the states. """
+        end_time = None if timeout is None else time.time() + timeout
+        states = []
+        for client in self:
+            remaining = None if end_time is None else max(0, end_time - time.time())
+            states.append(client.wait_for_ready(remaining))
+        return states
+
+    def quit(self):
+        for client in self:
+            client.quit()
+
+    def __repr__(self):
+        return "ActuatorGroup(%s: %s)" % (self.name, ", ".join(self.identifiers))
+
+
+class Scheduler(object):
+
+    """ Dispatches the interleaved command streams of the actuators of a group.
+
+    The commands are added in one stream, each for one actuator of the group.
+    Each actuator gets its commands in order, but independent of the others,
+    with at most window commands in flight (sent, but not executed). sync()
+    adds a barrier: the commands after it are only sent when all actuators
+    have executed the commands before it, e.g. for a handover of a beam.
+
+    The progress is tracked with the number of executed commands since the
+    connection (container.COMMANDS_EXECUTED).
+
+    Example:
+        scheduler = Scheduler(cell, windows={"UR1": 10, "UR2": 5})
+        scheduler.add_movel("UR1", pose1, v=50)
+        scheduler.add_movel("UR2", pose2, v=50)
+        scheduler.sync()
+        ...
+        scheduler.run(report_interval=1.)
+    """
+
+    def __init__(self, group, windows=None, window=10):
+        self.group = group
+        self.windows = dict((identifier, window) for identifier in group.identifiers)
+        self.windows.update(windows or {})
+        self.segments = [[]] # lists of (identifier, cmd_id, values), separated by sync()
+
+        self.lock = Lock()
+        self.sent = {}
+        self.executed = {}
+        self.totals = {}
+        self.segment_executed = {}
+        self.start_time = None
+        self.end_time = None
+
+    def add(self, identifier, cmd_id, values):
+        if identifier not in self.windows:
+            raise Exception("Actuator %s is not in group %s." % (identifier, self.group.name))
+        self.segments[-1].append((identifier, cmd_id, values))
+
+    def add_movel(self, identifier, pose_cartesian, a=0, v=0, r=0, t=0):
+        self.add(identifier, COMMAND_ID_MOVEL, pose_cartesian + [a, v, r, t])
+
+    def add_movej(self, identifier, pose_joints, a=0, v=0, r=0, t=0):
+        self.add(identifier, COMMAND_ID_MOVEJ, pose_joints + [a, v, r, t])
+
+    def add_digital_out(self, identifier, number, boolean):
+        self.add(identifier, COMMAND_ID_DIGITAL_OUT, [number, int(boolean)])
+
+    def add_wait(self, identifier, time_to_wait_in_seconds):
+        self.add(identifier, COMMAND_ID_WAIT, [time_to_wait_in_seconds])
+
+    def sync(self):
+        """ All actuators finish the commands added so far, before any of the following is sent. """
+        if len(self.segments[-1]):
+            self.segments.append([])
+
+    def __len__(self):
+        return sum(len(segment) for segment in self.segments)
+
+    def _dispatch(self, identifier, cmds):
+        """ Sends the commands to one actuator, keeping at most its window in flight,
+        and returns when all of them are executed. """
+        client = self.group[identifier]
+        window = self.windows[identifier]
+        ok, base = container.COMMANDS_EXECUTED.wait(identifier)
+        for i, (cmd_id, values) in enumerate(cmds):
+            if i >= window:
+                ok, executed = container.COMMANDS_EXECUTED.wait(identifier, lambda value: value - base > i - window)
+                self._update_executed(identifier, executed - base)
+            client.send_command(cmd_id, values)
+            with self.lock:
+                self.sent[identifier] += 1
+        ok, executed = container.COMMANDS_EXECUTED.wait(identifier, lambda value: value - base >= len(cmds))
+        self._update_executed(identifier, executed - base)
+
+    def _update_executed(self, identifier, executed_in_segment):
+        with self.lock:
+            self.executed[identifier] = self.segment_executed[identifier] + executed_in_segment
+
+    def run(self, report_interval=None):
+        """ Dispatches all commands and returns when they are executed. Prints
+        the progress every report_interval seconds, if set. """
+        self.start_time = time.time()
+        self.end_time = None
+        identifiers = self.group.identifiers
+        self.sent = dict((identifier, 0) for identifier in identifiers)
+        self.executed = dict((identifier, 0) for identifier in identifiers)
+        self.totals = dict((identifier, 0) for identifier in identifiers)
+        for segment in self.segments:
+            for identifier, cmd_id, values in segment:
+                self.totals[identifier] += 1
+
+        for segment in self.segments:
+            self.segment_executed = dict(self.executed)
+            streams = OrderedDict((identifier, []) for identifier in identifiers)
+            for identifier, cmd_id, values in segment:
+                streams[identifier].append((cmd_id, values))
+            threads = [Thread(target=self._dispatch, args=(identifier, cmds)) for identifier, cmds in streams.items() if len(cmds)]
+            for thread in threads:
+                thread.daemon = True
+                thread.start()
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(report_interval)
+                    if report_interval and thread.is_alive():
+                        self.print_progress()
+
+        self.end_time = time.time()
+        if report_interval:
+            self.print_progress()
+
+    def progress(self):
+        """ Returns {identifier: (sent, executed, total, executed commands per second)},
+        and the combined progress of the group with the name of the group. """
+        with self.lock:
+            elapsed = max(1e-6, (self.end_time or time.time()) - self.start_time) if self.start_time else None
+            progress = OrderedDict()
+            for identifier in self.group.identifiers:
+                sent, executed, total = self.sent.get(identifier, 0), self.executed.get(identifier, 0), self.totals.get(identifier, 0)
+                progress[identifier] = (sent, executed, total, executed / elapsed if elapsed else 0.)
+            sent, executed, total, rate = [sum(p[i] for p in progress.values()) for i in range(4)]
+            progress[self.group.name] = (sent, executed, total, rate)
+        return progress
+
+    def print_progress(self):
+        print(" | ".join("%s: %i/%i (%.1f commands/s)" % (name, executed, total, rate)
+                         for name, (sent, executed, total, rate) in self.progress().items()))
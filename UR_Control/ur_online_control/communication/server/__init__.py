@@ -1,2 +1,3 @@
-from .server import Server
+from .server import Server, register_client_socket
 from .base_client import BaseClient
+from .replay_client import ReplayClient
@@ -6,14 +6,14 @@ Created on 22.09.2016
 
 import struct
 import sys
+import time
+from collections import deque
+from threading import RLock
 from .base_client_socket import *
 
-if (sys.version_info > (3, 0)):
-    from queue import LifoQueue
-else:
-    from Queue import LifoQueue
-
 from ur_online_control.communication.states import *
+from ur_online_control.communication.ring_buffer import RingBuffer
+from ur_online_control.communication.telemetry import TelemetryRecorder
 
 class ActuatorSocket(BaseClientSocket):
 
@@ -21,10 +21,32 @@ class ActuatorSocket(BaseClientSocket):
     1. The actuator can just handle a specific size of commands at once, so it  must be set
        in packets to a specific length ( = stack_size)
     2. The actuator can be in different states: READY_TO_PROGRAM, EXECUTING and READY_TO_RECEIVE.
+       The transitions (see STATE_TRANSITIONS) and all changes of the stack and the counters
+       which belong to them are made while holding stack_lock, so commands can be put on the
+       stack from any thread.
     3. If the ActuatorSocket has sent all messages on the stack, and also received the same
        amount of messages, it will go into READY_TO_PROGRAM state.
+    4. Consecutive commands with an id in batch_command_ids are sent together in one
+       MSG_COMMAND_BATCH frame. The actuator acknowledges them with one MSG_COMMAND_RECEIVED
+       with the counter of the last command (the acknowledgement is cumulative).
+    5. The actuator sends its buffer size (MSG_BUFFER_SIZE) after the identifier, which is
+       used as stack_size. If adaptive_stack_size is set, the stack_size grows (up to
+       max_stack_size) every time the actuator runs dry, i.e. it has executed all received
+       commands although there are more on the stack or on the way.
+    6. The state the actuator publishes (current poses, digital in) is kept in RingBuffers
+       of STATE_RECORDS records, recording every STATE_DECIMATION-th value. The actuator
+       sends its publish rate (MSG_PUBLISH_RATE) after the identifier. If publish_rate is
+       set, the actuator is asked for this rate and answers with the rate it uses.
+    7. If the server has a telemetry_path, the current poses and the executed commands are
+       recorded in a telemetry file, see start_recording.
     """
 
+    ADAPTIVE_STACK_SIZE = False
+    MAX_STACK_SIZE = 50
+    OCCUPANCY_RECORDS = 100000
+    STATE_RECORDS = 1000
+    STATE_DECIMATION = 1
+
     def __init__(self, socket, ip, parent):
 
         super(ActuatorSocket, self).__init__(socket, ip, parent)
@@ -32,103 +54,199 @@ class ActuatorSocket(BaseClientSocket):
         self.state = READY_TO_PROGRAM
 
         self.stack_size = 5
-        self.stack = []
+        self.stack = deque()
         self.stack_counter = 0
+        self.stack_lock = RLock()
+
+        self.buffer_size = None # the buffer size of the actuator, see MSG_BUFFER_SIZE
+        self.adaptive_stack_size = self.ADAPTIVE_STACK_SIZE
+        self.max_stack_size = self.MAX_STACK_SIZE
+
+        # instrumentation: (time, number of received but not executed commands, stack_size)
+        self.buffer_occupancy = deque(maxlen=self.OCCUPANCY_RECORDS)
+        self.underruns = 0
 
         self.command_counter = 0
+        self.command_counter_received = 0
         self.command_counter_executed = 0
+        self.commands_executed = 0 # since the connection, not reset on READY_TO_PROGRAM
+
+        # command ids which can be sent in a MSG_COMMAND_BATCH
+        self.batch_command_ids = []
 
         # state publishing
         self.queue_timeout = 1.
-        self.current_pose_cartesian_queue = LifoQueue()
-        self.current_pose_joints_queue = LifoQueue()
-        self.current_digital_in_queue = LifoQueue()
-        self.current_analog_in_queue = LifoQueue()
+        self.publish_rate = None # the requested rate in Hz, None: the default of the actuator
+        self.actuator_publish_rate = None # the rate the actuator uses
+        self.current_pose_cartesian_buffer = RingBuffer(self.STATE_RECORDS, self.STATE_DECIMATION)
+        self.current_pose_joints_buffer = RingBuffer(self.STATE_RECORDS, self.STATE_DECIMATION)
+        self.current_digital_in_buffer = RingBuffer(self.STATE_RECORDS, self.STATE_DECIMATION)
+        self.current_analog_in_buffer = RingBuffer(self.STATE_RECORDS, self.STATE_DECIMATION)
+
+        self.recorder = None # see start_recording
 
 
+    def set_state(self, state):
+        """ Changes the state, if the transition is allowed. Must be called with stack_lock. """
+        if state not in STATE_TRANSITIONS[self.state]:
+            self.stdout("Invalid state transition from %i to %i." % (self.state, state))
+            return False
+        self.state = state
+        return True
+
     def reset_counters(self):
-        if self.state == READY_TO_PROGRAM:
-            self.command_counter = 0
-            self.command_counter_executed = 0
-            container.CONNECTED_CLIENTS.put(self.identifier, [self.state, self.command_counter_executed])
-        else:
-            self.stdout("reset_counters: state is not READY_TO_PROGRAM ")
+        with self.stack_lock:
+            if self.state == READY_TO_PROGRAM:
+                self.command_counter = 0
+                self.command_counter_received = 0
+                self.command_counter_executed = 0
+                container.CONNECTED_CLIENTS.put(self.identifier, [self.state, self.command_counter_executed])
+            else:
+                self.stdout("reset_counters: state is not READY_TO_PROGRAM ")
 
     def update(self):
         container.CONNECTED_CLIENTS.put(self.identifier, [self.state, self.command_counter_executed])
+        container.COMMANDS_EXECUTED.put(self.identifier, self.commands_executed)
+
+    def send(self, msg_id, msg = None):
+        if msg_id != MSG_COMMAND and len(self.stack):
+            # the commands which were queued before this message
+            self.handle_stack()
+        if msg_id == MSG_PUBLISH_RATE:
+            self.publish_rate = msg
+        super(ActuatorSocket, self).send(msg_id, msg)
 
     def send_command(self, msg_id, msg):
-        """ Puts the message on the stack and calls handle_stack """
+        """ Puts the message on the stack and calls handle_stack, as soon as
+        there are no more messages in the send queue (so that the commands can
+        be sent in batches). """
         self.stack.append([msg_id, msg])
-        self.handle_stack()
+        if self.snd_queue.empty():
+            self.handle_stack()
     
     def _send_command(self, cmd):
         msg_id, msg = cmd
-        buf = self._format_command(msg_id, msg)
-        self.socket.send(buf)
+        self._write_command(msg_id, msg)
+
+    def _send_commands(self, cmds):
+        """ Sends the commands in order, consecutive commands that can be
+        batched are sent in one MSG_COMMAND_BATCH frame. """
+        batch = []
+        for cmd in cmds:
+            msg_id, msg = cmd
+            if msg_id == MSG_COMMAND and msg[0] in self.batch_command_ids:
+                batch.append(cmd)
+            else:
+                self._send_batch(batch)
+                batch = []
+                self.command_counter += 1
+                self._send_command(cmd)
+        self._send_batch(batch)
+
+    def _send_batch(self, batch):
+        if len(batch) == 1:
+            self.command_counter += 1
+            self._send_command(batch[0])
+        elif len(batch) > 1:
+            # the counters of the commands are command_counter + 1 ... command_counter + len(batch)
+            self._write_command_batch(batch)
+            self.command_counter += len(batch)
+
+    def _write_command(self, msg_id, msg):
+        """ Writes the command to the pending output. """
+        self._write(self._format_command(msg_id, msg))
+
+    def _write_command_batch(self, cmds):
+        """ Writes the commands as one MSG_COMMAND_BATCH frame to the pending output. """
+        self._write(self._format_command_batch(cmds))
 
     def _format_command(self, msg_id, msg):
         pass
 
+    def _format_command_batch(self, cmds):
+        pass
+
     def empty_stack(self):
-        self.stack = []
+        with self.stack_lock:
+            self.stack.clear()
 
     def get_stack_length(self):
         return len(self.stack)
 
     def handle_stack(self, msg_counter = None):
+        with self.stack_lock:
+            self._handle_stack(msg_counter)
+
+    def _handle_stack(self, msg_counter):
         if not len(self.stack) and self.stack_counter == 0:
-            if msg_counter == self.command_counter:
+            if msg_counter == self.command_counter and self.state != READY_TO_PROGRAM:
                 # The actuator is ready to be programmed
-                self.state = READY_TO_PROGRAM
-                self.reset_counters()
+                # reset_counters publishes the state only once: publishing it again could overwrite
+                # the EXECUTING of a ClientWrapper which already sends the next commands
+                self.set_state(READY_TO_PROGRAM)
                 self.stdout("Set state to READY_TO_PROGRAM")
-                self.update()
+                self.reset_counters()
 
         elif len(self.stack) and self.stack_counter == 0 :
             # The actuator is ready to be programmed, and receives first packet from the stack
-            for i in range(min(self.stack_size, len(self.stack))):
-                cmd = self.stack.pop(0)
-                self.command_counter += 1
-                self.state = EXECUTING
-                self._send_command(cmd)
-                self.stack_counter -= 1
+            number = min(self.stack_size, len(self.stack))
+            self._send_from_stack(number)
 
         elif len(self.stack) and -self.stack_size <= self.stack_counter and self.stack_counter < 0 :
             # The actuator is currently executing, but ready to receive another packet from the stack
-            try:
-                cmd = self.stack.pop(0)
-                self.command_counter += 1
-                self.state = EXECUTING
-                self._send_command(cmd)
-                self.stack_counter -= 1
-
-            except IndexError: # does happen sometimes: not thread-safe ??
-                pass
+            if self.batch_command_ids:
+                # wait until at least half of the stack is free, otherwise every
+                # executed command would be followed by a batch of one
+                number = min(self.stack_size + self.stack_counter, len(self.stack))
+                if number < min(self.stack_size // 2, len(self.stack)):
+                    number = 0
+            else:
+                number = 1
+            self._send_from_stack(number)
         else:
             # The actuator must still accomplish some commands and return them
             pass
 
+    def _send_from_stack(self, number):
+        if number <= 0 or not self.set_state(EXECUTING):
+            return
+        cmds = [self.stack.popleft() for i in range(number)]
+        self._send_commands(cmds)
+        self.stack_counter -= number
+
 
     def publish_queues(self):
         super(ActuatorSocket, self).publish_queues()
-        container.RCV_QUEUES.put(self.identifier, {MSG_CURRENT_POSE_CARTESIAN: self.current_pose_cartesian_queue})
-        container.RCV_QUEUES.put(self.identifier, {MSG_CURRENT_POSE_JOINT: self.current_pose_joints_queue})
-        container.RCV_QUEUES.put(self.identifier, {MSG_CURRENT_DIGITAL_IN: self.current_digital_in_queue})
-        # container.RCV_QUEUES.put(self.identifier, {MSG_CURRENT_ANALOG_IN: self.current_analog_in_queue})
+        container.RCV_QUEUES.put(self.identifier, {MSG_CURRENT_POSE_CARTESIAN: self.current_pose_cartesian_buffer})
+        container.RCV_QUEUES.put(self.identifier, {MSG_CURRENT_POSE_JOINT: self.current_pose_joints_buffer})
+        container.RCV_QUEUES.put(self.identifier, {MSG_CURRENT_DIGITAL_IN: self.current_digital_in_buffer})
+        container.BUFFER_OCCUPANCY.put(self.identifier, self.buffer_occupancy)
+        container.COMMANDS_EXECUTED.put(self.identifier, self.commands_executed)
+        telemetry_path = getattr(self.parent, "telemetry_path", None)
+        if telemetry_path:
+            self.start_recording(telemetry_path.replace("%s", self.identifier))
+        # container.RCV_QUEUES.put(self.identifier, {MSG_CURRENT_ANALOG_IN: self.current_analog_in_buffer})
 
     def _process_other_messages(self, msg_len, msg_id, raw_msg):
 
         #self.stdout("Received %i" % msg_id)
 
         if msg_id == MSG_COMMAND_RECEIVED:
-            msg_counter = struct.unpack_from(self.byteorder + "i", raw_msg)[0]
+            msg_counter = self.codecs.counter.unpack_from(raw_msg)[0]
             self._process_msg_cmd_received(msg_counter)
 
         elif msg_id == MSG_COMMAND_EXECUTED:
-            msg_counter = struct.unpack_from(self.byteorder + "i", raw_msg)[0]
+            msg_counter = self.codecs.counter.unpack_from(raw_msg)[0]
             self._process_msg_cmd_executed(msg_counter)
 
+        elif msg_id == MSG_BUFFER_SIZE:
+            buffer_size = self.codecs.counter.unpack_from(raw_msg)[0]
+            self._process_buffer_size(buffer_size)
+
+        elif msg_id == MSG_PUBLISH_RATE:
+            publish_rate = self.codecs.counter.unpack_from(raw_msg)[0]
+            self._process_publish_rate(publish_rate)
+
         elif msg_id == MSG_CURRENT_POSE_CARTESIAN:
             current_pose_cartesian = self._format_current_pose_cartesian(raw_msg)
             self._process_current_pose_cartesian(current_pose_cartesian)
@@ -150,46 +268,108 @@ class ActuatorSocket(BaseClientSocket):
             self.stdout("Message identifier unknown:  %d, message: %s" % (msg_id, raw_msg))
 
     def _process_msg_cmd_received(self, msg_counter):
-        self.state = READY_TO_RECEIVE
-        self.stack_counter += 1
-        #self.handle_stack()
+        # the acknowledgement is cumulative: all commands up to msg_counter are received
+        with self.stack_lock:
+            if not self.set_state(READY_TO_RECEIVE):
+                return
+            self.stack_counter += msg_counter - self.command_counter_received
+            self.command_counter_received = msg_counter
+            self.record_occupancy()
+            if self.command_counter_executed == msg_counter:
+                # the commands were executed before the acknowledgement of a
+                # batch arrived, no MSG_COMMAND_EXECUTED will handle the stack
+                self._handle_stack(msg_counter)
 
     def _process_msg_cmd_executed(self, msg_counter):
-        self.command_counter_executed = msg_counter
-        self.update()
-        self.handle_stack(msg_counter)
+        with self.stack_lock:
+            self.commands_executed += msg_counter - self.command_counter_executed
+            self.command_counter_executed = msg_counter
+            if self.recorder is not None:
+                self.recorder.record(MSG_COMMAND_EXECUTED, msg_counter, self.current_pose_cartesian_buffer.latest() or [0.] * 6)
+            self.record_occupancy()
+            if msg_counter >= self.command_counter_received and (len(self.stack) or self.command_counter > msg_counter):
+                self._process_underrun()
+            self.update()
+            self._handle_stack(msg_counter)
+
+    def _process_buffer_size(self, buffer_size):
+        self.stdout("Buffer size of the actuator: %i" % buffer_size)
+        self.buffer_size = buffer_size
+        self.stack_size = buffer_size
+        self.max_stack_size = max(self.max_stack_size, buffer_size)
+
+    def start_recording(self, path, capacity=1000000):
+        """ Records the current poses and the executed commands in the telemetry
+        file path, see telemetry.read_telemetry for reading it. """
+        self.stop_recording()
+        self.recorder = TelemetryRecorder(path, capacity)
+        self.stdout("Recording telemetry to %s" % path)
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.stdout("Recorded %i records to %s" % (len(self.recorder), self.recorder.path))
+            self.recorder = None
+
+    def close(self):
+        super(ActuatorSocket, self).close()
+        self.stop_recording()
+
+    def _process_publish_rate(self, publish_rate):
+        self.stdout("Publish rate of the actuator: %i Hz" % publish_rate)
+        first = self.actuator_publish_rate is None
+        self.actuator_publish_rate = publish_rate
+        if first and self.publish_rate is not None and self.publish_rate != publish_rate:
+            self.set_publish_rate(self.publish_rate)
+
+    def set_publish_rate(self, publish_rate):
+        """ Asks the actuator to publish its state with publish_rate Hz (0: not at all).
+        The actuator answers with the rate it uses, see actuator_publish_rate. """
+        self.send(MSG_PUBLISH_RATE, publish_rate)
+
+    def _process_underrun(self):
+        """ The actuator has executed all commands it has received, but there
+        are more to come: it has to wait for the next command. """
+        self.underruns += 1
+        if self.adaptive_stack_size and self.stack_size < self.max_stack_size:
+            self.stack_size += 1
+            self.stdout("Actuator ran dry, increased stack_size to %i" % self.stack_size)
+
+    def record_occupancy(self):
+        occupancy = self.command_counter_received - self.command_counter_executed
+        self.buffer_occupancy.append((time.time(), occupancy, self.stack_size))
 
     def _format_other_messages(self, msg_id, msg):
         buf = None
 
         if msg_id in [MSG_CURRENT_POSE_CARTESIAN, MSG_CURRENT_POSE_JOINT]:
-            msg_snd_len = 4
-            params = [msg_snd_len, msg_id]
-            buf = struct.pack(self.byteorder + "%ii" % len(params), *params)
+            codec = self.codecs.msg[msg_id]
+            buf = codec.pack(codec.msg_length, msg_id)
 
         elif msg_id == MSG_DIGITAL_IN:
-            msg_snd_len = 4 + 4
-            params = [msg_snd_len, msg_id, int(msg)]
-            buf = struct.pack(self.byteorder + "%ii" % len(params), *params)
+            codec = self.codecs.msg[msg_id]
+            buf = codec.pack(codec.msg_length, msg_id, int(msg))
         
         elif msg_id == MSG_ANALOG_IN:
-            msg_snd_len = 4 + 4
-            params = [msg_snd_len, msg_id, int(msg)]
-            buf = struct.pack(self.byteorder + "%ii" % len(params), *params)
+            codec = self.codecs.msg[msg_id]
+            buf = codec.pack(codec.msg_length, msg_id, int(msg))
 
         elif msg_id == MSG_COMMAND:
             buf = self._format_command(msg_id, msg)
 
         elif msg_id == MSG_SPEED:
             buf = self._format_speed(msg_id, msg)
+
+        elif msg_id == MSG_PUBLISH_RATE:
+            codec = self.codecs.msg[msg_id]
+            buf = codec.pack(codec.msg_length, msg_id, int(msg))
         
         elif msg_id == MSG_TCP:
             buf = self._format_tcp(msg_id, msg)
             
         elif msg_id == MSG_POPUP:
-            msg_snd_len = 4
-            params = [msg_snd_len, msg_id]
-            buf = struct.pack(self.byteorder + "2i", *params)
+            codec = self.codecs.msg[msg_id]
+            buf = codec.pack(codec.msg_length, msg_id)
 
         return buf
 
@@ -225,29 +405,25 @@ class ActuatorSocket(BaseClientSocket):
 
     def get_from_queue(self, queue):
         """ Returns success, value(s). """
-        try:
-            if not queue.empty():
-                value = queue.get(timeout=self.queue_timeout)
-                return True, value
-            else:
-                self.stdout("Queue: %s empty." % str(queue))
-                return False, None
-        except: # timeout error??
+        if queue.empty():
+            self.stdout("Queue: %s empty." % str(queue))
             return False, None
+        value = queue.get(timeout=self.queue_timeout)
+        return value is not None, value
 
     def get_current_pose_cartesian(self):
         #self.socket.send(MSG_CURRENT_POSE_CARTESIAN)
-        return self.get_from_queue(self.current_pose_cartesian_queue)
+        return self.get_from_queue(self.current_pose_cartesian_buffer)
 
     def get_current_pose_joints(self):
-        ok, value = self.get_from_queue(self.current_pose_joints_queue)
+        ok, value = self.get_from_queue(self.current_pose_joints_buffer)
         return ok, value
 
     def get_current_digital_in(self):
-        return self.get_from_queue(self.current_digital_in_queue)
+        return self.get_from_queue(self.current_digital_in_buffer)
     
     def get_current_analog_in(self):
-        return self.get_from_queue(self.current_analog_in_queue)
+        return self.get_from_queue(self.current_analog_in_buffer)
 
 
 class URSocket(ActuatorSocket):
@@ -259,6 +435,7 @@ class URSocket(ActuatorSocket):
 
         self.stack_size = 5
         self.byteorder = "!"
+        self.batch_command_ids = [COMMAND_ID_MOVEL, COMMAND_ID_MOVEJ]
     
     def update(self):
         """This method is called on READY_TO_PROGRAM and MSG_COUNTER_EXECUTED.
@@ -266,7 +443,29 @@ class URSocket(ActuatorSocket):
         super(URSocket, self).update()
         
 
+    def _write_command(self, msg_id, msg):
+        """ Packs the command directly into the pending output. """
+        start = len(self.snd_buffer)
+        self._append_command(self.snd_buffer, msg_id, msg)
+        self._written(start)
+
+    def _write_command_batch(self, cmds):
+        """ Packs the MSG_COMMAND_BATCH frame directly into the pending output. """
+        start = len(self.snd_buffer)
+        self._append_command_batch(self.snd_buffer, cmds)
+        self._written(start)
+
     def _format_command(self, msg_id, msg):
+        buf = bytearray()
+        self._append_command(buf, msg_id, msg)
+        return bytes(buf)
+
+    def _format_command_batch(self, cmds):
+        buf = bytearray()
+        self._append_command_batch(buf, cmds)
+        return bytes(buf)
+
+    def _append_command(self, buf, msg_id, msg):
         """
         MSG_COMMAND = 1 # [counter, position, orientation, optional values]
         called from handle stack: individual commands have to created for the specific actuator socket.
@@ -274,11 +473,16 @@ class URSocket(ActuatorSocket):
         """
 
         command_id, cmd = msg
+        MULT = self.MULT
 
+        # the integers (the floats are multiplied with MULT) are packed with
+        # precompiled structs: [msg_length, msg_id, command_id, command_counter] + cmd
         if command_id in [COMMAND_ID_MOVEL, COMMAND_ID_MOVEJ]:
-            msg_command_length = 4 * (len(cmd) + 1 + 1 + 1) # + msg_id, command_id, command_counter
-            cmd = [c * self.MULT for c in cmd]
-            params = [msg_command_length, msg_id, command_id, self.command_counter] + cmd
+            codec = self.codecs.command[command_id]
+            x, y, z, ax, ay, az, acc, speed, radius, t = cmd
+            codec.append_to(buf, codec.msg_length, msg_id, command_id, self.command_counter,
+                            int(x * MULT), int(y * MULT), int(z * MULT), int(ax * MULT), int(ay * MULT),
+                            int(az * MULT), int(acc * MULT), int(speed * MULT), int(radius * MULT), int(t * MULT))
         
         elif command_id == COMMAND_ID_MOVEC:
             raise NotImplementedError("")
@@ -287,77 +491,87 @@ class URSocket(ActuatorSocket):
             raise NotImplementedError("")
         
         elif command_id == COMMAND_ID_DIGITAL_OUT:
-            msg_command_length = 4 * (len(cmd) + 1 + 1 + 1) # + msg_id, command_id, command_counter
-            params = [msg_command_length, msg_id, command_id, self.command_counter] + cmd
+            codec = self.codecs.command[command_id]
+            codec.append_to(buf, codec.msg_length, msg_id, command_id, self.command_counter, *cmd)
 
         elif command_id == COMMAND_ID_WAIT:
-            msg_command_length = 4 * (len(cmd) + 1 + 1 + 1)
-            cmd = [c * self.MULT for c in cmd]
-            params = [msg_command_length, msg_id, command_id, self.command_counter] + cmd
+            codec = self.codecs.command[command_id]
+            codec.append_to(buf, codec.msg_length, msg_id, command_id, self.command_counter, int(cmd[0] * MULT))
         
         elif command_id == COMMAND_ID_TCP:
-            msg_command_length = 4 * (len(cmd) + 1 + 1 + 1)
-            cmd = [c * self.MULT for c in cmd]
-            params = [msg_command_length, msg_id, command_id, self.command_counter] + cmd
+            codec = self.codecs.command[command_id]
+            x, y, z, ax, ay, az = cmd
+            codec.append_to(buf, codec.msg_length, msg_id, command_id, self.command_counter,
+                            int(x * MULT), int(y * MULT), int(z * MULT), int(ax * MULT), int(ay * MULT), int(az * MULT))
             
         elif command_id == COMMAND_ID_POPUP:
-            msg_command_length = 4 * (1 + 1 + 1)
-            params = [msg_command_length, msg_id, command_id, self.command_counter]
+            codec = self.codecs.command[command_id]
+            codec.append_to(buf, codec.msg_length, msg_id, command_id, self.command_counter)
         
         else:
-            raise("command_id unknown.")
+            raise Exception("command_id unknown.")
 
-        buf = struct.pack(self.byteorder + "%ii" % len(params), *params)
-        return buf
+    def _append_command_batch(self, buf, cmds):
+        """
+        MSG_COMMAND_BATCH = 20 # [number, number * [command_id, command_counter, 10 values]]
+        Only for movel and movej commands, which all have the same length.
+        The header and every command are packed in place, one after the other.
+        """
+        MULT = self.MULT
+        header, command = self.codecs.batch_header, self.codecs.batch_command
+        header.append_to(buf, header.msg_length + command.size * len(cmds), MSG_COMMAND_BATCH, len(cmds))
+        counter = self.command_counter
+        for msg_id, (command_id, cmd) in cmds:
+            counter += 1
+            x, y, z, ax, ay, az, acc, speed, radius, t = cmd
+            command.append_to(buf, command_id, counter,
+                              int(x * MULT), int(y * MULT), int(z * MULT), int(ax * MULT), int(ay * MULT),
+                              int(az * MULT), int(acc * MULT), int(speed * MULT), int(radius * MULT), int(t * MULT))
 
     def _format_speed(self, msg_id, speed):
-        msg_command_length = 4 * 2
-        speed *= self.MULT
-        params = [msg_command_length, msg_id, speed]
-        buf = struct.pack(self.byteorder + "%ii" % len(params), *params)
-        return buf
+        codec = self.codecs.msg[msg_id]
+        return codec.pack(codec.msg_length, msg_id, int(speed * self.MULT))
     
     def _format_tcp(self, msg_id, msg):
-        msg_command_length = 4 * (len(msg) + 1)
-        msg = [c * self.MULT for c in msg]
-        params = [msg_command_length, msg_id] + msg
-        buf = struct.pack(self.byteorder + "%ii" % len(params), *params)
-        return buf
+        codec = self.codecs.msg[msg_id]
+        return codec.pack(codec.msg_length, msg_id, *[int(c * self.MULT) for c in msg])
 
     def _format_current_pose_cartesian(self, raw_msg):
         ''' MSG_CURRENT_POSE_CARTESIAN = 5 # [position, orientation] '''
-        current_pose_cartesian_tuple = struct.unpack_from(self.byteorder + "%ii" % (6), raw_msg)
-        current_pose_cartesian = [s / self.MULT for s in current_pose_cartesian_tuple]
-        return current_pose_cartesian
+        MULT = self.MULT
+        return [s / MULT for s in self.codecs.pose.unpack_from(raw_msg)]
 
     def _format_current_pose_joint(self, raw_msg):
         ''' MSG_CURRENT_POSE_JOINT = 5 # [j1, j2, j3, j4, j5, j6] '''
-        current_pose_joint_tuple = struct.unpack_from(self.byteorder + "%ii" % (6), raw_msg)
-        current_pose_joint = [s / self.MULT for s in current_pose_joint_tuple]
-        return current_pose_joint
+        MULT = self.MULT
+        return [s / MULT for s in self.codecs.pose.unpack_from(raw_msg)]
 
     def _format_current_digital_in(self, msg_len, raw_msg):
-        di_num = (msg_len - 4)/4
-        current_digital_in = struct.unpack_from(self.byteorder + "%ii" % (di_num), raw_msg)
+        di_num = (msg_len - 4)//4
+        current_digital_in = self.codecs.ints(di_num).unpack_from(raw_msg)
         # make number, value pairs
         current_digital_in = [[current_digital_in[i], current_digital_in[i+1]] for i in range(0, len(current_digital_in), 2)]
         return current_digital_in
     
     def _format_current_analog_in(self, msg_len, raw_msg):
-        di_num = (msg_len - 4)/4
-        current_analog_in = struct.unpack_from(self.byteorder + "%ii" % (di_num), raw_msg)
+        di_num = (msg_len - 4)//4
+        current_analog_in = self.codecs.ints(di_num).unpack_from(raw_msg)
         # make number, value pairs
         current_analog_in = [[current_analog_in[i], current_analog_in[i+1] / self.MULT] for i in range(0, len(current_analog_in), 2)]
         return current_analog_in
 
     def _process_current_pose_cartesian(self, current_pose_cartesian):
-        self.current_pose_cartesian_queue.put(current_pose_cartesian)
+        self.current_pose_cartesian_buffer.put(current_pose_cartesian)
+        if self.recorder is not None:
+            self.recorder.record(MSG_CURRENT_POSE_CARTESIAN, self.command_counter_executed, current_pose_cartesian)
 
     def _process_current_pose_joint(self, current_pose_joint):
-        self.current_pose_joints_queue.put(current_pose_joint)
+        self.current_pose_joints_buffer.put(current_pose_joint)
+        if self.recorder is not None:
+            self.recorder.record(MSG_CURRENT_POSE_JOINT, self.command_counter_executed, current_pose_joint)
 
     def _process_current_digital_in(self, current_digital_in):
-        self.current_digital_in_queue.put(current_digital_in)
+        self.current_digital_in_buffer.put(current_digital_in)
     
     def _process_current_analog_in(self, current_analog_in):
-        self.current_analog_in_queue.put(current_analog_in)
+        self.current_analog_in_buffer.put(current_analog_in)
@@ -5,18 +5,24 @@ Created on 20.09.2016
 '''
 
 from threading import Thread
+import select
 import socket
+import errno
 import struct
 import time
 import sys
 
 if (sys.version_info > (3, 0)):
     from queue import Queue
+    python_version = 3
 else:
     from Queue import Queue
+    python_version = 2
 
 
 from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.msg_codecs import get_codecs
+from .frame_decoder import FrameDecoder
 
 class BaseClient(object):
 
@@ -29,7 +35,8 @@ class BaseClient(object):
         self.port = port
         self.byteorder = "!" # "!" network, ">" big-endian, "<" for little-endian, see http://docs.python.org/2/library/struct.html
 
-        self.msg_rcv = ""
+        self.decoder = FrameDecoder(self.byteorder)
+        self.codecs = get_codecs(self.byteorder)
 
         self.snd_queue = Queue()
         self.rcv_queue = Queue()
@@ -70,7 +77,7 @@ class BaseClient(object):
             if e.errno == 10004:
                 # A blocking operation was interrupted by a call to WSACancelBlockingCall
                 pass
-            elif e.errno == 10035:
+            elif e.errno in [10035, errno.EWOULDBLOCK, errno.EAGAIN]:
                 # A non-blocking socket operation could not be completed immediately
                 pass
             elif e.errno == 10022:
@@ -83,6 +90,13 @@ class BaseClient(object):
 
     def run(self):
         while self.running:
+            if self.snd_queue.empty():
+                # wait for data (at most timeout, for the messages to send)
+                # instead of spinning on the non-blocking socket
+                try:
+                    select.select([self.socket], [], [], self.timeout)
+                except (select.error, socket.error, ValueError):
+                    pass # closed, read will tell
             self.run_inner_while()
         self.socket.close()
 
@@ -98,6 +112,7 @@ class BaseClient(object):
         try:
             self.socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
             self.socket.settimeout(self.timeout)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.socket.setblocking(0)
             self.send_id()
             self.stdout("Successfully connected to server %s on port %d." % (self.host, self.port))
@@ -137,29 +152,22 @@ class BaseClient(object):
         buf = None
 
         if msg_id == MSG_FLOAT_LIST:
-            msg_snd_len = struct.calcsize(str(len(msg)) + "f") + 4 # float array: length of message in bytes: len*4
-            params = [msg_snd_len, msg_id] + msg
-            buf = struct.pack(self.byteorder + "2i" + str(len(msg)) +  "f", *params)
+            codec = self.codecs.float_list(len(msg))
+            buf = codec.pack(codec.msg_length, msg_id, *msg)
 
-        elif msg_id == MSG_IDENTIFIER:
-            msg_snd_len = len(msg) + 4
-            params = [msg_snd_len, msg_id, msg]
-            buf = struct.pack(self.byteorder + "2i" + str(len(msg)) +  "s", *params)
-
-        elif msg_id == MSG_STRING:
-            msg_snd_len = len(msg) + 4
-            params = [msg_snd_len, msg_id, msg]
-            buf = struct.pack(self.byteorder + "2i" + str(len(msg)) +  "s", *params)
+        elif msg_id in [MSG_IDENTIFIER, MSG_STRING]:
+            if python_version == 3:
+                msg = msg.encode("utf-8")
+            codec = self.codecs.string(len(msg))
+            buf = codec.pack(codec.msg_length, msg_id, msg)
 
         elif msg_id == MSG_INT:
-            msg_snd_len = 4 + 4
-            params = [msg_snd_len, msg_id, msg]
-            buf = struct.pack(self.byteorder + "3i", *params)
+            codec = self.codecs.msg[msg_id]
+            buf = codec.pack(codec.msg_length, msg_id, msg)
 
         elif msg_id == MSG_QUIT:
-            msg_snd_len = 4
-            params = [msg_snd_len, msg_id]
-            buf = struct.pack(self.byteorder + "2i", *params)
+            codec = self.codecs.msg[msg_id]
+            buf = codec.pack(codec.msg_length, msg_id)
 
         else:
             buf = self._format_other_messages(msg_id, msg)
@@ -167,39 +175,39 @@ class BaseClient(object):
                 self.stdout("Message identifier unknown: %d, message: %s" % (msg_id, msg))
                 return
 
-        self.socket.send(buf)
+        self._write(buf)
         self.stdout("Sent message %i with length %i." % (msg_id, len(buf)))
 
+    def _write(self, buf):
+        """ Sends all of buf, waits if the (non-blocking) socket is busy. """
+        view = memoryview(buf)
+        while len(view):
+            try:
+                sent = self.socket.send(view)
+            except socket.error as e:
+                if e.errno not in [10035, errno.EWOULDBLOCK, errno.EAGAIN]:
+                    raise
+                select.select([], [self.socket], [], self.timeout)
+                continue
+            view = view[sent:]
+
 
     def read(self):
         """ The transmission protocol for messages is
         [length msg in bytes] [msg identifier] [other bytes which will be read
         out according to msg identifier] """
 
-        # read msg length
-        self.msg_rcv += self.socket.recv(4)
-        if len(self.msg_rcv) < 4:
+        # receive what is available, can be several or only a part of a message
+        if not self.decoder.recv_from(self.socket):
+            self.stdout("Server closed the connection.")
+            self.close()
             return
 
-        msg_length = struct.unpack_from(self.byteorder + "i", self.msg_rcv, 0)[0]
-
-        # read msg according to msg_length
-        self.msg_rcv += self.socket.recv(msg_length)
-
-        # read message identifier
-        self.msg_rcv = self.msg_rcv[4:]
-        msg_id = struct.unpack_from(self.byteorder + "i", self.msg_rcv[:4], 0)[0]
-
-        raw_msg = self.msg_rcv[4:]
-
-        # reset msg_rcv
-        self.msg_rcv = ""
-
-        # 4. pass message id and raw message to process method
-        self.process(msg_length, msg_id, raw_msg)
-
-        # 5. update
-        self.update()
+        for msg_length, msg_id, raw_msg in self.decoder.frames():
+            # pass message id and raw message (a memoryview) to process method
+            self.process(msg_length, msg_id, raw_msg)
+            # update
+            self.update()
 
     def _process_other_messages(self, msg_len, msg_id, raw_msg):
         self.stdout("Message identifier unknown: %d, message: %s" % (msg_id, raw_msg))
@@ -213,8 +221,7 @@ class BaseClient(object):
             self.close()
         elif msg_id == MSG_FLOAT_LIST:
             self.stdout("Received MSG_FLOAT_LIST")
-            msg_float_tuple = struct.unpack_from(self.byteorder + str((msg_len-4)/4) + "f", raw_msg)
-            msg_float_list = [item for item in msg_float_tuple]
+            msg_float_list = list(self.codecs.floats((msg_len-4)//4).unpack_from(raw_msg))
             self.rcv_queue.put(msg_float_list)
         else:
             self._process_other_messages(msg_len, msg_id, raw_msg)
@@ -5,20 +5,27 @@ Created on 02.12.2013
 '''
 from threading import Thread
 import struct
-from multiprocessing import Queue
 import socket
+import errno
 import time
 import sys
 
 from ur_online_control.communication.msg_identifiers import *
 from ur_online_control.communication.states import *
+from ur_online_control.communication.msg_codecs import get_codecs
 import ur_online_control.communication.container as container
+from ur_online_control.communication.queues import create_queue
+from ur_online_control.communication.capture import CaptureWriter, RECEIVED, SENT
+from .frame_decoder import FrameDecoder, to_str
 
 
 class BaseClientSocket(object):
 
     """ The Client Socket is the base for the specific client sockets
-    It can be used for both Receiver and Sender Sockets. """
+    It can be used for both Receiver and Sender Sockets.
+
+    If the server has a capture_path, all frames from and to the client are
+    captured, see start_capture and server.replay_client.ReplayClient. """
 
     def __init__(self, socket, ip, parent):
 
@@ -26,76 +33,54 @@ class BaseClientSocket(object):
         self.ip = ip
         self.parent = parent
 
-        #self.msg_rcv = b""
-        self.msg_rcv = ""
         self.byteorder = "!" # "!" network, ">" big-endian, "<" for little-endian, see http://docs.python.org/2/library/struct.html
         #self.byteorder = "<"
+        self.decoder = FrameDecoder(self.byteorder, detect_byteorder=True)
 
         self.running = True
 
         self.socket.settimeout(0.008)
 
-        self.snd_queue = Queue()
+        self.snd_queue = create_queue()
+        self.snd_buffer = bytearray() # bytes which could not be sent yet
 
         # rcv_queues
-        self.float_list_queue = Queue()
-        self.string_queue = Queue()
-        self.int_queue = Queue()
+        self.float_list_queue = create_queue()
+        self.string_queue = create_queue()
+        self.int_queue = create_queue()
 
         self.identifier = ""
-
-        self.byteorder_isset = False
+        self.capture = None # see start_capture
 
         self.state = READY_TO_PROGRAM
 
     def stdout(self, msg):
         print("%s: %s" % (self.identifier, msg))
 
+    @property
+    def codecs(self):
+        """ The precompiled message codecs for the current byteorder. """
+        return get_codecs(self.byteorder)
 
     def read(self):
         ''' The transmission protocol for messages is
         [length msg in bytes] [msg identifier] [other bytes which will be read out according to msg identifier] '''
 
-        # 1. read msg length
-        self.msg_rcv += self.socket.recv(4)
-
-        if len(self.msg_rcv) < 4:
-            return
-        msg_length = struct.unpack_from(self.byteorder + "i", self.msg_rcv, 0)[0]
-
-        # TODO: how to check this better?
-        if not self.byteorder_isset:
-            msg_length2 = socket.ntohl(msg_length) # convert 32-bit positive integers from network to host byte order
-            if msg_length2 < msg_length:
-                self.byteorder = "<"
-                msg_length = msg_length2
-            self.byteorder_isset = True
-
-        # 2. read msg according to msg_length
-        self.msg_rcv += self.socket.recv(msg_length)
-        if len(self.msg_rcv) < (msg_length + 4):
+        # 1. receive what is available, can be several or only a part of a message
+        if not self.decoder.recv_from(self.socket): # the connection was closed by the client
+            self.close()
             return
 
-        # 3. message identifier
-        msg_id = struct.unpack_from(self.byteorder + "i", self.msg_rcv[4:8], 0)[0]
-
-        #self.stdout("Received %i ==>" % msg_id)
-
-        # 4. rest of message, according to msg_length
-        raw_msg = self.msg_rcv[8:(8 + msg_length - 4)]
-
-        # 5. set self.msg_rcv to the rest
-        self.msg_rcv = self.msg_rcv[(8 + msg_length - 4):]
-
-        # 4. pass message id and raw message to process method
-        self.process(msg_length, msg_id, raw_msg)
+        # 2. pass message id and raw message (a memoryview) of all complete messages to process method
+        for msg_length, msg_id, raw_msg in self.decoder.frames():
+            self.byteorder = self.decoder.byteorder # is detected with the first message
+            if self.capture is not None:
+                self.capture.write(RECEIVED, self.byteorder, self.decoder.header.pack(msg_length, msg_id), raw_msg)
+            self.process(msg_length, msg_id, raw_msg)
 
     def get_msg_float_list(self, msg_len, raw_msg):
-
-        #msg_float_tuple = struct.unpack_from(self.byteorder + str((msg_len-4)/4) + "f", raw_msg.decode(encoding='UTF-8'))
-        msg_float_tuple = struct.unpack_from(self.byteorder + str((msg_len-4)/4) + "f", raw_msg)
-        msg_float_list = [item for item in msg_float_tuple]
-        return msg_float_list
+        msg_float_tuple = self.codecs.floats((msg_len-4)//4).unpack_from(raw_msg)
+        return list(msg_float_tuple)
 
     def _process_msg_float_list(self, msg_float_list):
         self.float_list_queue.put(msg_float_list)
@@ -119,8 +104,12 @@ class BaseClientSocket(object):
         if msg_id == MSG_IDENTIFIER:
             #message_ids = str(raw_msg).split(" ")
             #identifier = raw_msg.decode(encoding='UTF-8')
-            self.identifier = str(raw_msg)
+            self.identifier = to_str(raw_msg)
             self.stdout("Received identifier.")
+            capture_path = getattr(self.parent, "capture_path", None)
+            if capture_path:
+                self.start_capture(capture_path.replace("%s", self.identifier))
+                self.capture.write(RECEIVED, self.byteorder, self.decoder.header.pack(msg_len, msg_id), raw_msg)
             self.publish_queues()
             self.publish_client()
 
@@ -129,11 +118,11 @@ class BaseClientSocket(object):
             self._process_msg_float_list(msg_float_list)
 
         elif msg_id == MSG_STRING:
-            msg = str(raw_msg)
+            msg = to_str(raw_msg)
             self._process_msg_string(msg)
 
         elif msg_id == MSG_INT:
-            msg = struct.unpack_from(self.byteorder + "i", raw_msg)[0]
+            msg = self.codecs.counter.unpack_from(raw_msg)[0]
             self._process_msg_int(msg)
 
         elif msg_id == MSG_QUIT:
@@ -151,8 +140,21 @@ class BaseClientSocket(object):
     def publish_client(self):
         container.CONNECTED_CLIENTS.put(self.identifier, [self.state, 0])
 
+    def start_capture(self, path):
+        """ Captures all following frames from and to the client in the file path. """
+        self.stop_capture()
+        self.capture = CaptureWriter(path)
+        self.stdout("Capturing to %s" % path)
+
+    def stop_capture(self):
+        if self.capture is not None:
+            self.capture.close()
+            self.stdout("Captured %i records to %s" % (self.capture.records, self.capture.path))
+            self.capture = None
+
     def close(self):
         self.running = False
+        self.stop_capture()
     
     def send_command(self, command_id, msg):
         pass
@@ -161,43 +163,64 @@ class BaseClientSocket(object):
         ''' The transmission protocol for send messages is
         [length msg in bytes] [msg identifier] [other bytes which will be read out according to msg identifier]
         '''
-        buf = None
-
-        if msg_id == MSG_QUIT:
-            msg_snd_len = 4
-            params = [msg_snd_len, msg_id]
-            buf = struct.pack(self.byteorder + "2i", *params)
-
-        elif msg_id == MSG_FLOAT_LIST:
-            msg_snd_len = struct.calcsize(str(len(msg)) + "f") + 4
-            msg = [float(item) for item in msg] # change tuple to list
-            params = [msg_snd_len, msg_id] + msg
-            buf = struct.pack(self.byteorder + "2i" + str(len(msg)) +  "f", *params)
-        
-        elif msg_id == MSG_COMMAND:
+        if msg_id == MSG_COMMAND:
             self.send_command(msg_id, msg)
             return
 
-        else:
-            buf = self._format_other_messages(msg_id, msg)
-            if not buf:
-                self.stdout("Message identifier unknown:  %d, message: %s" % (msg_id, msg))
-                return
-
         try:
-            self.socket.send(buf)
-            self.stdout("Sent message %i." % msg_id)
+            if msg_id == MSG_QUIT:
+                codec = self.codecs.msg[msg_id]
+                self._write_message(codec, codec.msg_length, msg_id)
+
+            elif msg_id == MSG_FLOAT_LIST:
+                codec = self.codecs.float_list(len(msg))
+                self._write_message(codec, codec.msg_length, msg_id, *msg)
+
+            else:
+                buf = self._format_other_messages(msg_id, msg)
+                if not buf:
+                    self.stdout("Message identifier unknown:  %d, message: %s" % (msg_id, msg))
+                    return
+                self._write(buf)
 
-        except socket.timeout:
-            self.stdout("Timeout in sending, trying again...")
-            time.sleep(0.5)
-            self.socket.send(buf)
             self.stdout("Sent message %i." % msg_id)
 
         except socket.error as e:
             if e.errno == 10054 or e.errno == 10053:
                 self.running = False
 
+    def _write(self, buf):
+        """ Appends buf to the pending output and sends as much as possible.
+        The rest is sent by _flush as soon as the socket is writable again. """
+        if self.capture is not None:
+            self.capture.write(SENT, self.byteorder, buf)
+        self.snd_buffer += buf
+        self._flush()
+
+    def _write_message(self, codec, *values):
+        """ Packs the values with the codec directly into the pending output. """
+        start = len(self.snd_buffer)
+        codec.append_to(self.snd_buffer, *values)
+        self._written(start)
+
+    def _written(self, start):
+        """ Captures the frame appended to the pending output from start on
+        and sends as much as possible. """
+        if self.capture is not None:
+            self.capture.write(SENT, self.byteorder, self.snd_buffer[start:])
+        self._flush()
+
+    def _flush(self):
+        try:
+            sent = self.socket.send(self.snd_buffer)
+        except socket.timeout:
+            return
+        except socket.error as e:
+            if e.errno in [errno.EWOULDBLOCK, errno.EAGAIN]:
+                return
+            raise
+        del self.snd_buffer[:sent]
+
     def start(self):
         self.running_thread = Thread(target = self.run)
         self.running_thread.daemon = True # die if main dies
@@ -208,6 +231,10 @@ class BaseClientSocket(object):
 
         while self.running:
 
+            # send what is left from the last message
+            if self.snd_buffer:
+                self._flush()
+
             # process send command
             if not self.snd_queue.empty():
 
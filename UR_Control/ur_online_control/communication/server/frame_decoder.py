@@ -0,0 +1,101 @@
+import socket
+import struct
+import sys
+
+if (sys.version_info > (3, 0)):
+    python_version = 3
+else:
+    python_version = 2
+
+
+def to_str(raw_msg):
+    """ Returns the payload of a message as native string. """
+    if python_version == 2:
+        return raw_msg.tobytes()
+    return raw_msg.tobytes().decode("utf-8")
+
+
+class FrameDecoder(object):
+
+    """ Decodes the transmission protocol
+    [length msg in bytes] [msg identifier] [other bytes]
+    from a stream socket without copying the received bytes.
+
+    The bytes are received with recv_into into a preallocated bytearray. Complete
+    frames are returned as memoryviews into this buffer, partial frames stay in the
+    buffer until the rest has arrived. The buffer is compacted (unread bytes moved
+    to the front) only if there is no more space at its end, and grows if a single
+    frame is larger than the buffer.
+
+    The memoryviews are only valid until the next call of recv_from, so they must
+    be unpacked (or copied) before.
+    """
+
+    def __init__(self, byteorder="!", detect_byteorder=False, size=65536):
+        self.byteorder = byteorder
+        self.detect_byteorder = detect_byteorder
+        self.header = struct.Struct(byteorder + "2i")
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.start = 0 # the first unread byte
+        self.end = 0 # the end of the received bytes
+
+    def set_byteorder(self, byteorder):
+        self.byteorder = byteorder
+        self.header = struct.Struct(byteorder + "2i")
+
+    def _make_room(self, size):
+        """ Makes sure that there are at least size bytes free at the end of the buffer. """
+        unread = self.end - self.start
+        if len(self.buffer) - self.end >= size:
+            return
+        if unread + size > len(self.buffer):
+            buf = bytearray(max(2 * len(self.buffer), unread + size))
+            buf[:unread] = self.view[self.start:self.end]
+            self.buffer = buf
+            self.view = memoryview(self.buffer)
+        else:
+            # just a partial frame, so this copy is small
+            self.buffer[:unread] = self.view[self.start:self.end].tobytes()
+        self.start = 0
+        self.end = unread
+
+    def recv_from(self, sock, size=4096):
+        """ Receives the available bytes from the socket.
+
+        Returns:
+            (int): the number of received bytes, 0 if the connection was closed.
+        """
+        self._make_room(size)
+        n = sock.recv_into(self.view[self.end:], len(self.buffer) - self.end)
+        self.end += n
+        return n
+
+    def _check_byteorder(self):
+        # the first message tells us the byteorder: a message length must be
+        # small, so if it is smaller in little-endian, the client sends in little-endian
+        msg_length = struct.unpack_from("!i", self.buffer, self.start)[0]
+        msg_length_le = struct.unpack_from("<i", self.buffer, self.start)[0]
+        if 0 <= msg_length_le < msg_length or msg_length < 0:
+            self.set_byteorder("<")
+        self.detect_byteorder = False
+
+    def frames(self):
+        """ Yields all complete frames in the buffer as
+        (msg_length, msg_id, raw_msg) where raw_msg is a memoryview. """
+        while self.end - self.start >= 8:
+            if self.detect_byteorder:
+                self._check_byteorder()
+            msg_length, msg_id = self.header.unpack_from(self.buffer, self.start)
+            if msg_length < 4:
+                raise socket.error("Invalid message length %d." % msg_length)
+            frame_end = self.start + 4 + msg_length
+            if frame_end > self.end:
+                # partial frame: make sure that the complete frame fits into the buffer
+                self._make_room(frame_end - self.end)
+                break
+            raw_msg = self.view[self.start + 8:frame_end]
+            self.start = frame_end
+            yield msg_length, msg_id, raw_msg
+        if self.start == self.end:
+            self.start = self.end = 0
@@ -0,0 +1,244 @@
+import errno
+import socket
+import select
+import sys
+
+if (sys.version_info > (3, 0)):
+    import selectors
+    from queue import Queue, Empty
+else:
+    selectors = None
+    from Queue import Queue, Empty
+
+EVENT_READ = 1
+EVENT_WRITE = 2
+
+
+class SelectorKey(object):
+
+    def __init__(self, fileobj, events, data):
+        self.fileobj = fileobj
+        self.events = events
+        self.data = data
+
+
+class SelectSelector(object):
+
+    """ Minimal stand-in for selectors.DefaultSelector on Python 2, based on
+    select.select. Only the subset used by the Reactor is implemented. """
+
+    def __init__(self):
+        self.keys = {}
+
+    def register(self, fileobj, events, data=None):
+        key = SelectorKey(fileobj, events, data)
+        self.keys[fileobj] = key
+        return key
+
+    def unregister(self, fileobj):
+        return self.keys.pop(fileobj)
+
+    def modify(self, fileobj, events, data=None):
+        key = self.keys[fileobj]
+        key.events = events
+        key.data = data
+        return key
+
+    def select(self, timeout=None):
+        rlist = [k.fileobj for k in self.keys.values() if k.events & EVENT_READ]
+        wlist = [k.fileobj for k in self.keys.values() if k.events & EVENT_WRITE]
+        rready, wready, _ = select.select(rlist, wlist, [], timeout)
+        ready = []
+        for fileobj in set(rready) | set(wready):
+            mask = 0
+            if fileobj in rready:
+                mask |= EVENT_READ
+            if fileobj in wready:
+                mask |= EVENT_WRITE
+            ready.append((self.keys[fileobj], mask))
+        return ready
+
+    def close(self):
+        self.keys = {}
+
+
+def create_selector():
+    if selectors:
+        return selectors.DefaultSelector() # epoll on Linux, select on Windows
+    return SelectSelector()
+
+
+def socketpair():
+    """ Returns a pair of connected sockets, also on platforms which do not
+    provide socket.socketpair (e.g. Python 2 on Windows). """
+    if hasattr(socket, "socketpair"):
+        return socket.socketpair()
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    wsock = socket.create_connection(listener.getsockname())
+    rsock, _ = listener.accept()
+    listener.close()
+    return rsock, wsock
+
+
+class NotifyingQueue(Queue):
+
+    """ A send queue that wakes up the reactor on every put, so that the
+    reactor does not need to poll the queues of its client sockets. """
+
+    def __init__(self, wakeup):
+        Queue.__init__(self)
+        self.wakeup = wakeup
+
+    def put(self, item, block=True, timeout=None):
+        Queue.put(self, item, block, timeout)
+        self.wakeup()
+
+
+class Reactor(object):
+
+    """ The Reactor is a single event loop which owns the listening socket and
+    all client sockets of a Server. In contrast to one polling thread per
+    client socket, it only wakes up if:
+    1. a new client connects or a client socket is readable,
+    2. a client socket with pending output becomes writable,
+    3. a message is put on the send queue of a client socket.
+    Received messages are dispatched into the process() hooks of the client
+    sockets, i.e. on the reactor thread.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.selector = create_selector()
+        self.client_sockets = []
+        self.interest = {} # client_socket: registered events
+
+        self.wakeup_rsock, self.wakeup_wsock = socketpair()
+        self.wakeup_rsock.setblocking(0)
+        self.wakeup_wsock.setblocking(0)
+
+        self.selector.register(self.server.server, EVENT_READ)
+        self.selector.register(self.wakeup_rsock, EVENT_READ)
+
+    def stdout(self, msg):
+        print("REACTOR: %s" % msg)
+
+    def wakeup(self):
+        try:
+            self.wakeup_wsock.send(b"\x00")
+        except socket.error:
+            pass # the wakeup socket is full, so the reactor will wake up anyway
+
+    def add_client(self, client_socket):
+        client_socket.snd_queue = NotifyingQueue(self.wakeup)
+        self.client_sockets.append(client_socket)
+        self.interest[client_socket] = EVENT_READ
+        client_socket.socket.setblocking(0)
+        self.selector.register(client_socket.socket, EVENT_READ, client_socket)
+
+    def remove_client(self, client_socket):
+        if client_socket not in self.client_sockets:
+            return
+        self.client_sockets.remove(client_socket)
+        del self.interest[client_socket]
+        try:
+            self.selector.unregister(client_socket.socket)
+        except (KeyError, ValueError):
+            pass
+        self.server.remove_client(client_socket)
+        client_socket.socket.close()
+        client_socket.stdout("Closed.")
+
+    def run(self):
+        while self.server.running:
+            try:
+                events = self.selector.select()
+            except (select.error, socket.error, OSError) as e:
+                if e.args and e.args[0] == errno.EINTR:
+                    continue
+                raise
+
+            for key, mask in events:
+                if key.fileobj is self.server.server:
+                    self.accept()
+                elif key.fileobj is self.wakeup_rsock:
+                    self.drain_wakeup()
+                else:
+                    client_socket = key.data
+                    if mask & EVENT_READ:
+                        self.handle_read(client_socket)
+                    if mask & EVENT_WRITE and client_socket.running:
+                        self.handle_write(client_socket)
+
+            self.process_send_queues()
+            self.update_interest()
+
+        self.shutdown()
+
+    def accept(self):
+        try:
+            sock, address = self.server.server.accept()
+        except socket.error:
+            return
+        self.server.incoming_connection(sock, address)
+
+    def drain_wakeup(self):
+        try:
+            while self.wakeup_rsock.recv(4096):
+                pass
+        except socket.error:
+            pass
+
+    def handle_read(self, client_socket):
+        try:
+            client_socket.read()
+        except socket.error as e:
+            if e.errno in [errno.EWOULDBLOCK, errno.EAGAIN]:
+                return # spurious wakeup, nothing to read
+            client_socket.stdout("Is not available anymore: %s" % str(e))
+            client_socket.running = False
+        if not client_socket.running:
+            self.remove_client(client_socket)
+
+    def handle_write(self, client_socket):
+        try:
+            client_socket._flush()
+        except socket.error as e:
+            client_socket.stdout("Client has been disconnected: %s" % str(e))
+            client_socket.running = False
+            self.remove_client(client_socket)
+
+    def process_send_queues(self):
+        for client_socket in self.client_sockets[:]:
+            while client_socket.running:
+                try:
+                    msg_id, msg = client_socket.snd_queue.get_nowait()
+                except Empty:
+                    break
+                client_socket.send(msg_id, msg)
+            if not client_socket.running:
+                self.remove_client(client_socket)
+
+    def update_interest(self):
+        for client_socket in self.client_sockets:
+            events = EVENT_READ
+            if client_socket.snd_buffer:
+                events |= EVENT_WRITE
+            if self.interest[client_socket] != events:
+                self.interest[client_socket] = events
+                self.selector.modify(client_socket.socket, events, client_socket)
+
+    def shutdown(self):
+        # send whatever was queued before closing, e.g. MSG_QUIT
+        self.process_send_queues()
+        for client_socket in self.client_sockets[:]:
+            if client_socket.snd_buffer:
+                try:
+                    client_socket.socket.sendall(client_socket.snd_buffer)
+                except socket.error:
+                    pass
+            self.remove_client(client_socket)
+        self.selector.close()
+        self.wakeup_rsock.close()
+        self.wakeup_wsock.close()
@@ -0,0 +1,196 @@
+from __future__ import print_function
+import socket
+import struct
+import time
+from threading import Thread, Condition, Lock
+
+from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.capture import read_capture, command_counters, count_frame, SENT
+from .frame_decoder import FrameDecoder
+
+
+class ReplayClient(object):
+
+    """ Plays the client side of a capture back against a Server.
+
+    The captured frames of the client are sent with the original timing,
+    divided by speed (speed None: as fast as possible). With sync, a frame is
+    only sent when the Server has sent what the client had received before
+    this frame in the capture:
+
+    - MSG_COMMAND_EXECUTED with counter c is sent when command c of the same
+      program (i.e. since READY_TO_PROGRAM) is received, and also command c + 1
+      if it was received in the capture. Otherwise the Server could get
+      READY_TO_PROGRAM while the commands of the block are still queued.
+    - the other messages (e.g. float lists for Grasshopper, MSG_QUIT) are
+      counted by msg_id.
+
+    The captured MSG_COMMAND_RECEIVED are not replayed: like the robot, the
+    ReplayClient acknowledges the commands as soon as it receives them.
+
+    How the Server batches the commands depends on the timing, so the commands
+    are compared by number and not by frames.
+
+    After run, received and expected are the frames the Server sent in the
+    replay and in the capture, counted by msg_id (see count_frame), sent the
+    number of frames sent, and desyncs the number of frames which were sent
+    after sync_timeout without the expected frames of the Server.
+
+    With identifier, the client identifies itself with it instead of the
+    captured identifier.
+
+    Example:
+        replay = ReplayClient("capture_UR.bin", "127.0.0.1", 30003, speed=10.)
+        replay.connect_to_server()
+        replay.start()
+        ...
+        replay.join()
+    """
+
+    def __init__(self, path, host="127.0.0.1", port=30003, speed=1.0, sync=True, sync_timeout=5., identifier=None):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.sync = sync
+        self.sync_timeout = sync_timeout
+
+        self.records = read_capture(path)
+        self.byteorder = self.records[0][2] if self.records else "!"
+        if identifier is not None:
+            self.records = [self._replace_identifier(record, identifier) for record in self.records]
+
+        self.condition = Condition()
+        self.send_lock = Lock()
+        self.received = {}
+        self.program = 0 # the number of programs (command counter 1) received
+        self.counter = 0 # the counter of the last received command
+        self.expected = {}
+        self.sent = 0
+        self.desyncs = 0
+        self.running = False
+        self.socket = None
+
+    def _replace_identifier(self, record, identifier):
+        timestamp, direction, byteorder, msg_id, frame = record
+        if direction == SENT or msg_id != MSG_IDENTIFIER:
+            return record
+        identifier = identifier.encode("utf-8")
+        frame = struct.pack(byteorder + "2i", 4 + len(identifier), msg_id) + identifier
+        return timestamp, direction, byteorder, msg_id, frame
+
+    def connect_to_server(self):
+        self.socket = socket.create_connection((self.host, self.port))
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.running = True
+
+    def start(self):
+        self.receiving_thread = Thread(target=self.receive)
+        self.receiving_thread.daemon = True
+        self.receiving_thread.start()
+        self.sending_thread = Thread(target=self.replay)
+        self.sending_thread.daemon = True
+        self.sending_thread.start()
+
+    def join(self, timeout=None):
+        self.sending_thread.join(timeout)
+        self.receiving_thread.join(timeout)
+
+    def run(self):
+        self.connect_to_server()
+        self.start()
+        self.join()
+
+    def receive(self):
+        decoder = FrameDecoder(self.byteorder)
+        while self.running:
+            try:
+                if not decoder.recv_from(self.socket):
+                    break
+            except socket.error:
+                break
+            with self.condition:
+                commands = False
+                for msg_length, msg_id, raw_msg in decoder.frames():
+                    count_frame(self.received, msg_id, raw_msg, self.byteorder)
+                    for counter in command_counters(msg_id, raw_msg, self.byteorder):
+                        if counter == 1:
+                            self.program += 1
+                        self.counter = counter
+                        commands = True
+                if commands:
+                    # acknowledge before the commands can be executed
+                    self._send(struct.pack(self.byteorder + "3i", 8, MSG_COMMAND_RECEIVED, self.counter))
+                self.condition.notify_all()
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def _synced(self, expected, program, counter):
+        # must be called with the condition
+        for msg_id, number in expected.items():
+            if msg_id != MSG_COMMAND and self.received.get(msg_id, 0) < number:
+                return False
+        return self.program > program or (self.program == program and self.counter >= counter)
+
+    def _wait(self, expected, program, counter):
+        end_time = time.time() + self.sync_timeout
+        with self.condition:
+            while self.running and not self._synced(expected, program, counter):
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    self.desyncs += 1
+                    return
+                self.condition.wait(remaining)
+
+    def replay(self):
+        expected = {}
+        program = 0
+        counter = 0
+        start_time = time.time()
+        first_time = self.records[0][0] if self.records else 0
+        for timestamp, direction, byteorder, msg_id, frame in self.records:
+            if direction == SENT:
+                count_frame(expected, msg_id, frame[8:], byteorder)
+                for counter in command_counters(msg_id, frame[8:], byteorder):
+                    if counter == 1:
+                        program += 1
+                continue
+            if msg_id == MSG_COMMAND_RECEIVED:
+                continue
+            if self.speed:
+                delay = (timestamp - first_time) / self.speed - (time.time() - start_time)
+                if delay > 0:
+                    time.sleep(delay)
+            if self.sync and msg_id == MSG_COMMAND_EXECUTED:
+                # the next command if it was received, otherwise the Server gets READY_TO_PROGRAM
+                executed = struct.unpack_from(byteorder + "i", frame, 8)[0]
+                self._wait(expected, program, min(counter, executed + 1))
+            elif self.sync:
+                self._wait(expected, program, 0)
+            if not self.running:
+                break
+            if not self._send(frame):
+                break
+        self.expected = expected
+        # wait until the server has sent everything (e.g. MSG_QUIT), then close
+        if self.sync:
+            self._wait(expected, program, 0)
+        self.close()
+
+    def _send(self, frame):
+        with self.send_lock:
+            try:
+                self.socket.sendall(frame)
+            except socket.error:
+                return False
+            self.sent += 1
+            return True
+
+    def close(self):
+        self.running = False
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.socket.close()
@@ -13,6 +13,7 @@ import sys
 
 from .base_client_socket import *
 from .actuator_socket import *
+from .reactor import Reactor
 
 if (sys.version_info > (3, 0)):
     python_version = 3
@@ -20,15 +21,47 @@ else:
     python_version = 2
 
 
+# the client socket classes of the client types, see register_client_socket
+CLIENT_SOCKETS = {"UR": URSocket}
+
+
+def register_client_socket(client_type, cls):
+    """ Registers the client socket class for a client type, e.g. "UR": URSocket. """
+    CLIENT_SOCKETS[client_type] = cls
+
 
 class Server(object):
 
-    def __init__(self, address = '127.0.0.1', port = 30003):
+    """ The Server accepts the connections of the clients and creates a client
+    socket for each of them. By default, all sockets are handled by a single
+    Reactor (event loop). With reactor = False, every client socket runs its own
+    polling thread instead.
+
+    The client socket class is chosen by the ip of the client: client_ips maps
+    the client names to their ips, client_types the names to the client types
+    (by default the name itself), and CLIENT_SOCKETS the client types to the
+    socket classes. Clients with unknown ips get a BaseClientSocket.
+
+    If telemetry_path is set (e.g. "fabrication_%s.telemetry", %s is replaced by
+    the identifier), the ActuatorSockets record their telemetry to it. If
+    capture_path is set, the traffic of all clients is captured, see ReplayClient.
+
+    Example:
+        server.add_client("UR1", "192.168.10.11", "UR")
+        server.add_client("UR2", "192.168.10.13", "UR")
+    """
+
+    def __init__(self, address = '127.0.0.1', port = 30003, reactor = True, telemetry_path = None, capture_path = None):
 
         self.address = address
         self.port = port
+        self.use_reactor = reactor
+        self.reactor = None
         self.client_sockets = []
         self.client_ips = {}
+        self.client_types = {}
+        self.telemetry_path = telemetry_path
+        self.capture_path = capture_path
         self.input = []
         self.running = False
         self.notification_messages = []
@@ -41,6 +74,8 @@ class Server(object):
         self.server.bind((self.address, self.port))
         self.server.listen(backlog)
         self.input = [self.server]
+        if self.use_reactor:
+            self.reactor = Reactor(self)
         self.stdout("Running on address %s and port %d." % (self.address, self.port))
         self.running = True
 
@@ -55,20 +90,36 @@ class Server(object):
         self.running_thread.daemon = False
         self.running_thread.start()
 
+    def add_client(self, name, ip, client_type=None):
+        """ Expects a client of the type client_type (default: name) from ip. """
+        self.client_ips[name] = ip
+        self.client_types[name] = client_type or name
+
+    def get_client_socket_class(self, ip):
+        if python_version == 2:
+            names = [name for name, client_ip in self.client_ips.iteritems() if client_ip == ip]
+        else:
+            names = [name for name, client_ip in self.client_ips.items() if client_ip == ip]
+        # several clients can run on the same ip (e.g. simulators), but they must be of the same type
+        classes = set(CLIENT_SOCKETS.get(self.client_types.get(name, name)) for name in names)
+        if len(classes) > 1:
+            self.stdout("Clients %s of different types on %s." % (", ".join(sorted(names)), ip))
+        if None in classes:
+            self.stdout("No client socket registered for %s." % ", ".join(sorted(names)))
+            classes.discard(None)
+        return classes.pop() if classes else BaseClientSocket
+
     def create_client_socket(self, sock, ip):
         # This method can be overwritten to specify the client socket
-        if ip in self.client_ips.values():
-            if python_version == 2:
-                inv_map = {v: k for k, v in self.client_ips.iteritems()}
-            else:
-                inv_map = {v: k for k, v in self.client_ips.items()}
-            print("%sSocket(sock, ip, self)" % inv_map[ip])
-            client_socket = eval("%sSocket(sock, ip, self)" % inv_map[ip])
-        else:
-            client_socket = BaseClientSocket(sock, ip, self)
-        return client_socket
+        cls = self.get_client_socket_class(ip)
+        return cls(sock, ip, self)
 
     def run(self):
+        if self.reactor:
+            self.reactor.run()
+            self.server.close()
+            return
+
         timeout = 0.008
 
         while self.running:
@@ -107,9 +158,15 @@ class Server(object):
         ip, port = address
         self.stdout("________________incoming connection from %s, at port %d. " % (ip, port))
 
+        # the messages are small and mostly answered, do not wait for more data to send (Nagle)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
         self.input.append(sock)
         client_socket = self.create_client_socket(sock, ip)
-        client_socket.start()
+        if self.reactor:
+            self.reactor.add_client(client_socket)
+        else:
+            client_socket.start()
         self.client_sockets.append(client_socket)
         self.update()
 
@@ -117,13 +174,17 @@ class Server(object):
         try:
             self.input.remove(client_socket.socket)
             self.client_sockets.remove(client_socket)
+            client_socket.close() # closes the capture and telemetry files
             self.stdout("Removed client %s" % client_socket.identifier)
         except ValueError:
             pass
 
     def close(self):
         self.running = False
-        self.server.close()
+        if self.reactor:
+            self.reactor.wakeup() # the reactor closes the sockets itself
+        else:
+            self.server.close()
         try:
             self.running_thread.join()
             self.stdout("Close done.")
@@ -3,66 +3,520 @@ Created on 21.10.2017
 
 @author: rustr
 '''
-from base_client import BaseClient
+from __future__ import print_function
+from .base_client import BaseClient
 from ur_online_control.communication.msg_identifiers import *
+from ur_online_control.communication.msg_codecs import BATCH_COMMAND_SIZE
+import math
+import socket
 import time
-import struct
+from collections import deque
+from threading import Thread, Condition, Lock, Event, current_thread
+
+try:
+    # without the ur package, only the poses of the commands are simulated
+    from ur_online_control.ur.kinematics.ur_kin_ros import forward_ros, inverse_ros
+except ImportError:
+    forward_ros, inverse_ros = None, None
+
+MAX_PUBLISH_RATE = 125 # Hz, as in the URScript
+MULT = 100000.0 # the floats are sent multiplied with MULT
+MM2M = 1000.0
+
+# see ur/ur5.py and ur/ur10.py, in mm
+UR5_PARAMS = [89.159, -425.0, -392.25, 109.15, 94.65, 82.3]
+UR10_PARAMS = [127.3, -612.0, -572.3, 163.941, 115.7, 92.2]
+HOME_JOINTS = [0., -math.pi / 2, math.pi / 2, -math.pi / 2, -math.pi / 2, 0.]
+
+# the defaults of movel and movej in the URScript
+MOVEL_ACC = 1200. # mm/s2
+MOVEL_VEL = 250. # mm/s
+MOVEJ_ACC = 1.4 # rad/s2
+MOVEJ_VEL = 1.05 # rad/s
+# the joint limits, also for movel
+MAX_JOINT_ACC = 15. # rad/s2
+MAX_JOINT_VEL = math.pi # rad/s
+
+DIGITAL_IN = [0, 1, 2, 3, 4, 5, 6, 7] # the digital inputs which are published
+
+
+def pose_to_matrix(pose):
+    """ [x, y, z, ax, ay, az] (axis-angle, like the poses of the URScript) to a 4x4 matrix. """
+    x, y, z, ax, ay, az = pose
+    angle = math.sqrt(ax * ax + ay * ay + az * az)
+    if angle < 1e-12:
+        R = [[1., 0., 0.], [0., 1., 0.], [0., 0., 1.]]
+    else:
+        kx, ky, kz = ax / angle, ay / angle, az / angle
+        c, s = math.cos(angle), math.sin(angle)
+        t = 1. - c
+        R = [[t * kx * kx + c, t * kx * ky - s * kz, t * kx * kz + s * ky],
+             [t * kx * ky + s * kz, t * ky * ky + c, t * ky * kz - s * kx],
+             [t * kx * kz - s * ky, t * ky * kz + s * kx, t * kz * kz + c]]
+    return [R[0] + [x], R[1] + [y], R[2] + [z], [0., 0., 0., 1.]]
+
+
+def rotation_to_axis_angle(R):
+    """ The axis-angle vector of the rotation of a 4x4 (or 3x3) matrix. """
+    c = max(-1., min(1., (R[0][0] + R[1][1] + R[2][2] - 1.) / 2.))
+    angle = math.acos(c)
+    if angle < 1e-12:
+        return [0., 0., 0.]
+    if math.pi - angle < 1e-6:
+        # the axis from the diagonal, sin(angle) is 0
+        k = [math.sqrt(max(0., (R[i][i] + 1.) / 2.)) for i in range(3)]
+        i = k.index(max(k))
+        for j in range(3):
+            if j != i:
+                k[j] = math.copysign(k[j], R[i][j] + R[j][i])
+        return [angle * v for v in k]
+    s = 2. * math.sin(angle)
+    return [angle * (R[2][1] - R[1][2]) / s, angle * (R[0][2] - R[2][0]) / s, angle * (R[1][0] - R[0][1]) / s]
+
+
+def matrix_to_pose(T):
+    return [T[0][3], T[1][3], T[2][3]] + rotation_to_axis_angle(T)
+
+
+def multiply_matrices(A, B):
+    return [[sum(A[i][k] * B[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+
+
+def invert_matrix(T):
+    """ The inverse of a rigid transformation. """
+    R = [[T[j][i] for j in range(3)] for i in range(3)]
+    p = [-sum(R[i][k] * T[k][3] for k in range(3)) for i in range(3)]
+    return [R[0] + [p[0]], R[1] + [p[1]], R[2] + [p[2]], [0., 0., 0., 1.]]
+
+
+def trapezoid(distance, v, a):
+    """ Returns the duration and the acceleration time of a move with a
+    trapezoidal velocity profile. """
+    if distance <= 0 or v <= 0:
+        return 0., 0.
+    if a <= 0 or distance >= v * v / a:
+        ta = v / a if a > 0 else 0.
+        return distance / v + ta, ta
+    ta = math.sqrt(distance / a)
+    return 2. * ta, ta
+
+
+class Motion(object):
+
+    """ A move from the start to the target joints and tool pose, with a
+    trapezoidal velocity profile, for the published state during the move. """
+
+    def __init__(self, start_time, duration, ta, joints, target_joints, pose, target_pose, linear):
+        self.start_time = start_time # real time
+        self.duration = duration # real seconds
+        self.ta = min(ta, duration / 2.)
+        self.joints = joints
+        self.target_joints = target_joints
+        self.pose = pose # matrices
+        self.target_pose = target_pose
+        self.linear = linear # movel: the tool pose is interpolated, otherwise the joints
+
+    def fraction(self, now):
+        """ The fraction of the path at the time now. """
+        t = now - self.start_time
+        T, ta = self.duration, self.ta
+        if t >= T or T <= 0:
+            return 1.
+        if t <= 0:
+            return 0.
+        if ta <= 0:
+            return t / T
+        v = 1. / (T - ta)
+        a = v / ta
+        if t < ta:
+            return 0.5 * a * t * t
+        if t < T - ta:
+            return 0.5 * a * ta * ta + v * (t - ta)
+        return 1. - 0.5 * a * (T - t) * (T - t)
+
+    def joints_at(self, s):
+        return [q0 + s * (q1 - q0) for q0, q1 in zip(self.joints, self.target_joints)]
+
+    def pose_at(self, s):
+        p0, p1 = self.pose, self.target_pose
+        R0t = [[p0[j][i] for j in range(3)] for i in range(3)]
+        R = [[sum(R0t[i][k] * p1[k][j] for k in range(3)) for j in range(3)] for i in range(3)]
+        axis_angle = [s * v for v in rotation_to_axis_angle(R)]
+        T = multiply_matrices([row[:3] + [0.] for row in p0[:3]] + [[0., 0., 0., 1.]], pose_to_matrix([0., 0., 0.] + axis_angle))
+        for i in range(3):
+            T[i][3] = p0[i][3] + s * (p1[i][3] - p0[i][3])
+        return T
+
 
 class URClient(BaseClient):
-    
-    def __init__(self, host = '127.0.0.1', port = 30003): 
-        super(URClient, self).__init__("UR", host, port)
+
+    """ Simulates a UR with the program of ur_driver/templates.
+
+    The commands are buffered (buffer_size, MAX_BUFFER_SIZE in the URScript),
+    acknowledged with MSG_COMMAND_RECEIVED, executed by a thread and
+    acknowledged with MSG_COMMAND_EXECUTED. While the buffer is full, no
+    messages are read. The state (tool pose, joints, digital inputs) is
+    published with publish_rate, also during the moves, and sent on request.
+    Digital outputs, MSG_SPEED, set_tcp, wait and popup are simulated.
+
+    The duration of movel and movej is computed from the distance, speed and
+    acceleration (trapezoidal velocity profile, blending is not simulated);
+    movel follows the tool path, limited by the joint speed. With the
+    kinematics (forward_ros, inverse_ros of the ur package) the joints of a movel
+    and the tool pose of a movej are computed, the inverse kinematics
+    solution closest to the current joints is used. Without, only the pose
+    of the command is updated.
+
+    time_scale > 1 runs faster than real time, e.g. 10: the moves take a
+    tenth, and the state is published 10 times as often (in real time, but
+    at most with MAX_PUBLISH_RATE).
+    With execution_time, every command takes execution_time simulated seconds
+    instead (scaled by time_scale like the moves).
+    simulated_time is the duration of the executed commands in simulated
+    seconds.
+
+    Many instances can run in one process, with different identifiers.
+
+    Args:
+        publish_rate (int): Hz, 0: the state is not published.
+        ur_params (list): the parameters of the kinematics, UR5_PARAMS or UR10_PARAMS.
+        joints (list): the initial joints, HOME_JOINTS by default.
+        popup_time (float): the seconds until a popup is confirmed.
+    """
+
+    def __init__(self, host = '127.0.0.1', port = 30003, buffer_size = 5, execution_time = None, identifier = "UR",
+                 publish_rate = 0, time_scale = 1.0, ur_params = UR5_PARAMS, joints = None, popup_time = 0., verbose = True):
+        super(URClient, self).__init__(identifier, host, port)
         self.ghenv = None
-    
+        self.buffer_size = buffer_size
+        self.execution_time = execution_time # seconds per command, None: simulated
+        self.publish_rate = publish_rate
+        self.time_scale = time_scale
+        self.ur_params = ur_params
+        self.popup_time = popup_time
+        self.verbose = verbose
+
+        self.buffer = deque() # [command_id, counter, values]
+        self.buffer_condition = Condition()
+        self.send_lock = Lock()
+        self.stopped = Event()
+
+        self.global_speed = 1.0
+        self.digital_in = dict((number, 0) for number in DIGITAL_IN)
+        self.digital_out = {}
+        self.tcp = pose_to_matrix([0.] * 6)
+        self.joints = list(joints or HOME_JOINTS)
+        self.pose = self.forward_kinematics(self.joints) if forward_ros else pose_to_matrix([0.] * 6) # the tcp
+        self.motion = None
+        self.simulated_time = 0.
+        self.unreachable = 0
+
     def stdout(self, msg):
-        print(msg)
-    
+        if self.verbose:
+            print("%s: %s" % (self.identifier, str(msg)))
+
+    # kinematics, with the conventions of ur/kinematics/ur_kinematics.py and ur/ur5.py
+
+    def forward_kinematics(self, joints):
+        """ Returns the tcp (4x4 matrix, mm) of the joints. """
+        q = list(joints)
+        q[0] += math.pi
+        q[5] += math.pi
+        T = forward_ros(q, self.ur_params)
+        flange = [[T[1], T[2], T[0], T[3]], [T[5], T[6], T[4], T[7]], [T[9], T[10], T[8], T[11]], [0., 0., 0., 1.]]
+        return multiply_matrices(flange, self.tcp)
+
+    def inverse_kinematics(self, pose):
+        """ Returns the joints of the tcp pose (4x4 matrix) closest to the
+        current joints, or None if the pose is not reachable. """
+        F = multiply_matrices(pose, invert_matrix(self.tcp))
+        T = [F[0][2], F[0][0], F[0][1], F[0][3],
+             F[1][2], F[1][0], F[1][1], F[1][3],
+             F[2][2], F[2][0], F[2][1], F[2][3],
+             0., 0., 0., 1.]
+        try:
+            solutions = inverse_ros(T, self.ur_params)
+        except (ZeroDivisionError, ValueError):
+            return None
+        best, best_distance = None, None
+        for q in solutions:
+            q = list(q)
+            q[0] -= math.pi
+            q[5] -= math.pi
+            # the closest equivalent angle (+- 2 pi) to the current joints
+            q = [a + 2 * math.pi * round((b - a) / (2 * math.pi)) for a, b in zip(q, self.joints)]
+            distance = sum(abs(a - b) for a, b in zip(q, self.joints))
+            if best is None or distance < best_distance:
+                best, best_distance = q, distance
+        return best
+
+    # the state
+
+    def current_state(self):
+        """ Returns the current (pose, joints), during a move interpolated. """
+        motion = self.motion
+        if motion is None:
+            return self.pose, self.joints
+        s = motion.fraction(time.time())
+        joints = motion.joints_at(s)
+        if motion.linear:
+            return motion.pose_at(s), joints
+        elif forward_ros:
+            return self.forward_kinematics(joints), joints
+        return self.pose, joints
+
+    def set_digital_in(self, number, value):
+        """ Simulates a signal on a digital input. """
+        self.digital_in[number] = int(bool(value))
+
+    # the threads
+
+    def send_id(self):
+        super(URClient, self).send_id()
+        self._send(MSG_BUFFER_SIZE, self.buffer_size)
+        self._send(MSG_PUBLISH_RATE, self.publish_rate)
+
+    def start(self):
+        super(URClient, self).start()
+        self.execute_thread = Thread(target = self.execute_from_buffer)
+        self.execute_thread.daemon = True
+        self.execute_thread.start()
+        self.publish_thread = Thread(target = self.publish_state)
+        self.publish_thread.daemon = True
+        self.publish_thread.start()
+
+    def close(self):
+        self.stopped.set()
+        with self.buffer_condition:
+            self.running = False
+            self.buffer_condition.notify_all()
+        super(URClient, self).close()
+        for thread in [getattr(self, "execute_thread", None), getattr(self, "publish_thread", None)]:
+            if thread is not None and thread is not current_thread():
+                thread.join(1.)
+
+    def sleep(self, seconds):
+        """ Sleeps the simulated seconds, returns False if closed. """
+        self.simulated_time += seconds
+        return not self.stopped.wait(seconds / self.time_scale)
+
+    def publish_state(self):
+        """ Like thread_publish_state in the URScript. """
+        while self.running:
+            if self.publish_rate > 0:
+                pose, joints = self.current_state()
+                self._send(MSG_CURRENT_POSE_CARTESIAN, [int(round(v * MULT)) for v in matrix_to_pose(pose)])
+                self._send(MSG_CURRENT_POSE_JOINT, [int(round(q * MULT)) for q in joints])
+                self._send(MSG_CURRENT_DIGITAL_IN)
+                self.stopped.wait(max(1.0 / self.publish_rate / self.time_scale, 1.0 / MAX_PUBLISH_RATE))
+            else:
+                self.stopped.wait(0.1)
+
+    def execute_from_buffer(self):
+        """ Like thread_execute_from_buffer in the URScript. """
+        while self.running:
+            with self.buffer_condition:
+                while self.running and not len(self.buffer):
+                    self.buffer_condition.wait(0.1)
+                if not self.running:
+                    break
+                cmd = self.buffer[0]
+            self.execute(cmd)
+            if not self.running:
+                break
+            self.send_command_executed(cmd[1])
+            with self.buffer_condition:
+                self.buffer.popleft()
+                self.buffer_condition.notify_all()
+
+    def add_to_buffer(self, cmd):
+        with self.buffer_condition:
+            self.buffer.append(cmd)
+            self.buffer_condition.notify_all()
+
+    def wait_for_buffer(self):
+        """ Waits until a command fits into the buffer, returns False if closed. """
+        with self.buffer_condition:
+            while self.running and len(self.buffer) >= self.buffer_size:
+                self.buffer_condition.wait(0.1)
+        return self.running
+
+    # the commands
+
+    def execute(self, cmd):
+        """ [command_id, counter, values] """
+        command_id = cmd[0]
+        if self.execution_time is not None:
+            self.sleep(self.execution_time)
+            if command_id == COMMAND_ID_MOVEL:
+                self.pose = pose_to_matrix(self._pose_mm(cmd[2:8]))
+            elif command_id == COMMAND_ID_MOVEJ:
+                self.joints = [q / MULT for q in cmd[2:8]]
+        elif command_id == COMMAND_ID_MOVEL:
+            acc, vel, rad, t = [v / (MM2M * MULT) for v in cmd[8:11]] + [cmd[11] / MULT]
+            self.movel(self._pose_mm(cmd[2:8]), acc * MM2M, vel * MM2M * self.global_speed, t)
+        elif command_id == COMMAND_ID_MOVEJ:
+            acc, vel, rad, t = [v / (MM2M * MULT) for v in cmd[8:11]] + [cmd[11] / MULT]
+            self.movej([q / MULT for q in cmd[2:8]], acc, vel * self.global_speed, t)
+        elif command_id == COMMAND_ID_DIGITAL_OUT:
+            self.digital_out[cmd[2]] = cmd[3] == 1
+        elif command_id == COMMAND_ID_WAIT:
+            self.sleep(cmd[2] / MULT)
+        elif command_id == COMMAND_ID_TCP:
+            self.tcp = pose_to_matrix(self._pose_mm(cmd[2:8]))
+            if forward_ros:
+                self.pose = self.forward_kinematics(self.joints)
+        else: # COMMAND_ID_POPUP, blocking
+            self.stdout("Popup")
+            self.sleep(self.popup_time)
+
+    def _pose_mm(self, values):
+        return [v / MULT for v in values]
+
+    def _move(self, duration, ta, target_joints, target_pose, linear):
+        self.motion = Motion(time.time(), duration / self.time_scale, ta / self.time_scale, self.joints, target_joints, self.pose, target_pose, linear)
+        completed = self.sleep(duration)
+        self.joints, self.pose, self.motion = target_joints, target_pose, None
+        return completed
+
+    def movel(self, pose, acc, vel, t):
+        """ pose in mm, acc and vel in mm/s2 and mm/s, t in s (if vel is 0). """
+        target_pose = pose_to_matrix(pose)
+        target_joints = self.joints
+        if inverse_ros:
+            target_joints = self.inverse_kinematics(target_pose)
+            if target_joints is None:
+                self.stdout("Pose not reachable: %s" % pose)
+                self.unreachable += 1
+                target_joints = self.joints
+        if vel != 0:
+            distance = math.sqrt(sum((target_pose[i][3] - self.pose[i][3]) ** 2 for i in range(3)))
+            duration, ta = trapezoid(distance, vel, acc or MOVEL_ACC)
+            joint_distance = max(abs(a - b) for a, b in zip(target_joints, self.joints))
+            joint_duration, joint_ta = trapezoid(joint_distance, MAX_JOINT_VEL, MAX_JOINT_ACC)
+            if joint_duration > duration:
+                duration, ta = joint_duration, joint_ta
+        else:
+            duration, ta = t, t / 4.
+        self._move(duration, ta, target_joints, target_pose, True)
+
+    def movej(self, joints, acc, vel, t):
+        """ joints in rad, acc and vel in rad/s2 and rad/s, t in s (if vel is 0). """
+        target_pose = self.forward_kinematics(joints) if forward_ros else self.pose
+        if vel != 0:
+            distance = max(abs(a - b) for a, b in zip(joints, self.joints))
+            duration, ta = trapezoid(distance, vel, acc or MOVEJ_ACC)
+        else:
+            duration, ta = t, t / 4.
+        self._move(duration, ta, joints, target_pose, False)
+
+    # the messages
+
+    def _send(self, msg_id, msg = None):
+        # from the receiving, executing and publishing thread
+        with self.send_lock:
+            try:
+                super(URClient, self)._send(msg_id, msg)
+            except socket.error:
+                if self.running:
+                    raise # otherwise closed meanwhile
+
     def send_command_received(self, counter):
         self._send(MSG_COMMAND_RECEIVED, counter)
-            
+
     def send_command_executed(self, counter):
         self._send(MSG_COMMAND_EXECUTED, counter)
-        
+
     def _format_other_messages(self, msg_id, msg = None):
-        if msg_id == MSG_COMMAND_RECEIVED or msg_id == MSG_COMMAND_EXECUTED:
-            msg_snd_len = 4 + 4
-            params = [msg_snd_len, msg_id, msg]
-            buf = struct.pack(self.byteorder + "3i", *params)
-            return buf
-    
+        if msg_id in [MSG_COMMAND_RECEIVED, MSG_COMMAND_EXECUTED, MSG_BUFFER_SIZE, MSG_PUBLISH_RATE]:
+            codec = self.codecs.msg[msg_id]
+            return codec.pack(codec.msg_length, msg_id, msg)
+        elif msg_id in [MSG_CURRENT_POSE_CARTESIAN, MSG_CURRENT_POSE_JOINT]:
+            codec = self.codecs.ints(8)
+            return codec.pack(codec.msg_length, msg_id, *msg)
+        elif msg_id == MSG_CURRENT_DIGITAL_IN:
+            # [number, value] for all published inputs
+            values = []
+            for number in DIGITAL_IN:
+                values += [number, self.digital_in[number]]
+            codec = self.codecs.ints(2 + len(values))
+            return codec.pack(codec.msg_length, msg_id, *values)
+        elif msg_id == MSG_DIGITAL_IN:
+            codec = self.codecs.ints(4)
+            return codec.pack(codec.msg_length, msg_id, msg, self.digital_in.get(msg, 0))
+
     def _process_other_messages(self, msg_len, msg_id, raw_msg):
         if msg_id == MSG_COMMAND:
-            
-            """
-            msg_length = rcv[1]
-            msg_id = rcv[2]
-            if msg_id == MSG_COMMAND:
-            rcv2 = socket_read_binary_integer(2)
-            msg_command_id = rcv2[1]
-            command_counter = rcv2[2]
-            
-            msg_float_tuple = struct.unpack_from(self.byteorder + str((msg_len-4)/4) + "f", raw_msg)
-            """
-            self.stdout("Received MSG_COMMAND")
-            msg = struct.unpack_from(self.byteorder + "%ii" % int((msg_len-4)/4), raw_msg)
-            cmd_id = msg[0]
-            counter = msg[1]
-            print(counter)
-            self.send_command_received(counter)
-            time.sleep(0.5)
-            self.send_command_executed(counter)
+            # read_and_identify reads only if the buffer is not full
+            msg = self.codecs.ints((msg_len-4)//4).unpack_from(raw_msg)
+            self.stdout("Received MSG_COMMAND %i" % msg[1])
+            if not self.wait_for_buffer():
+                return
+            self.send_command_received(msg[1])
+            self.add_to_buffer(msg)
+        elif msg_id == MSG_COMMAND_BATCH:
+            # [number, number * [command_id, counter, 10 values]], one cumulative acknowledgement
+            msg = self.codecs.ints((msg_len-4)//4).unpack_from(raw_msg)
+            number = msg[0]
+            cmds = [msg[1 + i * BATCH_COMMAND_SIZE:1 + (i + 1) * BATCH_COMMAND_SIZE] for i in range(number)]
+            self.stdout("Received MSG_COMMAND_BATCH %s" % [cmd[1] for cmd in cmds])
+            for i, cmd in enumerate(cmds):
+                if len(self.buffer) >= self.buffer_size:
+                    # acknowledge the commands which are already in the buffer
+                    if i > 0:
+                        self.send_command_received(cmds[i - 1][1])
+                    if not self.wait_for_buffer():
+                        return
+                self.add_to_buffer(cmd)
+            self.send_command_received(cmds[-1][1])
+        elif msg_id in [MSG_CURRENT_POSE_CARTESIAN, MSG_CURRENT_POSE_JOINT]:
+            pose, joints = self.current_state()
+            values = matrix_to_pose(pose) if msg_id == MSG_CURRENT_POSE_CARTESIAN else joints
+            self._send(msg_id, [int(round(v * MULT)) for v in values])
+        elif msg_id == MSG_DIGITAL_IN:
+            self._send(MSG_DIGITAL_IN, self.codecs.counter.unpack_from(raw_msg)[0])
+        elif msg_id == MSG_DIGITAL_OUT:
+            number, value = self.codecs.ints(2).unpack_from(raw_msg)
+            self.digital_out[number] = value == 1
+        elif msg_id == MSG_SPEED:
+            self.global_speed = self.codecs.counter.unpack_from(raw_msg)[0] / MULT
+            self.stdout("Set GLOBAL_SPEED")
+        elif msg_id == MSG_PUBLISH_RATE:
+            rate = self.codecs.counter.unpack_from(raw_msg)[0]
+            self.publish_rate = max(0, min(MAX_PUBLISH_RATE, rate))
+            self._send(MSG_PUBLISH_RATE, self.publish_rate)
         else:
             self.stdout("Message identifier unknown: %d, message: %s" % (msg_id, raw_msg))
 
-                
+
 if __name__ == "__main__":
-    server_address = "192.168.10.12"
+    # 4 simulated robots, 10 times faster than real time
+    from ur_online_control.communication.server import Server
+    from ur_online_control.communication.client_wrapper import ClientWrapper
+
     server_address = "127.0.0.1"
     server_port = 30003
-    client = URClient(server_address, server_port)
-    client.connect_to_server()    
-    client.start()
-    #client.send(MSG_FLOAT_LIST, [1.2, 3.6, 4, 6, 7])
-    #client.send(MSG_INT, 1)
-    #client.send(MSG_FLOAT_LIST, [1.2, 3.6, 4, 6, 7])
-    
\ No newline at end of file
+    identifiers = ["UR%i" % i for i in range(4)]
+    server = Server(server_address, server_port)
+    for identifier in identifiers:
+        server.add_client(identifier, server_address, "UR")
+    server.start()
+    robots = [URClient(server_address, server_port, identifier=identifier, time_scale=10., publish_rate=20, verbose=False) for identifier in identifiers]
+    for robot in robots:
+        robot.connect_to_server()
+        robot.start()
+
+    start = time.time()
+    wrappers = [ClientWrapper(identifier) for identifier in identifiers]
+    for ur in wrappers:
+        ur.wait_for_connected()
+        for i in range(10):
+            ur.send_command_movel([-300. + 20 * i, 400., 300., 0., 3.14, 0.], v=100.)
+        ur.send_command_digital_out(0, True)
+    for ur in wrappers:
+        ur.wait_for_ready()
+    print("%.2f simulated seconds in %.2f seconds" % (max(robot.simulated_time for robot in robots), time.time() - start))
+    for ur in wrappers:
+        ur.quit()
+    time.sleep(0.5)
+    server.close()
@@ -7,4 +7,9 @@ Created on 10.10.2017
 READY_TO_PROGRAM = 1 # the buffer of the robot is empty, he is ready to receive commands (number = stacksize)
 EXECUTING = 2 # the robot is executing the command
 READY_TO_RECEIVE = 3 # the buffer of the robot has space, he is ready to receive the next command
-COMMAND_EXECUTED = 6
\ No newline at end of file
+COMMAND_EXECUTED = 6
+
+# the allowed state transitions of an ActuatorSocket
+STATE_TRANSITIONS = {READY_TO_PROGRAM: [READY_TO_PROGRAM, EXECUTING],
+                     EXECUTING: [EXECUTING, READY_TO_RECEIVE],
+                     READY_TO_RECEIVE: [READY_TO_RECEIVE, EXECUTING, READY_TO_PROGRAM]}
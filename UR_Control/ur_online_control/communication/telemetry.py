@@ -0,0 +1,126 @@
+'''
+Recording of the telemetry of an actuator (current poses and executed
+commands) in a binary file, for the analysis after a fabrication run.
+
+The file has a header of HEADER_SIZE bytes and fixed-width records:
+    time (float64), channel (int32, the msg_id), counter (int32), 6 values (float64)
+For MSG_CURRENT_POSE_CARTESIAN and MSG_CURRENT_POSE_JOINT the counter is the
+number of executed commands, for MSG_COMMAND_EXECUTED the counter of the
+command and the values the last cartesian pose.
+'''
+import mmap
+import os
+import struct
+import time
+from threading import Lock
+
+from ur_online_control.communication.msg_identifiers import *
+
+MAGIC = b"URTL"
+VERSION = 1
+HEADER = struct.Struct("<4siiqd4x") # magic, version, record size, number of records, start time
+HEADER_SIZE = HEADER.size # 32
+RECORD = struct.Struct("<dii6d")
+RECORD_SIZE = RECORD.size # 64
+COUNT_OFFSET = 12 # of the number of records in the header
+COUNT = struct.Struct("<q")
+
+
+class TelemetryRecorder(object):
+
+    """ Appends the records to a preallocated, memory-mapped file. Writing a
+    record is a pack_into the mapped memory, the operating system writes the
+    pages to the file, also if the process crashes. If the file is full, its
+    capacity is doubled.
+
+    Args:
+        path (str): the file, it is overwritten.
+        capacity (int): the number of records that are preallocated.
+    """
+
+    def __init__(self, path, capacity=1000000):
+        self.path = path
+        self.capacity = capacity
+        self.count = 0
+        self.lock = Lock()
+        self.file = open(path, "w+b")
+        self.file.truncate(HEADER_SIZE + capacity * RECORD_SIZE)
+        self.mmap = mmap.mmap(self.file.fileno(), 0)
+        HEADER.pack_into(self.mmap, 0, MAGIC, VERSION, RECORD_SIZE, 0, time.time())
+
+    def _grow(self):
+        # must be called with the lock
+        self.mmap.flush()
+        self.mmap.close()
+        self.capacity += self.capacity
+        self.file.truncate(HEADER_SIZE + self.capacity * RECORD_SIZE)
+        self.mmap = mmap.mmap(self.file.fileno(), 0)
+
+    def record(self, channel, counter, values, timestamp=None):
+        """ Appends a record, values are 6 floats. """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            if self.mmap is None:
+                return
+            if self.count == self.capacity:
+                self._grow()
+            RECORD.pack_into(self.mmap, HEADER_SIZE + self.count * RECORD_SIZE, timestamp, channel, counter, *values)
+            self.count += 1
+            COUNT.pack_into(self.mmap, COUNT_OFFSET, self.count)
+
+    def close(self):
+        """ Truncates the file to the recorded records. """
+        with self.lock:
+            if self.mmap is None:
+                return
+            self.mmap.flush()
+            self.mmap.close()
+            self.mmap = None
+            self.file.truncate(HEADER_SIZE + self.count * RECORD_SIZE)
+            self.file.close()
+
+    def __len__(self):
+        return self.count
+
+
+def read_header(path):
+    """ Returns (number of records, start time) of a telemetry file. """
+    with open(path, "rb") as f:
+        magic, version, record_size, count, start_time = HEADER.unpack(f.read(HEADER_SIZE))
+    if magic != MAGIC or record_size != RECORD_SIZE:
+        raise Exception("%s is not a telemetry file (version %i)." % (path, VERSION))
+    return count, start_time
+
+
+def read_telemetry(path):
+    """ Returns the records of a telemetry file as numpy structured array with
+    the fields time, channel, counter and values (6 floats). The array is
+    memory-mapped, the file is not loaded, also not for selections like
+    records[records["channel"] == MSG_CURRENT_POSE_JOINT]["values"].
+    """
+    import numpy as np
+    dtype = np.dtype([("time", "<f8"), ("channel", "<i4"), ("counter", "<i4"), ("values", "<f8", (6,))])
+    count, start_time = read_header(path)
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def cycle_times(records):
+    """ Returns (counters, seconds) of the executed commands: the time between
+    the execution of the previous and of this command. The counters restart
+    when the actuator is READY_TO_PROGRAM, the first command after it is measured
+    from the previous one as well. """
+    import numpy as np
+    executed = records[records["channel"] == MSG_COMMAND_EXECUTED]
+    return np.asarray(executed["counter"][1:]), np.diff(executed["time"])
+
+
+if __name__ == "__main__":
+    import sys
+    import numpy as np
+    records = read_telemetry(sys.argv[1])
+    counters, seconds = cycle_times(records)
+    print("%i records, %i executed commands" % (len(records), len(counters) + 1))
+    if len(seconds):
+        print("cycle time: mean %.3f s, median %.3f s, max %.3f s" % (seconds.mean(), np.median(seconds), seconds.max()))
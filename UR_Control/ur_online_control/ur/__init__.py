@@ -1 +1,5 @@
-from .ur import UR
+try:
+    from .ur import UR
+except ImportError:
+    # UR needs compas, the batch kinematics of ur.kinematics numpy only
+    UR = None
@@ -1,2 +1,3 @@
-from .ur_kinematics import forward_kinematics, inverse_kinematics
-from .path_calculation import calculate_configurations_for_path, format_joint_positions
\ No newline at end of file
+from .ur_kinematics import forward_kinematics, forward_kinematics_batch, inverse_kinematics, inverse_kinematics_batch
+from .path_calculation import calculate_configurations_for_path, optimize_configurations_for_path, select_path, format_joint_positions
+from .ik_cache import IKCache
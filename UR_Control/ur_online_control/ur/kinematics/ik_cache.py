@@ -0,0 +1,87 @@
+from collections import OrderedDict
+
+
+class IKCache(object):
+    """A least recently used cache of inverse kinematics solutions, keyed by
+    quantized frames (e.g. the tcp frame, the tool frame and the base frame).
+
+    Frames which differ by less than tolerance (mm) in the point and by less
+    than angle_tolerance in the axes (unit vectors) share a key, mostly: the
+    values are rounded to a grid, so two close frames on both sides of a grid
+    line have different keys. A hit returns the solutions of the first frame
+    of the key, i.e. they are as exact as the tolerances.
+
+    maxsize should hold all frames which are solved again, e.g. all frames of
+    a structure which is re-planned: a cache which is too small for a
+    repeated sweep over the frames evicts every entry before it is hit, and
+    then makes the inverse kinematics slower than without a cache (see
+    benchmarks/ik_cache.py).
+
+    Attributes:
+        hits, misses, evictions (int): the statistics since the last clear.
+
+    Example:
+        ur.set_ik_cache(IKCache(maxsize=10000, tolerance=0.01))
+        configurations = ur.inverse_kinematics(tool0_frame_RCS)
+    """
+
+    def __init__(self, maxsize=10000, tolerance=0.01, angle_tolerance=1e-5):
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.angle_tolerance = angle_tolerance
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def quantize(self, frame):
+        # round returns an int in Python 3, an integral float in Python 2
+        scale, angle_scale = 1. / self.tolerance, 1. / self.angle_tolerance
+        return tuple([round(v * scale) for v in frame.point] +
+                     [round(v * angle_scale) for v in frame.xaxis] +
+                     [round(v * angle_scale) for v in frame.yaxis])
+
+    def key(self, *frames):
+        return tuple([self.quantize(frame) for frame in frames])
+
+    def get(self, function, *frames):
+        """Returns the joint values (list of lists) of the key of the frames,
+        and calls function to calculate them if they are not in the cache.
+        function returns the solutions as joint value lists or configurations
+        with joint_values.
+        """
+        key = self.key(*frames)
+        solutions = self.entries.pop(key, None)
+        if solutions is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            solutions = [list(getattr(q, "joint_values", q)) for q in function()]
+            if len(self.entries) >= self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        # the most recently used at the end
+        self.entries[key] = solutions
+        return [list(q) for q in solutions]
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        requests = self.hits + self.misses
+        return float(self.hits) / requests if requests else 0.
+
+    def statistics(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self.entries), "maxsize": self.maxsize, "hit_rate": self.hit_rate}
+
+    def __str__(self):
+        return "IKCache: %i hits, %i misses (%.1f%%), %i evictions, %i/%i entries" % (
+            self.hits, self.misses, self.hit_rate * 100, self.evictions, len(self.entries), self.maxsize)
@@ -2,11 +2,16 @@ from __future__ import print_function
 
 import math
 
-from compas_fab.utilities import sign
-
-from . import inverse_kinematics
 from ..robot import BaseConfiguration
 
+# the joint limits of the UR controller
+UR_JOINT_LIMITS = [(-2 * math.pi, 2 * math.pi)] * 6
+
+
+def sign(number):
+    """The sign of a number: 1, -1 or 0 (as compas_fab.utilities.sign)."""
+    return int(int(number > 0) - int(number < 0))
+
 
 def format_joint_positions(joint_positions_a, joint_positions_b = [0,0,0,0,0,0]):
     """Add or subtract 2*pi to the joint positions a, so that they have the
@@ -71,10 +76,7 @@ def calculate_configurations_for_path(frames, robot, current_positions = []):
                 qsols_sorted.append(qsols_formatted[selected_idx])
             configurations.append(qsols_sorted)
 
-    print(len(configurations))
-    print(len(configurations[0]))
     configurations = list(zip(*configurations))
-    print(len(configurations))
 
     for i in range(len(configurations)):
         configurations[i] = list(configurations[i])
@@ -82,3 +84,183 @@ def calculate_configurations_for_path(frames, robot, current_positions = []):
             configurations[i][j] = BaseConfiguration.from_joints(q)
 
     return configurations
+
+
+def select_path(solutions, valid, current_positions=None, cost="travel", joint_limits=UR_JOINT_LIMITS):
+    """Select one IK solution per frame so that the whole path is optimal
+    (dynamic programming over the lattice of the solutions, Viterbi), in
+    O(N*K^2) for N frames with K solutions.
+
+    Every joint of a solution can be taken as any of its equivalent angles
+    (+- 2*pi) within the joint limits, so a node of the lattice is a solution
+    with a choice of the equivalent angle per joint (2^6 per solution for the
+    limits of the UR, 3 for a joint at exactly 0). The transitions between
+    the nodes of two frames are minimized joint by joint (O(K^2*6*2^7) per
+    frame): with the cost "travel" the path is the global optimum, with
+    "velocity" its largest joint movement is (the travel is minimized frame
+    by frame among the paths with it). Without current_positions, the joint
+    positions of the first frame are free, ties are broken by the smallest
+    angles.
+
+    Args:
+        solutions: (N,8,6) joint positions, e.g. of inverse_ros_batch
+        valid: (N,8) mask of the existing solutions
+        current_positions: the joint positions before the path (optional)
+        cost: "travel" minimizes the sum of the joint movements, "velocity"
+            the largest joint movement between two frames (then the travel)
+        joint_limits: [(min, max)] * 6 in radians, default +- 2*pi of the UR
+
+    Returns:
+        (N,6) joint positions, or None if a frame has no (allowed) solution.
+    """
+    import numpy as np
+
+    if cost not in ["travel", "velocity"]:
+        raise ValueError("Unknown cost: %s" % cost)
+
+    solutions = np.asarray(solutions, dtype=float)
+    valid = np.asarray(valid, dtype=bool)
+    N, K = solutions.shape[:2]
+    if N == 0:
+        return np.zeros((0, 6))
+
+    # (N,K,6,E) and the number E_j of the equivalent angles of every joint
+    equivalents, counts = _equivalents(solutions, valid, joint_limits)
+    shape = (K,) + tuple(counts)
+    size = int(np.prod(counts))
+    velocity = cost == "velocity"
+
+    def better(travel, largest, best_travel, best_largest):
+        # the mask of the nodes with less cost than the best ones
+        if not velocity:
+            return travel < best_travel
+        return (largest < best_largest - 1e-12) | ((largest <= best_largest + 1e-12) & (travel < best_travel))
+
+    def minimum(travel, largest, axis):
+        # the best nodes along the (short) axis and their index, the first
+        # of equal ones
+        index = [slice(None)] * travel.ndim
+        index[axis] = 0
+        best_travel, best_largest = travel[tuple(index)], largest[tuple(index)]
+        choice = 0
+        for i in range(1, travel.shape[axis]):
+            index[axis] = i
+            mask = better(travel[tuple(index)], largest[tuple(index)], best_travel, best_largest)
+            best_travel = np.where(mask, travel[tuple(index)], best_travel)
+            best_largest = np.where(mask, largest[tuple(index)], best_largest) if velocity else best_travel
+            choice = np.where(mask, i, choice)
+        return best_travel, best_largest, np.broadcast_to(choice, best_travel.shape)
+
+    # the cost of the best path to every node (K,E_0,...,E_5): travel and largest movement
+    travel, largest = np.zeros(shape), np.zeros(shape)
+    for j, E in enumerate(counts):
+        values = equivalents[0, :, j, :E]
+        if current_positions is not None:
+            delta = np.abs(values - float(current_positions[j]))
+        else:
+            delta = np.where(np.isfinite(values), 0., np.inf)
+        delta = delta.reshape((K,) + (1,) * j + (E,) + (1,) * (5 - j))
+        travel, largest = travel + delta, np.maximum(largest, delta)
+    if not np.isfinite(travel).any():
+        return None
+
+    # back[t]: the flat index of the previous node of every node of frame t
+    back = [None]
+    targets = list(np.indices(shape))
+    for t in range(1, N):
+        # (K',K,6,E',E) the joint movements from the equivalent angles e' of
+        # the solutions k' of the previous frame to the e of the k
+        with np.errstate(invalid="ignore"):
+            delta = np.abs(equivalents[t - 1][:, None, :, :, None] - equivalents[t][None, :, :, None, :])
+        delta[np.isnan(delta)] = np.inf
+        # from node (k', e') to node (k, e), joint by joint: after joint j,
+        # the equivalent angles of the joints <= j are of e, the others of e'
+        travel, largest = travel.reshape((K, 1, size)), largest.reshape((K, 1, size))
+        choices = []
+        for j, E in enumerate(counts):
+            split = (K, travel.shape[1], int(np.prod(counts[:j])), E, 1, int(np.prod(counts[j + 1:])))
+            step = delta[:, :, j, :E, :E].reshape((K, K, 1, E, E, 1))
+            total_travel = travel.reshape(split) + step
+            total_largest = np.maximum(largest.reshape(split), step) if velocity else total_travel
+            travel, largest, choice = minimum(total_travel, total_largest, 3)
+            choices.append(choice.reshape((K,) + shape))
+            travel, largest = travel.reshape((K, K, size)), largest.reshape((K, K, size))
+        travel, largest, selected = minimum(travel, largest, 0)
+        travel, largest, selected = travel.reshape(shape), largest.reshape(shape), selected.reshape(shape)
+        if not np.isfinite(travel).any():
+            return None
+        # the equivalent angles e' of the previous nodes, joint by joint back
+        index = list(targets)
+        for j in range(5, -1, -1):
+            index[1 + j] = choices[j][tuple([selected, targets[0]] + index[1:])]
+        back.append(np.ravel_multi_index([selected] + index[1:], shape).astype(np.int32))
+
+    if velocity:
+        travel = np.where(largest <= largest.min() + 1e-12, travel, np.inf)
+    node = np.unravel_index(int(np.argmin(travel)), shape)
+    path = np.zeros((N, 6))
+    for t in range(N - 1, -1, -1):
+        path[t] = equivalents[t, node[0], np.arange(6), np.array(node[1:])]
+        if t:
+            node = np.unravel_index(int(back[t][node]), shape)
+    return path
+
+
+def _offsets(joint_limits):
+    """The (6,E) multiples of 2*pi which can bring an angle in [0, 2*pi)
+    within the joint limits, per joint (padded with nan)."""
+    import numpy as np
+
+    offsets = []
+    for lower, upper in joint_limits:
+        first = int(math.floor((lower - 2 * math.pi) / (2 * math.pi))) + 1
+        last = int(math.floor(upper / (2 * math.pi)))
+        offsets.append([2 * math.pi * n for n in range(first, last + 1)])
+    E = max(len(o) for o in offsets)
+    return np.array([o + [np.nan] * (E - len(o)) for o in offsets], dtype=float)
+
+
+def _equivalents(solutions, valid, joint_limits):
+    """The (N,K,6,E) equivalent angles (+- 2*pi) within the joint limits of
+    the joints of the solutions, ordered by their absolute value and padded
+    with inf, and the largest number of them per joint."""
+    import numpy as np
+
+    offsets = _offsets(joint_limits)
+    lower = np.array([l for l, u in joint_limits])[:, None]
+    upper = np.array([u for l, u in joint_limits])[:, None]
+    with np.errstate(invalid="ignore"):
+        equivalents = (solutions % (2 * math.pi))[..., None] + offsets
+        inside = (equivalents >= lower) & (equivalents <= upper) & valid[:, :, None, None]
+    equivalents = np.where(inside, equivalents, np.inf)
+    equivalents = np.take_along_axis(equivalents, np.argsort(np.abs(equivalents), axis=3), axis=3)
+    counts = [max(int(c), 1) for c in inside.sum(axis=3).max(axis=(0, 1))]
+    return equivalents[..., :max(counts)], counts
+
+
+def optimize_configurations_for_path(frames, robot, current_positions=None, cost="travel", joint_limits=UR_JOINT_LIMITS):
+    """Calculate the configurations for a path with the smallest joint
+    movements over the whole path, see select_path.
+
+    Args:
+        frames (Frame): the path described with frames
+
+    Returns:
+        configurations: list of BaseConfiguration, one per frame, or an empty
+        list if the path is not reachable.
+    """
+    import numpy as np
+
+    solutions = np.full((len(frames), 8, 6), np.nan)
+    valid = np.zeros((len(frames), 8), dtype=bool)
+    for i, frame in enumerate(frames):
+        qsols = [c.joint_values for c in robot.inverse_kinematics(frame)]
+        if not len(qsols):
+            return []
+        solutions[i, :len(qsols)] = qsols
+        valid[i, :len(qsols)] = True
+
+    path = select_path(solutions, valid, current_positions, cost, joint_limits)
+    if path is None:
+        return []
+    return [BaseConfiguration.from_joints(list(q)) for q in path]
@@ -0,0 +1,191 @@
+"""
+Reachability maps of a UR with a tool, computed with the batch kinematics of
+ur_kin_ros. The module needs numpy, but not compas, and is not imported by
+ur.kinematics (which also runs in Rhino without numpy):
+
+    from ur_online_control.ur.kinematics.reachability import ReachabilityMap
+"""
+import math
+
+import numpy as np
+
+from .ur_kin_ros import inverse_ros_batch, forward_ros_batch
+
+
+def frame_to_matrix(frame):
+    """The 4x4 matrix (columns xaxis, yaxis, zaxis, point) of a frame."""
+    x = np.asarray(frame.xaxis, dtype=float)
+    x = x / np.linalg.norm(x)
+    z = np.cross(x, np.asarray(frame.yaxis, dtype=float))
+    z = z / np.linalg.norm(z)
+    T = np.eye(4)
+    T[:3, 0], T[:3, 1], T[:3, 2], T[:3, 3] = x, np.cross(z, x), z, frame.point
+    return T
+
+
+def invert_matrices(T):
+    """The inverses of rigid transformations (...,4,4)."""
+    T = np.asarray(T, dtype=float)
+    inverse = np.zeros_like(T)
+    R = np.swapaxes(T[..., :3, :3], -1, -2)
+    inverse[..., :3, :3] = R
+    inverse[..., :3, 3] = -np.einsum('...ij,...j->...i', R, T[..., :3, 3])
+    inverse[..., 3, 3] = 1.
+    return inverse
+
+
+def orientation_samples(directions=16, rotations=4):
+    """Rotation matrices (directions*rotations,3,3): the zaxis on a Fibonacci
+    sphere, each rotated rotations times around the zaxis."""
+    samples = []
+    golden = math.pi * (3. - math.sqrt(5.))
+    for i in range(directions):
+        zz = 1. - 2. * (i + 0.5) / directions
+        r = math.sqrt(1. - zz * zz)
+        z = np.array([r * math.cos(golden * i), r * math.sin(golden * i), zz])
+        helper = np.array([1., 0., 0.]) if abs(z[0]) < 0.9 else np.array([0., 1., 0.])
+        x = np.cross(helper, z)
+        x /= np.linalg.norm(x)
+        y = np.cross(z, x)
+        for j in range(rotations):
+            a = 2 * math.pi * j / rotations
+            xr = math.cos(a) * x + math.sin(a) * y
+            samples.append(np.column_stack([xr, np.cross(z, xr), z]))
+    return np.array(samples)
+
+
+class ReachabilityMap(object):
+    """A voxelized reachability and manipulability map of a UR with a tool.
+
+    For every voxel center and every sampled tcp orientation (see
+    orientation_samples) the map stores which of the 8 IK branches of
+    inverse_ros_batch exist, as bit mask (bit i: solution i), and the largest
+    manipulability (Yoshikawa, translation in m) of the existing solutions.
+    The map is in robot coordinate system (RCS), queries with frames in world
+    coordinate system (WCS) go through the base frame of the map.
+
+    The answers are those of the nearest voxel center and sampled
+    orientation, not of the frame itself: use the map to filter thousands of
+    frames quickly, and IK for the frames which are used.
+
+    Example:
+        rmap = ReachabilityMap.build(UR10_PARAMS, tool=tool_matrix, resolution=50.)
+        rmap.save("ur10.npz")
+        branches, manipulability = ReachabilityMap.load("ur10.npz", base=base_matrix).query(frames_WCS)
+    """
+
+    def __init__(self, branches, manipulability, origin, resolution, orientations, ur_params, tool=None, base=None):
+        self.branches = branches  # (X,Y,Z,O) uint8
+        self.manipulability = manipulability  # (X,Y,Z,O) float16
+        self.origin = np.asarray(origin, dtype=float)
+        self.resolution = float(resolution)
+        self.orientations = orientations  # (O,3,3)
+        self.ur_params = list(ur_params)
+        self.tool = np.eye(4) if tool is None else np.asarray(tool, dtype=float)
+        self.set_base(base)
+
+    def set_base(self, base):
+        """The base frame of the robot in WCS as 4x4 matrix (None: WCS = RCS)."""
+        self.base = np.eye(4) if base is None else np.asarray(base, dtype=float)
+        self.transformation_WCS_RCS = invert_matrices(self.base)
+
+    @classmethod
+    def build(cls, ur_params, tool=None, resolution=100., directions=16, rotations=4, reach=None, chunk=50000):
+        """Builds the map with batch IK, in chunks of chunk poses.
+
+        Args:
+            ur_params: UR defined parameters for the model (mm)
+            tool: the tcp frame in the tool0 frame as 4x4 matrix (optional)
+            resolution: the edge length of a voxel (mm)
+            directions, rotations: the orientation samples
+            reach: the half edge length of the cube around the shoulder, by
+                default the length of the arm and the tool
+        """
+        d1, a2, a3, d4, d5, d6 = ur_params
+        tool = np.eye(4) if tool is None else np.asarray(tool, dtype=float)
+        if reach is None:
+            reach = abs(a2) + abs(a3) + d4 + d5 + d6 + np.linalg.norm(tool[:3, 3])
+        number = int(math.ceil(reach / resolution))
+        origin = np.array([-number * resolution, -number * resolution, d1 - number * resolution])
+        shape = (2 * number + 1,) * 3
+        orientations = orientation_samples(directions, rotations)
+
+        centers = origin + resolution * np.stack(np.meshgrid(*[np.arange(n) for n in shape], indexing='ij'), axis=-1).reshape(-1, 3)
+        tool_inverse = invert_matrices(tool)
+        total = len(centers) * len(orientations)
+        branches = np.zeros(total, dtype=np.uint8)
+        manipulability = np.zeros(total, dtype=np.float16)
+        bits = (1 << np.arange(8)).astype(np.uint8)
+
+        for start in range(0, total, chunk):
+            index = np.arange(start, min(total, start + chunk))
+            tcp = np.zeros((len(index), 4, 4))
+            tcp[:, :3, :3] = orientations[index % len(orientations)]
+            tcp[:, :3, 3] = centers[index // len(orientations)]
+            tcp[:, 3, 3] = 1.
+            tool0 = np.matmul(tcp, tool_inverse)
+            # the layout of ur_kinematics.inverse_kinematics: zaxis, xaxis, yaxis, point
+            T = tool0[:, :, [2, 0, 1, 3]]
+            q_sols, valid = inverse_ros_batch(T, ur_params)
+            branches[index] = (valid * bits).sum(axis=1).astype(np.uint8)
+
+            rows, columns = np.nonzero(valid)
+            if len(rows):
+                J = forward_ros_batch(q_sols[rows, columns], ur_params, jacobians=True)[1]
+                J[:, :3] /= 1000.
+                w = np.sqrt(np.abs(np.linalg.det(np.matmul(J, np.swapaxes(J, 1, 2)))))
+                best = np.zeros(len(index))
+                np.maximum.at(best, rows, w)
+                manipulability[index] = best
+
+        shape = shape + (len(orientations),)
+        return cls(branches.reshape(shape), manipulability.reshape(shape), origin, resolution, orientations, ur_params, tool)
+
+    @classmethod
+    def from_robot(cls, robot, **kwargs):
+        """Builds the map for a UR robot with its tool and base frame."""
+        rmap = cls.build(robot.params, tool=frame_to_matrix(robot.tool.tcp_frame), **kwargs)
+        rmap.set_base(frame_to_matrix(robot.base_frame))
+        return rmap
+
+    def save(self, path):
+        np.savez_compressed(path, branches=self.branches, manipulability=self.manipulability, origin=self.origin,
+                            resolution=self.resolution, orientations=self.orientations, ur_params=self.ur_params,
+                            tool=self.tool)
+
+    @classmethod
+    def load(cls, path, base=None):
+        data = np.load(path)
+        return cls(data['branches'], data['manipulability'], data['origin'], float(data['resolution']),
+                   data['orientations'], data['ur_params'], data['tool'], base)
+
+    def indices(self, frames):
+        """The voxel and orientation indices of the tcp frames (N,4,4) in WCS,
+        and the mask of the frames within the map."""
+        frames = np.asarray(frames, dtype=float).reshape(-1, 4, 4)
+        rcs = np.matmul(self.transformation_WCS_RCS, frames)
+        voxels = np.round((rcs[:, :3, 3] - self.origin) / self.resolution).astype(int)
+        inside = ((voxels >= 0) & (voxels < np.array(self.branches.shape[:3]))).all(axis=1)
+        voxels[~inside] = 0
+        # the nearest orientation: the largest trace of R_sample^T R
+        similarity = np.einsum('nij,oij->no', rcs[:, :3, :3], self.orientations)
+        orientations = np.argmax(similarity, axis=1)
+        return voxels, orientations, inside
+
+    def query(self, frames):
+        """Returns the branch masks (N,) uint8 (0: not reachable) and the
+        manipulability (N,) of the tcp frames (N,4,4) in WCS."""
+        voxels, orientations, inside = self.indices(frames)
+        branches = self.branches[voxels[:, 0], voxels[:, 1], voxels[:, 2], orientations]
+        manipulability = self.manipulability[voxels[:, 0], voxels[:, 1], voxels[:, 2], orientations].astype(float)
+        branches[~inside] = 0
+        manipulability[~inside] = 0.
+        return branches, manipulability
+
+    def reachable(self, frames):
+        return self.query(frames)[0] != 0
+
+    @staticmethod
+    def branch_list(mask):
+        """The indices of the branches (IK solutions) in a branch mask."""
+        return [i for i in range(8) if int(mask) & (1 << i)]
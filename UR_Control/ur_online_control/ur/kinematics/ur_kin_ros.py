@@ -53,6 +53,81 @@ def forward_ros(q, ur_params):
     return T
 
 
+def forward_ros_batch(q, ur_params, jacobians=False):
+    """
+    Parameters: q, an (N,6) array of joint angles in radians, not modified
+                ur_params: UR defined parameters for the model, they are
+                different for UR3, UR5 and UR10
+                jacobians: also return the geometric Jacobians
+    Returns:    T, an (N,4,4) array of the end effector poses, T[n] is
+                forward_ros(q[n]) as 4x4 matrix, and with jacobians J, an
+                (N,6,6) array: the rows are the linear (mm/rad) and angular
+                velocity of the end effector in the base frame of T, the
+                columns the joints.
+    """
+    import numpy as np
+
+    d1, a2, a3, d4, d5, d6 = [float(p) for p in ur_params]
+    q = np.asarray(q, dtype=float).reshape(-1, 6)
+
+    s1, c1 = np.sin(q[:, 0]), np.cos(q[:, 0])
+    s2, c2 = np.sin(q[:, 1]), np.cos(q[:, 1])
+    s3, c3 = np.sin(q[:, 2]), np.cos(q[:, 2])
+    q234 = q[:, 1] + q[:, 2] + q[:, 3]
+    s5, c5 = np.sin(q[:, 4]), np.cos(q[:, 4])
+    s6, c6 = np.sin(q[:, 5]), np.cos(q[:, 5])
+    s234, c234 = np.sin(q234), np.cos(q234)
+
+    T = np.zeros((q.shape[0], 16))
+
+    T[:, 0] = ((c1*c234-s1*s234)*s5)/2.0 - c5*s1 + ((c1*c234+s1*s234)*s5)/2.0
+    T[:, 1] = (c6*(s1*s5 + ((c1*c234-s1*s234)*c5)/2.0 + ((c1*c234+s1*s234)*c5)/2.0) - (s6*((s1*c234+c1*s234) - (s1*c234-c1*s234)))/2.0)
+    T[:, 2] = (-(c6*((s1*c234+c1*s234) - (s1*c234-c1*s234)))/2.0 - s6*(s1*s5 + ((c1*c234-s1*s234)*c5)/2.0 + ((c1*c234+s1*s234)*c5)/2.0))
+    T[:, 3] = ((d5*(s1*c234-c1*s234))/2.0 - (d5*(s1*c234+c1*s234))/2.0 -  d4*s1 + (d6*(c1*c234-s1*s234)*s5)/2.0 + (d6*(c1*c234+s1*s234)*s5)/2.0 -  a2*c1*c2 - d6*c5*s1 - a3*c1*c2*c3 + a3*c1*s2*s3)
+    T[:, 4] = c1*c5 + ((s1*c234+c1*s234)*s5)/2.0 + ((s1*c234-c1*s234)*s5)/2.0
+    T[:, 5] = (c6*(((s1*c234+c1*s234)*c5)/2.0 - c1*s5 + ((s1*c234-c1*s234)*c5)/2.0) + s6*((c1*c234-s1*s234)/2.0 - (c1*c234+s1*s234)/2.0))
+    T[:, 6] = (c6*((c1*c234-s1*s234)/2.0 - (c1*c234+s1*s234)/2.0) - s6*(((s1*c234+c1*s234)*c5)/2.0 - c1*s5 + ((s1*c234-c1*s234)*c5)/2.0))
+    T[:, 7] = ((d5*(c1*c234-s1*s234))/2.0 - (d5*(c1*c234+s1*s234))/2.0 + d4*c1 + (d6*(s1*c234+c1*s234)*s5)/2.0 + (d6*(s1*c234-c1*s234)*s5)/2.0 + d6*c1*c5 - a2*c2*s1 - a3*c2*c3*s1 + a3*s1*s2*s3)
+    T[:, 8] = ((c234*c5-s234*s5)/2.0 - (c234*c5+s234*s5)/2.0)
+    T[:, 9] = ((s234*c6-c234*s6)/2.0 - (s234*c6+c234*s6)/2.0 - s234*c5*c6)
+    T[:, 10] = (s234*c5*s6 - (c234*c6+s234*s6)/2.0 - (c234*c6-s234*s6)/2.0)
+    T[:, 11] = (d1 + (d6*(c234*c5-s234*s5))/2.0 + a3*(s2*c3+c2*s3) + a2*s2 - (d6*(c234*c5+s234*s5))/2.0 - d5*c234)
+    T[:, 15] = 1.0
+    T = T.reshape(-1, 4, 4)
+
+    if not jacobians:
+        return T
+
+    # the joint axes and origins from the DH chain (d = [d1, 0, 0, d4, d5, d6],
+    # a = [0, a2, a3, 0, 0, 0], alpha = [pi/2, 0, 0, pi/2, -pi/2, 0]), the
+    # base of forward_ros is rotated by pi around z
+    d = [d1, 0.0, 0.0, d4, d5, d6]
+    a = [0.0, a2, a3, 0.0, 0.0, 0.0]
+    alpha = [pi/2, 0.0, 0.0, pi/2, -pi/2, 0.0]
+    F = np.zeros((q.shape[0], 4, 4))
+    F[:, 0, 0] = F[:, 1, 1] = -1.0
+    F[:, 2, 2] = F[:, 3, 3] = 1.0
+    axes, origins = [], []
+    for i in range(6):
+        axes.append(F[:, :3, 2])
+        origins.append(F[:, :3, 3])
+        ct, st = np.cos(q[:, i]), np.sin(q[:, i])
+        ca, sa = cos(alpha[i]), sin(alpha[i])
+        A = np.zeros((q.shape[0], 4, 4))
+        A[:, 0, 0], A[:, 0, 1], A[:, 0, 2], A[:, 0, 3] = ct, -st*ca, st*sa, a[i]*ct
+        A[:, 1, 0], A[:, 1, 1], A[:, 1, 2], A[:, 1, 3] = st, ct*ca, -ct*sa, a[i]*st
+        A[:, 2, 1], A[:, 2, 2], A[:, 2, 3] = sa, ca, d[i]
+        A[:, 3, 3] = 1.0
+        F = np.matmul(F, A)
+
+    J = np.zeros((q.shape[0], 6, 6))
+    p = T[:, :3, 3]
+    for i in range(6):
+        J[:, :3, i] = np.cross(axes[i], p - origins[i])
+        J[:, 3:, i] = axes[i]
+    return T, J
+
+
 def inverse_ros(T, params, q6_des=0.0):
     """
     Parameters: T, the 4x4 end effector pose in row-major ordering
@@ -210,6 +285,138 @@ def inverse_ros(T, params, q6_des=0.0):
     return q_sols
 
 
+def inverse_ros_batch(T, params, q6_des=0.0):
+    """
+    Parameters: T, N end effector poses, an (N,4,4) or (N,16) array in
+                row-major ordering
+                ur_params: UR defined parameters for the model, they are
+                different for UR3, UR5 and UR10
+                q6_des, an optional parameter which designates what the q6 value
+                should take, in case of an infinite solution on that joint.
+    Returns:    q_sols, an (N,8,6) array of the 8 possible q joint solutions
+                per pose, all angles should be in [0,2 * pi], and valid, an
+                (N,8) boolean mask of the solutions which exist (the others
+                are nan). q_sols[n][valid[n]] are the solutions of
+                inverse_ros(T[n]) in the same order (up to the rounding of
+                numpy's trigonometric functions), poses for which inverse_ros
+                raises (ZeroDivisionError, ValueError) have none.
+    """
+    import numpy as np
+
+    d1, a2, a3, d4, d5, d6 = [float(p) for p in params]
+    T = np.asarray(T, dtype=float).reshape(-1, 16)
+    N = T.shape[0]
+
+    T02 = -T[:, 0]
+    T00 =  T[:, 1]
+    T01 =  T[:, 2]
+    T03 = -T[:, 3]
+    T12 = -T[:, 4]
+    T10 =  T[:, 5]
+    T11 =  T[:, 6]
+    T13 = -T[:, 7]
+    T22 =  T[:, 8]
+    T20 = -T[:, 9]
+    T21 = -T[:, 10]
+    T23 =  T[:, 11]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # shoulder rotate joint (q1), the branches of inverse_ros as masks
+        A = d6*T12 - T13
+        B = d6*T02 - T03
+        R = A*A + B*B
+        a_zero = np.fabs(A) < ZERO_THRESH
+        b_zero = ~a_zero & (np.fabs(B) < ZERO_THRESH)
+        general = ~a_zero & ~b_zero
+        # the poses inverse_ros returns or raises for
+        ok = ~(general & (d4*d4 > R))
+
+        div = np.where(np.fabs(np.fabs(d4) - np.fabs(B)) < ZERO_THRESH, -np.sign(d4)*np.sign(B), -d4/B)
+        ok &= ~a_zero | ((B != 0.0) & (np.fabs(div) <= 1.0))
+        arcsin = np.arcsin(div)
+        arcsin = np.where(np.fabs(arcsin) < ZERO_THRESH, 0.0, arcsin)
+        q1_a = [np.where(arcsin < 0.0, arcsin + 2.0*pi, arcsin), pi - arcsin]
+
+        div = np.where(np.fabs(np.fabs(d4) - np.fabs(A)) < ZERO_THRESH, np.sign(d4)*np.sign(A), d4/A)
+        ok &= ~b_zero | (np.fabs(div) <= 1.0)
+        arccos = np.arccos(div)
+        q1_b = [arccos, 2.0*pi - arccos]
+
+        arccos = np.arccos(d4 / np.sqrt(R))
+        arctan = np.arctan2(-B, A)
+        pos = arccos + arctan
+        neg = -arccos + arctan
+        pos = np.where(np.fabs(pos) < ZERO_THRESH, 0.0, pos)
+        neg = np.where(np.fabs(neg) < ZERO_THRESH, 0.0, neg)
+        q1_c = [np.where(pos >= 0.0, pos, 2.0*pi + pos), np.where(neg >= 0.0, neg, 2.0*pi + neg)]
+
+        q1 = [np.where(a_zero, q1_a[i], np.where(b_zero, q1_b[i], q1_c[i])) for i in range(2)]
+
+        # wrist 2 joint (q5)
+        q5 = [[None, None], [None, None]]
+        for i in range(2):
+            numer = (T03*np.sin(q1[i]) - T13*np.cos(q1[i]) - d4)
+            div = np.where(np.fabs(np.fabs(numer) - np.fabs(d6)) < ZERO_THRESH, np.sign(numer) * np.sign(d6), numer / d6)
+            ok &= np.fabs(div) <= 1.0
+            arccos = np.arccos(div)
+            q5[i][0] = arccos
+            q5[i][1] = 2.0*pi - arccos
+
+        q_sols = np.full((N, 8, 6), np.nan)
+        valid = np.zeros((N, 8), dtype=bool)
+        for i in range(2):
+            for j in range(2):
+                c1 = np.cos(q1[i])
+                s1 = np.sin(q1[i])
+                c5 = np.cos(q5[i][j])
+                s5 = np.sin(q5[i][j])
+
+                # wrist 3 joint (q6)
+                q6 = np.where(np.fabs(s5) < ZERO_THRESH, q6_des,
+                              np.arctan2(np.sign(s5)*-(T01*s1 - T11*c1), np.sign(s5)*(T00*s1 - T10*c1)))
+                q6 = np.where(np.fabs(q6) < ZERO_THRESH, 0.0, q6)
+                q6 = np.where(q6 < 0.0, q6 + 2.0*pi, q6)
+
+                # RRR joints (q2,q3,q4)
+                c6 = np.cos(q6)
+                s6 = np.sin(q6)
+                x04x = -s5*(T02*c1 + T12*s1) - c5*(s6*(T01*c1 + T11*s1) - c6*(T00*c1 + T10*s1))
+                x04y = c5*(T20*c6 - T21*s6) - T22*s5
+                p13x = d5*(s6*(T00*c1 + T10*s1) + c6*(T01*c1 + T11*s1)) - d6*(T02*c1 + T12*s1) + T03*c1 + T13*s1
+                p13y = T23 - d1 - d6*T22 + d5*(T21*c6 + T20*s6)
+
+                c3 = (p13x*p13x + p13y*p13y - a2*a2 - a3*a3) / (2.0*a2*a3)
+                c3 = np.where(np.fabs(np.fabs(c3) - 1.0) < ZERO_THRESH, np.sign(c3), c3)
+                # no solution for this branch
+                exists = np.fabs(c3) <= 1.0
+
+                arccos = np.arccos(c3)
+                denom = a2*a2 + a3*a3 + 2*a2*a3*c3
+                ok &= ~exists | (denom != 0.0)
+                s3 = np.sin(arccos)
+                A = (a2 + a3*c3)
+                B = a3*s3
+                q3 = [arccos, 2.0*pi - arccos]
+                q2 = [np.arctan2((A*p13y - B*p13x) / denom, (A*p13x + B*p13y) / denom),
+                      np.arctan2((A*p13y + B*p13x) / denom, (A*p13x - B*p13y) / denom)]
+                q4 = []
+                for k in range(2):
+                    c23 = np.cos(q2[k] + q3[k])
+                    s23 = np.sin(q2[k] + q3[k])
+                    q4.append(np.arctan2(c23*x04y - s23*x04x, x04x*c23 + x04y*s23))
+
+                for k in range(2):
+                    q2[k] = np.where(np.fabs(q2[k]) < ZERO_THRESH, 0.0, np.where(q2[k] < 0.0, q2[k] + 2.0*pi, q2[k]))
+                    q4[k] = np.where(np.fabs(q4[k]) < ZERO_THRESH, 0.0, np.where(q4[k] < 0.0, q4[k] + 2.0*pi, q4[k]))
+                    n = i*4 + j*2 + k
+                    q_sols[:, n] = np.stack([q1[i], q2[k], q3[k], q4[k], q5[i][j], q6], axis=-1)
+                    valid[:, n] = exists
+
+    valid &= ok[:, None]
+    q_sols[~valid] = np.nan
+    return q_sols, valid
+
+
 if __name__ == "__main__":
     
     pass
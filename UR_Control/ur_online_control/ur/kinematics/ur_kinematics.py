@@ -1,11 +1,15 @@
 import math
 
-from compas.geometry import Frame
-from compas_fab.utilities import argsort
-from compas_fab.utilities import sign
+try:
+    from compas.geometry import Frame
+except ImportError:
+    # forward_kinematics needs compas, the batch functions numpy only
+    Frame = None
 
 from .ur_kin_ros import forward_ros
+from .ur_kin_ros import forward_ros_batch
 from .ur_kin_ros import inverse_ros
+from .ur_kin_ros import inverse_ros_batch
 
 def inverse_kinematics(frame, ur_params, q6_des=0.0):
     """Inverse kinematics function.
@@ -43,6 +47,36 @@ def inverse_kinematics(frame, ur_params, q6_des=0.0):
         return []
 
 
+def inverse_kinematics_batch(frames, ur_params, q6_des=0.0):
+    """Inverse kinematics of many frames at once with numpy.
+
+    Args:
+        frames: the frames to reach.
+        ur_params: UR defined parameters for the model
+        q6_des, an optional parameter which designates what the q6 value
+        should take, in case of an infinite solution on that joint.
+
+    Returns:
+        q_sols, an (N,8,6) array of the 8 possible q joint solutions per
+        frame, and valid, the (N,8) mask of the existing solutions, see
+        inverse_ros_batch. q_sols[n][valid[n]] are the solutions of
+        inverse_kinematics(frames[n]).
+    """
+    import numpy as np
+
+    T = np.zeros((len(frames), 16))
+    for i, frame in enumerate(frames):
+        T[i, [0, 4, 8]] = frame.zaxis
+        T[i, [1, 5, 9]] = frame.xaxis
+        T[i, [2, 6, 10]] = frame.yaxis
+        T[i, [3, 7, 11]] = frame.point
+    T[:, 15] = 1
+
+    q_sols, valid = inverse_ros_batch(T, ur_params, q6_des)
+    q_sols[:, :, 0] -= math.pi
+    return q_sols, valid
+
+
 def forward_kinematics(configuration, ur_params):
     """Forward kinematics function.
 
@@ -59,6 +93,7 @@ def forward_kinematics(configuration, ur_params):
         the frame
     """
 
+    configuration = list(configuration)
     configuration[0] += math.pi
 
     T = forward_ros(configuration, ur_params)
@@ -70,6 +105,32 @@ def forward_kinematics(configuration, ur_params):
     return Frame(point, xaxis, yaxis)
 
 
+def forward_kinematics_batch(configurations, ur_params, jacobians=False):
+    """Forward kinematics of many configurations at once with numpy.
+
+    Args:
+        configurations, an (N,6) array of joint angles in radians
+        ur_params: UR defined parameters for the model
+        jacobians: also return the geometric Jacobians
+
+    Returns:
+        the (N,4,4) frames as matrices with the columns xaxis, yaxis, zaxis
+        and point of the frames of forward_kinematics, and with jacobians the
+        (N,6,6) Jacobians, see forward_ros_batch.
+    """
+    import numpy as np
+
+    q = np.array(configurations, dtype=float).reshape(-1, 6)
+    q[:, 0] += math.pi
+
+    result = forward_ros_batch(q, ur_params, jacobians)
+    T = result[0] if jacobians else result
+    T = T[:, :, [1, 2, 0, 3]]
+    if jacobians:
+        return T, result[1]
+    return T
+
+
 if __name__ == "__main__":
 
     #frame = Frame([56.9907, 410.9482, 432.3825], [0.0000, 1.0000, 0.0000], [1.0000, 0.0000, 0.0000])
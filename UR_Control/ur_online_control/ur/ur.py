@@ -42,6 +42,7 @@ class UR(object):
         self.set_base(Frame.worldXY())
         self.tool = Tool(Frame.worldXY())
         self.configuration = None
+        self.ik_cache = None # see set_ik_cache
 
         d1, a2, a3, d4, d5, d6 = self.params
 
@@ -72,6 +73,13 @@ class UR(object):
     def set_tool(self, tool):
         self.tool = tool
 
+    def set_ik_cache(self, ik_cache):
+        """Set the IKCache of inverse_kinematics, or None to disable it (the
+        default). Code which solves the same frames again, e.g. a Grasshopper
+        definition re-planning a structure, opts in with
+        set_ik_cache(IKCache(maxsize=...)) sized for all of its frames."""
+        self.ik_cache = ik_cache
+
     def get_robot_configuration(self):
         raise NotImplementedError
 
@@ -222,9 +230,9 @@ class UR(object):
         return tmodel
 
     def xdraw(self, configuration, xtransform_function=None):
-    	"""Get the transformed meshes of the robot and the tool model.
+        """Get the transformed meshes of the robot and the tool model.
 
-    	Args:
+        Args:
             configuration (:class:`BaseConfiguration`): the 6 joint angles in radians
             xtransform_function (function name, ): the name of the function
                 used to transform the model. Defaults to None.
@@ -232,11 +240,11 @@ class UR(object):
         Returns:
             model (:obj:`list` of :class:`Mesh`): The list of meshes in the
                 respective class of the CAD environment
-    	"""
+        """
         transformations = self.get_forward_transformations(configuration)
         tmodel = self.get_transformed_model(transformations, xtransform_function)
         if self.tool:
-        	tmodel += self.get_transformed_tool_model(transformations[5], xtransform_function)
+            tmodel += self.get_transformed_tool_model(transformations[5], xtransform_function)
         return tmodel
 
 
@@ -269,7 +277,10 @@ class UR(object):
         return forward_kinematics(configuration.joint_values, self.params)
 
     def inverse_kinematics(self, tool0_frame_RCS):
-        """Inverse kinematics function.
+        """Inverse kinematics function. With an ik_cache (see set_ik_cache),
+        the configurations are reused for frames within the
+        tolerance of the cache.
+
         Args:
             tool0_frame_RCS (:class:`Frame`): The tool0 frame to reach in robot
                 coordinate system (RCS).
@@ -278,8 +289,26 @@ class UR(object):
             configurations (:obj:`list` of :class:`BaseConfiguration`): A list
                 of possible configurations.
         """
-        solutions = inverse_kinematics(tool0_frame_RCS, self.params)
+        if self.ik_cache is None:
+            solutions = inverse_kinematics(tool0_frame_RCS, self.params)
+        else:
+            solutions = self.ik_cache.get(lambda: inverse_kinematics(tool0_frame_RCS, self.params), tool0_frame_RCS)
         configurations = []
         for joint_values in solutions:
             configurations.append(BaseConfiguration.from_joints(joint_values))
         return configurations
+
+    def inverse_kinematics_tcp(self, frame_tcp_WCS):
+        """Inverse kinematics of a tcp frame, with the tool and the base of
+        the robot.
+
+        Args:
+            frame_tcp_WCS (:class:`Frame`): The tcp frame to reach in world
+                coordinate system (WCS).
+
+        Returns:
+            configurations (:obj:`list` of :class:`BaseConfiguration`): A list
+                of possible configurations.
+        """
+        frame_RCS = self.get_frame_in_RCS(frame_tcp_WCS)
+        return self.inverse_kinematics(self.get_tool0_frame_from_tcp_frame(frame_RCS))
@@ -11,10 +11,16 @@ from ur_online_control.utilities import read_file_to_string, read_file_to_list
 # https://www.universal-robots.com/how-tos-and-faqs/how-to/ur-how-tos/remote-control-via-tcpip-16496/
 UR_SERVER_PORT = 30002
 
-def generate_ur_program():
+def generate_ur_program(buffer_size=5, publish_rate=20):
     """This function generates a program for the UR robot that allows for online
     communication.
     
+    Args:
+        buffer_size (int): the number of commands the robot can buffer. The
+            robot sends it to the server on connect, where it is used as stack_size.
+        publish_rate (int): the rate (Hz) the robot publishes its state with (at
+            most 125, 0: not at all). The server can change it with MSG_PUBLISH_RATE.
+    
     Returns:
         (string): the program as string
     """
@@ -44,6 +50,13 @@ def generate_ur_program():
     globals_str = globals_str.replace("{MESSAGE_IDENTIFIERS}", msg_identifier_str)
     globals_str = globals_str.replace("{COMMAND_IDENTIFIERS}", command_identifier_str)
     
+    # buffer, URScript only allows lists with fixed length
+    globals_str = globals_str.replace("{BUFFER_SIZE}", str(buffer_size))
+    globals_str = globals_str.replace("{BUFFER_INT}", "[%s]" % ",".join(["0"] * buffer_size))
+    globals_str = globals_str.replace("{BUFFER_POSE}", "[%s]" % ", ".join(["p[0,0,0,0,0,0]"] * buffer_size))
+    
+    globals_str = globals_str.replace("{PUBLISH_RATE}", str(publish_rate))
+    
     # program
     program_str = read_file_to_string(program_file)
     program_str = program_str.replace("{GLOBALS}", globals_str)
@@ -67,9 +80,9 @@ def send_script(ur_ip, script):
 
 class URDriver(object):
     
-    def __init__(self, server_ip, server_port, tool_angle_axis = [0,0,0,0,0,0], ip = "127.0.0.1", name = "UR"):
+    def __init__(self, server_ip, server_port, tool_angle_axis = [0,0,0,0,0,0], ip = "127.0.0.1", name = "UR", buffer_size = 5, publish_rate = 20):
                 
-        program = generate_ur_program()
+        program = generate_ur_program(buffer_size, publish_rate)
         
         tool_angle_axis_str = self._format_pose(tool_angle_axis)
         